@@ -0,0 +1,14 @@
+"""
+Local benchmark and regression harness for the lambda handlers.
+"""
+import os
+import sys
+
+API_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LAMBDA_DIR = os.path.join(API_DIR, "lambda")
+TEMPLATE_PATH = os.path.join(API_DIR, "cloudformation", "template.yaml")
+
+# Handlers import their siblings as top level packages (``common.utils``),
+# exactly as they do inside the deployed zip.
+if LAMBDA_DIR not in sys.path:
+    sys.path.insert(0, LAMBDA_DIR)
@@ -0,0 +1,99 @@
+"""
+Compare a result file against a baseline and report regressions.
+
+    python -m bench.compare results/latest.json baseline.json
+"""
+import argparse
+import json
+import sys
+from typing import List
+
+# metric path -> default allowed relative increase
+THRESHOLDS = {
+    ("latency_ms", "p50"): 0.25,
+    ("latency_ms", "p95"): 0.30,
+    ("peak_memory_kb", "max"): 0.25,
+    ("capacity", "rcu_per_call"): 0.05,
+    ("capacity", "wcu_per_call"): 0.05,
+}
+
+# Differences below these absolute floors are noise on a shared runner.
+FLOORS = {
+    "latency_ms": 2.0,
+    "peak_memory_kb": 256.0,
+    "capacity": 0.5,
+}
+
+
+def _get(summary: dict, path: tuple):
+    value = summary
+    for key in path:
+        value = (value or {}).get(key)
+    return value
+
+
+def compare(current: dict, baseline: dict, latency_tolerance: float = None) -> List[str]:
+    """Return a human readable line for every regression found."""
+    regressions = []
+    if current.get("config", {}).get("posts") != baseline.get("config", {}).get("posts"):
+        regressions.append(
+            f"corpus size differs: {current.get('config', {}).get('posts')} vs "
+            f"baseline {baseline.get('config', {}).get('posts')}"
+        )
+    for name, base in baseline.get("scenarios", {}).items():
+        cur = current.get("scenarios", {}).get(name)
+        if cur is None:
+            regressions.append(f"{name}: only in baseline, missing from current run")
+            continue
+        if cur.get("errors", 0) > base.get("errors", 0):
+            regressions.append(f"{name}: errors {base.get('errors', 0)} -> {cur['errors']}")
+        for path, tolerance in THRESHOLDS.items():
+            if latency_tolerance is not None and path[0] == "latency_ms":
+                tolerance = latency_tolerance
+            old, new = _get(base, path), _get(cur, path)
+            if old is None or new is None:
+                continue
+            if new - old > FLOORS[path[0]] and new > old * (1 + tolerance):
+                regressions.append(
+                    f"{name}: {'.'.join(path)} {old} -> {new} (+{(new / old - 1) * 100 if old else 100:.0f}%, "
+                    f"allowed {tolerance * 100:.0f}%)"
+                )
+    return regressions
+
+
+def uncompared(current: dict, baseline: dict) -> List[str]:
+    """Scenarios in the current run that the baseline has no numbers for."""
+    base = baseline.get("scenarios", {})
+    return [
+        f"{name}: only in current run, no baseline to compare against"
+        for name in current.get("scenarios", {}) if name not in base
+    ]
+
+
+def report(current: dict, baseline: dict, latency_tolerance: float = None, out=sys.stdout) -> int:
+    """Print regressions and uncompared scenarios; returns the exit code."""
+    for line in uncompared(current, baseline):
+        print(f"NOT COMPARED {line}", file=out)
+    regressions = compare(current, baseline, latency_tolerance)
+    for line in regressions:
+        print(f"REGRESSION {line}", file=out)
+    if not regressions:
+        print("No regressions against baseline.", file=out)
+    return 1 if regressions else 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("current")
+    parser.add_argument("baseline")
+    parser.add_argument("--latency-tolerance", type=float, default=None)
+    args = parser.parse_args(argv)
+    with open(args.current) as f:
+        current = json.load(f)
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    return report(current, baseline, args.latency_tolerance)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
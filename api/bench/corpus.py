@@ -0,0 +1,123 @@
+"""
+Synthetic government-scheme posts shaped exactly like the items create.py writes.
+"""
+import random
+import uuid
+from datetime import datetime, timedelta
+from typing import Iterator, List
+
+import boto3
+from common.windows import WINDOW_ATTRIBUTE, window_for
+
+CATEGORIES = [
+    "schemes", "jobs", "education", "health", "agriculture",
+    "business", "technology", "finance", "transport",
+]
+
+WORDS = (
+    "pradhan mantri yojana scheme scholarship kisan farmer subsidy loan pension "
+    "recruitment vacancy exam admit card result application online offline district "
+    "maharashtra rural urban health insurance ayushman housing awas women child "
+    "education student hostel startup msme credit bank digital skill training "
+    "employment gramin panchayat water irrigation solar electricity transport bus "
+    "license certificate aadhaar ration card registration deadline eligibility "
+    "documents benefits apply last date notification government department"
+).split()
+
+IMAGE_TYPES = [".jpg", ".png", ".webp"]
+
+
+class Corpus:
+    """
+    Deterministic corpus generator. ``html_kb`` is the median body size; bodies
+    follow a log-normal spread like real scheme notices (a few very long ones).
+    Posts are spread over ``span_days`` so most of the archive has closed.
+    """
+
+    def __init__(self, posts: int = 1000, html_kb: float = 6.0, seed: int = 26, draft_ratio: float = 0.1,
+                 span_days: int = 730):
+        self.posts = posts
+        self.html_kb = html_kb
+        self.span_days = span_days
+        self.draft_ratio = draft_ratio
+        self.rng = random.Random(seed)
+        self.ids: List[str] = []
+        self.titles: List[str] = []
+        self.categories: List[str] = []
+
+    def _sentence(self, words: int) -> str:
+        return " ".join(self.rng.choice(WORDS) for _ in range(words))
+
+    def _html(self) -> str:
+        target = int(min(300_000, max(400, self.rng.lognormvariate(0, 0.8) * self.html_kb * 1024)))
+        parts, size = [], 0
+        while size < target:
+            paragraph = f"<p>{self._sentence(self.rng.randint(20, 60)).capitalize()}.</p>"
+            if self.rng.random() < 0.2:
+                paragraph += f"<ul>{''.join(f'<li>{self._sentence(6)}</li>' for _ in range(4))}</ul>"
+            parts.append(paragraph)
+            size += len(paragraph)
+        return f"<h2>{self._sentence(5).title()}</h2>" + "".join(parts)
+
+    def items(self, bucket: str = None) -> Iterator[dict]:
+        """Posts as stored; with ``bucket`` the body is compressed or offloaded like create.py does."""
+        # Imported late so common.s3 creates its client under the mocks.
+        from common.body import store_body
+
+        now = datetime.utcnow()
+        for i in range(self.posts):
+            blog_id = str(uuid.UUID(int=self.rng.getrandbits(128), version=4))
+            published = now - timedelta(days=(self.posts - i) * self.span_days / self.posts)
+            start = published.date() + timedelta(days=self.rng.randint(-30, 20))
+            end = start + timedelta(days=self.rng.randint(7, 120))
+            title = self._sentence(self.rng.randint(4, 9)).title()
+            item = {
+                "id": blog_id,
+                "title": title,
+                "htmlContent": self._html(),
+                "contentSummary": self._sentence(self.rng.randint(15, 35)).capitalize() + ".",
+                "startDate": start.isoformat(),
+                "endDate": end.isoformat(),
+                "category": self.rng.choice(CATEGORIES),
+                "status": "draft" if self.rng.random() < self.draft_ratio else "published",
+                "image": f"{blog_id}{self.rng.choice(IMAGE_TYPES)}",
+                "createdAt": published.isoformat(),
+                "updatedAt": published.isoformat(),
+                "publishedAt": published.isoformat(),
+                "version": 1,
+                "ttl": int((datetime.combine(end, datetime.min.time()) + timedelta(days=7)).timestamp()),
+            }
+            if bucket:
+                item.update(store_body(bucket, item.pop("htmlContent")))
+            window = window_for(item["startDate"], item["endDate"], item["status"])
+            if window:
+                item[WINDOW_ATTRIBUTE] = window
+            self.ids.append(blog_id)
+            self.titles.append(title)
+            self.categories.append(item["category"])
+            yield item
+
+    def seed(self, table_name: str, bucket: str = None) -> int:
+        table = boto3.resource("dynamodb").Table(table_name)
+        count = 0
+        with table.batch_writer() as batch:
+            for item in self.items(bucket):
+                batch.put_item(Item=item)
+                count += 1
+        return count
+
+    def new_post(self) -> dict:
+        """Request payload for blogs.create, less the uploaded image key."""
+        start = datetime.utcnow().date()
+        return {
+            "title": self._sentence(6).title(),
+            "htmlContent": self._html(),
+            "contentSummary": self._sentence(25).capitalize() + ".",
+            "startDate": start.isoformat(),
+            "endDate": (start + timedelta(days=self.rng.randint(7, 90))).isoformat(),
+            "category": self.rng.choice(CATEGORIES),
+            "status": "published",
+        }
+
+    def search_term(self) -> str:
+        return self.rng.choice(WORDS)
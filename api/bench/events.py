@@ -0,0 +1,175 @@
+"""
+API Gateway REST (proxy integration) events and a minimal Lambda context.
+"""
+import base64
+import fnmatch
+import itertools
+import json
+import time
+import uuid
+from typing import Optional
+from urllib.parse import parse_qs
+
+from boto3.dynamodb.types import TypeSerializer
+
+_clients = itertools.count()
+
+
+def api_event(
+    method: str,
+    path: str,
+    query: Optional[dict] = None,
+    body=None,
+    headers: Optional[dict] = None,
+    is_base64: bool = False,
+    claims: Optional[dict] = None,
+    source_ip: Optional[str] = None,
+) -> dict:
+    """
+    Build an event shaped like the ones API Gateway sends to the handlers.
+    Without ``source_ip`` each event comes from a different client, so
+    replayed traffic is not throttled by the per-client rate limits.
+    """
+    if not source_ip:
+        n = next(_clients)
+        source_ip = f"10.0.{n // 250 % 250}.{n % 250 + 1}"
+    if body is not None and not isinstance(body, (str, bytes)):
+        body = json.dumps(body)
+    if isinstance(body, bytes):
+        body = base64.b64encode(body).decode("ascii")
+        is_base64 = True
+    headers = {"Content-Type": "application/json", **(headers or {})}
+    request_context = {
+        "resourcePath": path,
+        "httpMethod": method,
+        "path": path,
+        "stage": "bench",
+        "requestId": str(uuid.uuid4()),
+        "requestTimeEpoch": int(time.time() * 1000),
+        "identity": {"sourceIp": source_ip, "userAgent": "jalad-bench"},
+    }
+    if claims:
+        request_context["authorizer"] = {"claims": claims}
+    return {
+        "resource": path,
+        "path": path,
+        "httpMethod": method,
+        "headers": headers,
+        "multiValueHeaders": {k: [v] for k, v in headers.items()},
+        "queryStringParameters": {k: str(v) for k, v in query.items()} if query else None,
+        "multiValueQueryStringParameters": {k: [str(v)] for k, v in query.items()} if query else None,
+        "pathParameters": None,
+        "stageVariables": None,
+        "requestContext": request_context,
+        "body": body,
+        "isBase64Encoded": is_base64,
+    }
+
+
+def http_event(
+    method: str,
+    path: str,
+    resource: str,
+    query_string: str = "",
+    headers: Optional[list] = None,
+    body: bytes = b"",
+    source_ip: str = "127.0.0.1",
+    path_parameters: Optional[dict] = None,
+    binary_media_types=(),
+) -> dict:
+    """
+    Translate a raw HTTP request into the proxy event API Gateway sends for
+    the route ``resource``. ``headers`` are (name, value) pairs as received;
+    bodies of ``binary_media_types`` arrive base64-encoded, others as text.
+    """
+    headers = headers or []
+    single_headers, multi_headers = {}, {}
+    for name, value in headers:
+        single_headers[name] = value
+        multi_headers.setdefault(name, []).append(value)
+    content_type = next((v for k, v in single_headers.items() if k.lower() == "content-type"), "")
+    is_base64 = bool(body) and any(
+        fnmatch.fnmatch(content_type.split(";")[0].strip().lower(), t) for t in binary_media_types
+    )
+    if is_base64:
+        body = base64.b64encode(body).decode("ascii")
+    else:
+        body = body.decode("utf-8", errors="replace") if body else None
+
+    query = parse_qs(query_string, keep_blank_values=True)
+    return {
+        "resource": resource,
+        "path": path,
+        "httpMethod": method,
+        "headers": single_headers or None,
+        "multiValueHeaders": multi_headers or None,
+        "queryStringParameters": {k: v[-1] for k, v in query.items()} or None,
+        "multiValueQueryStringParameters": query or None,
+        "pathParameters": path_parameters or None,
+        "stageVariables": None,
+        "requestContext": {
+            "resourcePath": resource,
+            "httpMethod": method,
+            "path": path,
+            "stage": "local",
+            "requestId": str(uuid.uuid4()),
+            "requestTimeEpoch": int(time.time() * 1000),
+            "identity": {"sourceIp": source_ip, "userAgent": single_headers.get("User-Agent", "")},
+        },
+        "body": body,
+        "isBase64Encoded": is_base64,
+    }
+
+
+def stream_event(changes) -> dict:
+    """DynamoDB stream records for (old_image, new_image) pairs, as the post stream receives them."""
+    serializer = TypeSerializer()
+    records = []
+    for old, new in changes:
+        record = {"Keys": {"id": {"S": (new or old)["id"]}}, "StreamViewType": "NEW_AND_OLD_IMAGES"}
+        for name, image in (("OldImage", old), ("NewImage", new)):
+            if image:
+                record[name] = {k: serializer.serialize(v) for k, v in image.items()}
+        records.append({
+            "eventID": uuid.uuid4().hex,
+            "eventName": "INSERT" if old is None else "REMOVE" if new is None else "MODIFY",
+            "eventSource": "aws:dynamodb",
+            "dynamodb": record,
+        })
+    return {"Records": records}
+
+
+def multipart_body(fields: dict, boundary: str = None):
+    """Encode ``fields`` as multipart/form-data; bytes values become file parts."""
+    boundary = boundary or uuid.uuid4().hex
+    chunks = []
+    for name, value in fields.items():
+        chunks.append(f"--{boundary}\r\n".encode())
+        if isinstance(value, bytes):
+            chunks.append(
+                f'Content-Disposition: form-data; name="{name}"; filename="{name}"\r\n'
+                f"Content-Type: application/octet-stream\r\n\r\n".encode()
+            )
+            chunks.append(value)
+        else:
+            chunks.append(f'Content-Disposition: form-data; name="{name}"\r\n\r\n{value}'.encode())
+        chunks.append(b"\r\n")
+    chunks.append(f"--{boundary}--\r\n".encode())
+    return b"".join(chunks), f"multipart/form-data; boundary={boundary}"
+
+
+class LambdaContext:
+    """Just enough of the Lambda context object for handlers and logging."""
+
+    def __init__(self, function_name: str = "bench", memory_limit_in_mb: int = 256, timeout: int = 45):
+        self.function_name = function_name
+        self.function_version = "$LATEST"
+        self.memory_limit_in_mb = memory_limit_in_mb
+        self.invoked_function_arn = f"arn:aws:lambda:us-east-1:123456789012:function:{function_name}"
+        self.aws_request_id = str(uuid.uuid4())
+        self.log_group_name = f"/aws/lambda/{function_name}"
+        self.log_stream_name = "bench"
+        self._deadline = time.monotonic() + timeout
+
+    def get_remaining_time_in_millis(self) -> int:
+        return max(0, int((self._deadline - time.monotonic()) * 1000))
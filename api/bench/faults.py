@@ -0,0 +1,59 @@
+"""
+Fault injection for DynamoDB and Cognito calls, used to replay handlers under
+throttling.
+"""
+import random
+
+import boto3
+
+ERRORS = {
+    "throttle": ("ProvisionedThroughputExceededException", "The level of configured provisioned throughput for the table was exceeded."),
+    "missing_index": ("ValidationException", "The table does not have the specified index: statusPublishedAtIndex"),
+    "internal": ("InternalServerError", "Internal server error"),
+    "cognito_throttle": ("TooManyRequestsException", "Too many requests"),
+}
+
+
+class _FaultResponse:
+    status_code = 400
+    headers = {}
+    content = b""
+    text = ""
+
+    def __init__(self, status_code: int):
+        self.status_code = status_code
+
+
+class FaultInjector:
+    """
+    Short-circuits DynamoDB and Cognito operations with an error response. Registered
+    once on the default session before any handler client exists; scenarios
+    change the active rules through ``configure``.
+    """
+
+    def __init__(self, seed: int = 27):
+        self.rules = {}
+        self.injected = 0
+        self.rng = random.Random(seed)
+        boto3.DEFAULT_SESSION.events.register("before-call.dynamodb", self._before_call)
+        boto3.DEFAULT_SESSION.events.register("before-call.cognito-identity-provider", self._before_call)
+
+    def configure(self, rules: dict = None):
+        """``rules`` maps an operation name to ``(error kind, probability)``."""
+        self.rules = dict(rules or {})
+        self.injected = 0
+
+    def _before_call(self, model, **kwargs):
+        rule = self.rules.get(model.name)
+        if not rule:
+            return None
+        kind, probability = rule
+        if self.rng.random() >= probability:
+            return None
+        self.injected += 1
+        code, message = ERRORS[kind]
+        status = 500 if kind == "internal" else 400
+        return _FaultResponse(status), {
+            "Error": {"Code": code, "Message": message},
+            "ResponseMetadata": {"HTTPStatusCode": status, "RetryAttempts": 0},
+        }
@@ -0,0 +1,187 @@
+"""
+Load generator for the local API server (bench/server.py).
+
+    python -m bench.loadgen --url http://127.0.0.1:3001 --duration 30 --concurrency 8
+    python -m bench.loadgen --route /search-blogs --route /suggest-blogs --clients 1
+
+Each worker keeps one HTTP connection open and sends a weighted mix of read
+requests for ``--duration`` seconds. Requests come from ``--clients``
+distinct addresses (sent as X-Forwarded-For), so the per-client rate
+limits only refuse traffic when that is what is being tested. Reports
+requests per second and latency percentiles per route, plus the cold
+starts the server reported.
+"""
+import argparse
+import http.client
+import json
+import random
+import sys
+import threading
+import time
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional
+from urllib.parse import urlencode, urlsplit
+
+from bench.corpus import CATEGORIES, WORDS
+from bench.metrics import dumps, percentile
+
+
+class Target:
+    """Ids and titles of real posts, fetched from the server so requests hit existing items."""
+
+    def __init__(self, ids: List[str], titles: List[str]):
+        self.ids = ids or ["missing"]
+        self.titles = titles or WORDS
+
+
+# (path, weight, query builder)
+MIX = [
+    ("/get-blogs", 20, lambda rng, t: {"limit": 10}),
+    ("/get-blogs-by-category", 15, lambda rng, t: {"category": rng.choice(CATEGORIES), "limit": 10}),
+    ("/get-blog-by-id", 25, lambda rng, t: {"id": rng.choice(t.ids)}),
+    ("/search-blogs", 10, lambda rng, t: {"q": rng.choice(WORDS), "limit": 20}),
+    ("/suggest-blogs", 15, lambda rng, t: {"q": rng.choice(t.titles)[: rng.randint(1, 8)], "limit": 8}),
+    ("/get-open-blogs", 5, lambda rng, t: {"limit": 10}),
+    ("/get-closing-soon-blogs", 5, lambda rng, t: {"limit": 10, "days": 7}),
+    ("/get-popular-blogs", 5, lambda rng, t: {"limit": 10}),
+]
+
+
+class Connection:
+    def __init__(self, url: str, timeout: float):
+        parts = urlsplit(url)
+        self.host, self.port, self.timeout = parts.hostname, parts.port or 80, timeout
+        self._conn = None
+
+    def get(self, path: str, query: dict, headers: dict):
+        if self._conn is None:
+            self._conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        try:
+            self._conn.request("GET", f"{path}?{urlencode(query)}" if query else path, headers=headers)
+            response = self._conn.getresponse()
+            return response.status, response.getheader("X-Local-Cold-Start") == "1", response.read()
+        except (OSError, http.client.HTTPException):
+            self._conn.close()
+            self._conn = None
+            raise
+
+
+def discover(url: str, timeout: float) -> Target:
+    status, _, body = Connection(url, timeout).get("/get-blogs", {"limit": 50}, {})
+    blogs = json.loads(body).get("blogs", []) if status == 200 else []
+    return Target([b["id"] for b in blogs], [b["title"] for b in blogs if b.get("title")])
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.status_codes: Dict[str, Dict[int, int]] = defaultdict(lambda: defaultdict(int))
+        self.cold_starts: Dict[str, int] = defaultdict(int)
+        self.failures: Dict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def record(self, route: str, elapsed_ms: float, status: Optional[int], cold: bool = False):
+        with self._lock:
+            if status is None:
+                self.failures[route] += 1
+                return
+            self.latencies[route].append(elapsed_ms)
+            self.status_codes[route][status] += 1
+            self.cold_starts[route] += cold
+
+    def summary(self, elapsed: float) -> dict:
+        routes = {}
+        for route in sorted(set(self.latencies) | set(self.failures)):
+            latencies = self.latencies[route]
+            codes = self.status_codes[route]
+            routes[route] = {
+                "requests": len(latencies),
+                "requests_per_second": round(len(latencies) / elapsed, 2),
+                "errors": sum(n for code, n in codes.items() if code >= 500) + self.failures[route],
+                "status_codes": {str(k): v for k, v in sorted(codes.items())},
+                "cold_starts": self.cold_starts[route],
+                "latency_ms": {
+                    "p50": round(percentile(latencies, 50), 3),
+                    "p95": round(percentile(latencies, 95), 3),
+                    "p99": round(percentile(latencies, 99), 3),
+                    "max": round(max(latencies, default=0), 3),
+                },
+            }
+        total = sum(r["requests"] for r in routes.values())
+        return {
+            "seconds": round(elapsed, 2),
+            "requests": total,
+            "requests_per_second": round(total / elapsed, 2),
+            "routes": routes,
+        }
+
+
+def worker(url: str, pick: Callable, target: Target, recorder: Recorder, deadline: float, clients: int,
+           seed: int, timeout: float):
+    rng = random.Random(seed)
+    connection = Connection(url, timeout)
+    while time.monotonic() < deadline:
+        path, _, make_query = pick(rng)
+        client = rng.randrange(clients)
+        headers = {"X-Forwarded-For": f"10.{client // 65536 % 256}.{client // 256 % 256}.{client % 256}"}
+        started = time.perf_counter()
+        try:
+            status, cold, _ = connection.get(path, make_query(rng, target), headers)
+        except (OSError, http.client.HTTPException):
+            status, cold = None, False
+        recorder.record(path, (time.perf_counter() - started) * 1000, status, cold)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://127.0.0.1:3001")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds to send requests for")
+    parser.add_argument("--concurrency", type=int, default=8, help="concurrent connections")
+    parser.add_argument("--clients", type=int, default=10000, help="distinct client addresses")
+    parser.add_argument("--route", action="append", choices=[path for path, _, _ in MIX],
+                        help="only request these routes")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, default=40)
+    parser.add_argument("--output", help="write the JSON summary here as well")
+    args = parser.parse_args(argv)
+
+    mix = [entry for entry in MIX if not args.route or entry[0] in args.route]
+    weights = [weight for _, weight, _ in mix]
+    target = discover(args.url, args.timeout)
+    recorder = Recorder()
+
+    started = time.monotonic()
+    deadline = started + args.duration
+    threads = [
+        threading.Thread(
+            target=worker,
+            args=(args.url, lambda rng: rng.choices(mix, weights)[0], target, recorder, deadline,
+                  max(1, args.clients), args.seed + n, args.timeout),
+            daemon=True,
+        )
+        for n in range(args.concurrency)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    summary = recorder.summary(time.monotonic() - started)
+    summary["config"] = {"concurrency": args.concurrency, "clients": args.clients, "duration": args.duration}
+
+    for route, stats in summary["routes"].items():
+        lat = stats["latency_ms"]
+        print(
+            f"{route:<26} {stats['requests_per_second']:>8.1f} req/s p50={lat['p50']:>8.2f}ms "
+            f"p95={lat['p95']:>8.2f}ms p99={lat['p99']:>8.2f}ms cold={stats['cold_starts']:>3} "
+            f"errors={stats['errors']} codes={stats['status_codes']}",
+            file=sys.stderr,
+        )
+    print(f"{'total':<26} {summary['requests_per_second']:>8.1f} req/s over {summary['seconds']}s", file=sys.stderr)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(dumps(summary))
+    return 1 if any(stats["errors"] for stats in summary["routes"].values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,257 @@
+"""
+Latency, memory and DynamoDB capacity accounting for handler invocations.
+
+moto reports a constant ConsumedCapacity, so capacity is estimated from item
+sizes using the DynamoDB billing rules: reads are 4 KB units (half for
+eventually consistent reads), writes are 1 KB units charged on the larger of
+the old and new image, plus the same for every GSI whose projected entry
+the write changes.
+"""
+import json
+import math
+import resource
+import time
+import tracemalloc
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+import boto3
+
+READ_UNIT = 4096
+WRITE_UNIT = 1024
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100
+    low, high = math.floor(rank), math.ceil(rank)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def attribute_size(value: dict) -> int:
+    """Size in bytes of a low level AttributeValue, per the DynamoDB rules."""
+    (kind, raw), = value.items()
+    if kind == "S":
+        return len(raw.encode("utf-8"))
+    if kind == "N":
+        return len(raw.lstrip("-").replace(".", "").lstrip("0")) // 2 + 2
+    if kind == "B":
+        return len(raw)
+    if kind in ("BOOL", "NULL"):
+        return 1
+    if kind in ("SS", "BS"):
+        return sum(len(v.encode("utf-8") if isinstance(v, str) else v) for v in raw)
+    if kind == "NS":
+        return sum(attribute_size({"N": v}) for v in raw)
+    if kind == "L":
+        return 3 + sum(attribute_size(v) + 1 for v in raw)
+    if kind == "M":
+        return 3 + sum(len(k.encode("utf-8")) + attribute_size(v) + 1 for k, v in raw.items())
+    return 0
+
+
+def item_size(item: dict) -> int:
+    if not item:
+        return 0
+    return sum(len(name.encode("utf-8")) + attribute_size(value) for name, value in item.items())
+
+
+def _index_entry(item: dict, keys: List[str], attributes) -> Optional[dict]:
+    """The GSI entry for ``item``: None if sparse, else its projected attributes."""
+    if not item or not all(k in item for k in keys):
+        return None
+    if attributes is None:
+        return item
+    return {k: v for k, v in item.items() if k in attributes}
+
+
+class CapacityMeter:
+    """
+    Hooks the default boto3 session so every DynamoDB and S3 call made by a
+    handler is counted. Item images needed for write sizing are read through
+    a separate, unhooked client; the time spent doing so is tracked in
+    ``overhead_ms`` so the runner can take it out of handler latency.
+    """
+
+    WRITES = {"PutItem", "UpdateItem", "DeleteItem", "BatchWriteItem"}
+
+    def __init__(self, stack):
+        self.stack = stack
+        self._raw = boto3.session.Session().client("dynamodb")
+        self._table_keys = {}
+        self._gsi_projections = {}
+        self._mean_size = {}
+        self._pending_old = []
+        for spec in stack.tables():
+            self._table_keys[spec.name] = [k["AttributeName"] for k in spec.properties["KeySchema"]]
+            self._gsi_projections[spec.name] = spec.gsi_projections
+        self.reset()
+        events = boto3.DEFAULT_SESSION.events
+        # register_last so boto3's resource layer has already serialised the
+        # parameters into low level AttributeValues.
+        events.register_last("before-parameter-build.dynamodb", self._before_dynamodb)
+        events.register("after-call.dynamodb", self._after_dynamodb)
+        events.register("after-call.s3", self._after_s3)
+
+    def reset(self):
+        self.rcu = 0.0
+        self.wcu = 0.0
+        self.calls: Dict[str, int] = defaultdict(int)
+        self.overhead_ms = 0.0
+
+    def calibrate(self, table_name: str):
+        """Record the mean item size so projected queries and scans can be sized."""
+        total = count = 0
+        for page in self._raw.get_paginator("scan").paginate(TableName=table_name):
+            for item in page["Items"]:
+                total += item_size(item)
+                count += 1
+        self._mean_size[table_name] = total / count if count else 0
+
+    def _key_of(self, table: str, item: dict) -> dict:
+        return {k: item[k] for k in self._table_keys.get(table, []) if k in item}
+
+    def _image(self, table: str, key: dict) -> dict:
+        if not key:
+            return {}
+        started = time.perf_counter()
+        item = self._raw.get_item(TableName=table, Key=key).get("Item", {})
+        self.overhead_ms += (time.perf_counter() - started) * 1000
+        return item
+
+    def _write_units(self, table: str, old: dict, new: dict) -> float:
+        units = math.ceil(max(item_size(old), item_size(new), 1) / WRITE_UNIT)
+        for keys, attributes in self._gsi_projections.get(table, []):
+            old_entry, new_entry = _index_entry(old, keys, attributes), _index_entry(new, keys, attributes)
+            if old_entry == new_entry:
+                # Writes that leave the projected attributes alone skip the index.
+                continue
+            if old_entry and new_entry and any(old_entry[k] != new_entry[k] for k in keys):
+                # A changed index key is a delete plus a put.
+                units += math.ceil(item_size(old_entry) / WRITE_UNIT) + math.ceil(item_size(new_entry) / WRITE_UNIT)
+            else:
+                units += math.ceil(max(item_size(old_entry), item_size(new_entry), 1) / WRITE_UNIT)
+        return units
+
+    def _before_dynamodb(self, model, params, context, **kwargs):
+        op = model.name
+        context["bench_params"] = params
+        self._pending_old = []
+        if op in ("PutItem", "UpdateItem", "DeleteItem"):
+            table = params["TableName"]
+            key = params.get("Key") or self._key_of(table, params.get("Item", {}))
+            self._pending_old.append((table, key, self._image(table, key)))
+        elif op == "BatchWriteItem":
+            for table, requests in params.get("RequestItems", {}).items():
+                for request in requests:
+                    if "PutRequest" in request:
+                        key = self._key_of(table, request["PutRequest"]["Item"])
+                    else:
+                        key = request["DeleteRequest"]["Key"]
+                    self._pending_old.append((table, key, self._image(table, key)))
+
+    def _read_units(self, table: str, items: List[dict], scanned: int, consistent: bool) -> float:
+        size = sum(item_size(i) for i in items)
+        if scanned > len(items):
+            size = max(size, scanned * self._mean_size.get(table, 0))
+        units = math.ceil(max(size, 1) / READ_UNIT)
+        return units if consistent else units / 2
+
+    def _after_dynamodb(self, http_response, parsed, model, context, **kwargs):
+        op = model.name
+        params = context.get("bench_params", {})
+        self.calls[f"dynamodb.{op}"] += 1
+        if http_response.status_code >= 300:
+            return
+        if op == "GetItem":
+            item = parsed.get("Item", {})
+            if item and "ProjectionExpression" in params:
+                # Projections do not reduce the charge; size the whole item.
+                item = self._image(params["TableName"], params["Key"])
+            self.rcu += self._read_units(params["TableName"], [item], 1, params.get("ConsistentRead", False))
+        elif op in ("Query", "Scan"):
+            table = params["TableName"]
+            projected = "ProjectionExpression" in params or params.get("Select") == "COUNT"
+            scanned = parsed.get("ScannedCount", parsed.get("Count", 0))
+            items = [] if projected else parsed.get("Items", [])
+            units = self._read_units(table, items, scanned, params.get("ConsistentRead", False))
+            self.rcu += units
+            if "ConsumedCapacity" in parsed:
+                # Report the estimate back, as DynamoDB would, for callers that charge by it.
+                parsed["ConsumedCapacity"]["CapacityUnits"] = units
+        elif op == "BatchGetItem":
+            for table, items in parsed.get("Responses", {}).items():
+                self.rcu += sum(self._read_units(table, [i], 1, False) for i in items)
+        elif op in self.WRITES:
+            for table, key, old in self._pending_old:
+                self.wcu += self._write_units(table, old, self._image(table, key))
+        self._pending_old = []
+
+    def _after_s3(self, model, **kwargs):
+        self.calls[f"s3.{model.name}"] += 1
+
+
+class Invocation:
+    """
+    Context manager timing one handler call. tracemalloc slows allocation
+    heavy code down considerably, so memory is only traced when asked and
+    those calls are kept out of the latency figures.
+    """
+
+    def __init__(self, trace_memory: bool = False):
+        self.trace_memory = trace_memory
+        self.peak_bytes = 0
+
+    def __enter__(self):
+        if self.trace_memory:
+            tracemalloc.start()
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed_ms = (time.perf_counter() - self.started) * 1000
+        if self.trace_memory:
+            _, self.peak_bytes = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+        return False
+
+
+def max_rss_kb() -> int:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def memory_summary(peaks: List[int]) -> dict:
+    return {
+        "max": round(max(peaks, default=0) / 1024, 1),
+        "p95": round(percentile(peaks, 95) / 1024, 1),
+    }
+
+
+def summarize(latencies: List[float], meter: CapacityMeter, errors: int, status_codes: Dict[int, int]) -> dict:
+    n = max(len(latencies), 1)
+    return {
+        "invocations": len(latencies),
+        "errors": errors,
+        "status_codes": {str(k): v for k, v in sorted(status_codes.items())},
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50), 3),
+            "p90": round(percentile(latencies, 90), 3),
+            "p95": round(percentile(latencies, 95), 3),
+            "p99": round(percentile(latencies, 99), 3),
+            "max": round(max(latencies, default=0), 3),
+            "mean": round(sum(latencies) / n, 3),
+        },
+        "capacity": {
+            "rcu_per_call": round(meter.rcu / n, 3),
+            "wcu_per_call": round(meter.wcu / n, 3),
+            "rcu_total": round(meter.rcu, 2),
+            "wcu_total": round(meter.wcu, 2),
+        },
+        "aws_calls_per_call": {k: round(v / n, 3) for k, v in sorted(meter.calls.items())},
+    }
+
+
+def dumps(results: dict) -> str:
+    return json.dumps(results, indent=2, sort_keys=True)
@@ -0,0 +1,166 @@
+"""
+Replay API Gateway events against the handlers on local DynamoDB/S3 stand-ins.
+
+    cd api
+    pip install -r bench/requirements.txt
+    python -m bench.run --posts 1000
+    python -m bench.run --posts 1000 --baseline bench/baselines/1k.json
+    python -m bench.run --posts 1000 --save-baseline bench/baselines/1k.json
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime
+
+from bench import API_DIR
+from bench.compare import report
+from bench.corpus import Corpus
+from bench.events import LambdaContext
+from bench.local_aws import LocalAWS
+from bench.metrics import CapacityMeter, Invocation, dumps, max_rss_kb, memory_summary, summarize
+from bench.scenarios import SCENARIOS, ScenarioState
+from bench.stack import Stack
+
+RESULTS_DIR = os.path.join(API_DIR, "bench", "results")
+
+
+def run_scenario(local, meter, state, scenario, iterations: int, warmup: int, memory_samples: int) -> dict:
+    spec = local.stack.function(scenario.handler)
+    context = LambdaContext(
+        spec.logical_id if spec else scenario.handler,
+        spec.memory_size if spec else 256,
+        spec.timeout if spec else 45,
+    )
+    # Every scenario gets a fresh container so breaker and cache state from
+    # one scenario cannot leak into the next.
+    local.cold_start()
+    local.faults.configure()
+    handler = local.handler(scenario.handler)
+    # Warm up healthy, as a container would have been before a brownout.
+    for i in range(warmup):
+        handler(scenario.make_event(state, i), context)
+    local.faults.configure(scenario.faults)
+
+    meter.reset()
+    latencies, errors, status_codes = [], 0, defaultdict(int)
+    for i in range(iterations):
+        event = scenario.make_event(state, warmup + i)
+        overhead = meter.overhead_ms
+        with Invocation() as call:
+            response = handler(event, context)
+        latencies.append(call.elapsed_ms - (meter.overhead_ms - overhead))
+        # Stream and scheduled handlers return no status; raising is their failure.
+        status = response.get("statusCode", 200)
+        status_codes[status] += 1
+        if status >= 500 and status not in scenario.expected:
+            errors += 1
+
+    summary = summarize(latencies, meter, errors, status_codes)
+    summary["injected_faults"] = local.faults.injected
+
+    peaks = []
+    for i in range(memory_samples):
+        with Invocation(trace_memory=True) as call:
+            handler(scenario.make_event(state, warmup + iterations + i), context)
+        peaks.append(call.peak_bytes)
+    summary["peak_memory_kb"] = memory_summary(peaks)
+    if scenario.report:
+        summary.update(scenario.report(state))
+    return summary
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--posts", type=int, default=1000, help="corpus size to seed (e.g. 1000, 100000)")
+    parser.add_argument("--html-kb", type=float, default=6.0, help="median htmlContent size in KB")
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--memory-samples", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=26)
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS), help="run only these scenarios")
+    parser.add_argument("--output", help="result file (default: bench/results/<timestamp>.json)")
+    parser.add_argument("--baseline", help="fail with exit code 1 on regression against this result file")
+    parser.add_argument("--save-baseline", help="also write the result to this path")
+    parser.add_argument("--latency-tolerance", type=float, default=None)
+    parser.add_argument("--verbose", action="store_true", help="keep handler logging")
+    parser.add_argument("--skip-missing", action="store_true",
+                        help="skip scenarios whose handler template.yaml does not declare (e.g. on an older branch)")
+    args = parser.parse_args(argv)
+
+    if not args.verbose:
+        logging.disable(logging.ERROR)
+
+    # Registration order runs read-only scenarios before the ones that write.
+    names = args.scenario or list(SCENARIOS)
+    stack = Stack()
+    if args.skip_missing:
+        missing = [name for name in names if not stack.function(SCENARIOS[name].handler)]
+        for name in missing:
+            print(f"Skipping {name}: {SCENARIOS[name].handler} is not in template.yaml", file=sys.stderr)
+        names = [name for name in names if name not in missing]
+    results = {
+        "config": {
+            "posts": args.posts,
+            "html_kb": args.html_kb,
+            "iterations": args.iterations,
+            "warmup": args.warmup,
+            "seed": args.seed,
+            "python": sys.version.split()[0],
+        },
+        "started_at": datetime.utcnow().isoformat(),
+        "scenarios": {},
+    }
+
+    with LocalAWS(stack) as local:
+        meter = CapacityMeter(stack)
+        corpus = Corpus(posts=args.posts, html_kb=args.html_kb, seed=args.seed)
+        blogs_table = local.table_name("BlogsTable")
+        seed_started = time.perf_counter()
+        corpus.seed(blogs_table, local.bucket_name())
+        meter.calibrate(blogs_table)
+        results["seed_seconds"] = round(time.perf_counter() - seed_started, 2)
+        print(f"Seeded {args.posts} posts into {blogs_table} in {results['seed_seconds']}s", file=sys.stderr)
+
+        state = ScenarioState(local, corpus)
+        for name in names:
+            scenario = SCENARIOS[name]
+            summary = run_scenario(local, meter, state, scenario, args.iterations, args.warmup, args.memory_samples)
+            results["scenarios"][name] = summary
+            lat = summary["latency_ms"]
+            print(
+                f"{name:<20} p50={lat['p50']:>8.2f}ms p95={lat['p95']:>8.2f}ms p99={lat['p99']:>8.2f}ms "
+                f"mem={summary['peak_memory_kb']['max']:>9.1f}KB "
+                f"rcu={summary['capacity']['rcu_per_call']:>8.2f} wcu={summary['capacity']['wcu_per_call']:>6.2f} "
+                f"errors={summary['errors']}",
+                file=sys.stderr,
+            )
+            if "search_snapshot" in summary:
+                snapshot = summary["search_snapshot"]
+                print(
+                    f"{'':<20} snapshot {snapshot['bytes'] / 1024:.1f}KB download={snapshot['download_ms']:.2f}ms "
+                    f"open={snapshot['open_ms']:.2f}ms query p50={snapshot['query_ms']['p50']:.2f}ms "
+                    f"p99={snapshot['query_ms']['p99']:.2f}ms",
+                    file=sys.stderr,
+                )
+
+    results["max_rss_kb"] = max_rss_kb()
+    output = args.output or os.path.join(RESULTS_DIR, f"{datetime.utcnow():%Y%m%dT%H%M%S}.json")
+    for path in filter(None, [output, args.save_baseline]):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(dumps(results))
+    print(f"Results written to {output}", file=sys.stderr)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        return report(results, baseline, args.latency_tolerance, out=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,350 @@
+"""
+Request mixes replayed against each handler. Each scenario names the handler
+module (as listed in template.yaml) and yields API Gateway events.
+"""
+import base64
+import json
+import random
+import tempfile
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional
+
+import boto3
+
+from bench.corpus import CATEGORIES
+from bench.events import LambdaContext, api_event, multipart_body, stream_event
+from bench.metrics import percentile
+
+
+@dataclass
+class Scenario:
+    name: str
+    handler: str
+    method: str
+    path: str
+    make_event: Callable
+    faults: Optional[dict] = None
+    # Extra measurements merged into the scenario's summary after the run.
+    report: Optional[Callable] = None
+    # 5xx statuses the scenario is meant to provoke; reported, not counted as errors.
+    expected: tuple = ()
+
+
+SCENARIOS: Dict[str, Scenario] = {}
+
+
+def scenario(name: str, handler: str, method: str, path: str, faults: dict = None, report: Callable = None,
+             expected: tuple = ()):
+    def register(fn):
+        SCENARIOS[name] = Scenario(name, handler, method, path, fn, faults, report, expected)
+        return fn
+    return register
+
+
+@scenario("get_blogs", "blogs.get", "GET", "/get-blogs")
+def _get_blogs(state, i):
+    return api_event("GET", "/get-blogs", {"limit": 10})
+
+
+@scenario("get_blogs_page2", "blogs.get", "GET", "/get-blogs")
+def _get_blogs_page2(state, i):
+    return api_event("GET", "/get-blogs", {"limit": 10, "last_evaluated_key": state.page_key()})
+
+
+@scenario("get_by_category", "blogs.get_by_category", "GET", "/get-blogs-by-category")
+def _get_by_category(state, i):
+    return api_event("GET", "/get-blogs-by-category", {"category": state.category(i), "limit": 10})
+
+
+@scenario("get_by_id", "blogs.get_by_id", "GET", "/get-blog-by-id")
+def _get_by_id(state, i):
+    return api_event("GET", "/get-blog-by-id", {"id": state.blog_id(i)})
+
+
+# Runs before the search index exists, so it hits the rate-limited scan fallback.
+@scenario("search_one_client", "blogs.search", "GET", "/search-blogs")
+def _search_one_client(state, i):
+    # A single client hammering search: most calls should be refused with 429.
+    return api_event("GET", "/search-blogs", {"q": state.corpus.search_term(), "limit": 50}, source_ip="203.0.113.7")
+
+
+@scenario("search", "blogs.search", "GET", "/search-blogs", report=lambda state: state.search_snapshot_report())
+def _search(state, i):
+    state.ensure_search_index()
+    return api_event("GET", "/search-blogs", {"q": state.search_query(i), "limit": 20})
+
+
+@scenario("suggest", "blogs.suggest", "GET", "/suggest-blogs")
+def _suggest(state, i):
+    state.ensure_suggest_index()
+    return api_event("GET", "/suggest-blogs", {"q": state.title_prefix(i), "limit": 8})
+
+
+@scenario("open_now", "blogs.get_by_window", "GET", "/get-open-blogs")
+def _open_now(state, i):
+    return api_event("GET", "/get-open-blogs", {"limit": 10})
+
+
+@scenario("closing_soon", "blogs.get_by_window", "GET", "/get-closing-soon-blogs")
+def _closing_soon(state, i):
+    return api_event("GET", "/get-closing-soon-blogs", {"limit": 10, "days": 7})
+
+
+@scenario("upcoming", "blogs.get_by_window", "GET", "/get-upcoming-blogs")
+def _upcoming(state, i):
+    return api_event("GET", "/get-upcoming-blogs", {"limit": 10})
+
+
+# Degraded reads: most GSI queries throttled, or the index missing entirely.
+# Under throttling a request with nothing stale to fall back on (a category
+# first asked for during the brownout) is shed with a 503 and Retry-After,
+# which is the intended outcome. A missing index is served by the budgeted
+# scan, so any 503 there is an error.
+scenario("get_blogs_throttled", "blogs.get", "GET", "/get-blogs", faults={"Query": ("throttle", 0.7)},
+         expected=(503,))(_get_blogs)
+scenario("get_by_category_throttled", "blogs.get_by_category", "GET", "/get-blogs-by-category",
+         faults={"Query": ("throttle", 0.7)}, expected=(503,))(_get_by_category)
+scenario("get_blogs_missing_index", "blogs.get", "GET", "/get-blogs",
+         faults={"Query": ("missing_index", 1.0)})(_get_blogs)
+
+
+@scenario("create", "blogs.create", "POST", "/create-blog")
+def _create(state, i):
+    return api_event("POST", "/create-blog", body={**state.corpus.new_post(), "image": state.poster(i)})
+
+
+# Edits: one attribute, the dates (window index and TTL), and every editable
+# field, which costs what re-putting the whole post would.
+@scenario("update_title", "blogs.update", "POST", "/update-blog")
+def _update_title(state, i):
+    return state.edit(i, {"title": state.corpus.new_post()["title"]})
+
+
+@scenario("update_dates", "blogs.update", "POST", "/update-blog")
+def _update_dates(state, i):
+    post = state.corpus.new_post()
+    return state.edit(i, {"startDate": post["startDate"], "endDate": post["endDate"]})
+
+
+@scenario("update_all_fields", "blogs.update", "POST", "/update-blog")
+def _update_all_fields(state, i):
+    return state.edit(i, {**state.corpus.new_post(), "image": state.poster(i)})
+
+
+@scenario("upload_json", "common.upload_to_s3", "POST", "/upload-to-s3")
+def _upload_json(state, i):
+    payload = {"file_name": f"poster-{i % 20}.jpg", "file_content": base64.b64encode(state.image(i)).decode()}
+    return api_event("POST", "/upload-to-s3", body=json.dumps(payload))
+
+
+@scenario("upload_multipart", "common.upload_to_s3", "POST", "/upload-to-s3")
+def _upload_multipart(state, i):
+    body, content_type = multipart_body({
+        "file": state.image(i),
+        "filename": f"poster-{i % 20}.png",
+        "fileType": "image/png",
+    })
+    return api_event("POST", "/upload-to-s3", body=body, headers={"Content-Type": content_type})
+
+
+@scenario("confirm_users", "users.confirm_bulk", "POST", "/confirm-users")
+def _confirm_users(state, i):
+    # Ten fresh sign-ups plus one username that does not exist.
+    usernames = state.unconfirmed_users(i, 10) + [f"missing-{i}"]
+    return api_event("POST", "/confirm-users", body={"usernames": usernames, "groups": ["user"]},
+                     claims={"sub": "bench-admin", "cognito:groups": "admin"})
+
+
+scenario("confirm_users_throttled", "users.confirm_bulk", "POST", "/confirm-users",
+         faults={"AdminConfirmSignUp": ("cognito_throttle", 0.3),
+                 "AdminAddUserToGroup": ("cognito_throttle", 0.3)})(_confirm_users)
+
+
+@scenario("post_stream", "blogs.post_stream", "STREAM", "BlogsTable")
+def _post_stream(state, i):
+    state.ensure_derived()
+    return stream_event(state.title_edits(i, 10))
+
+
+@scenario("popular", "blogs.get_popular", "GET", "/get-popular-blogs")
+def _popular(state, i):
+    state.ensure_popular()
+    query = {"limit": 10}
+    if i % 2:
+        query["category"] = state.category(i)
+    return api_event("GET", "/get-popular-blogs", query)
+
+
+# Archiving deletes most of the seeded posts, so this runs after everything else.
+@scenario("get_archived", "blogs.get_archived", "GET", "/get-archived-blogs")
+def _get_archived(state, i):
+    month = state.archived_month(i)
+    query = {"month": month, "limit": 20}
+    if i % 2:
+        query["category"] = state.category(i)
+    if i % 3 == 0:
+        query["q"] = state.corpus.search_term()
+    return api_event("GET", "/get-archived-blogs", query)
+
+
+class ScenarioState:
+    """Shared inputs for scenarios: the seeded corpus and a few cached values."""
+
+    def __init__(self, local, corpus, image_kb: int = 200):
+        self.local = local
+        self.corpus = corpus
+        self.image_kb = image_kb
+        self._images = {}
+        self._posters = {}
+        self._page_key = None
+        self._suggest_built = False
+        self._versions = {}
+        self._archived_months = None
+        self._popular_built = False
+        self._pool_client = None
+        self._derived_built = False
+        self._signups = 0
+        self._search_built = False
+
+    def blog_id(self, i: int) -> str:
+        return self.corpus.ids[(i * 7919) % len(self.corpus.ids)]
+
+    def edit(self, i: int, fields: dict) -> dict:
+        """Update event for a post, assuming every earlier edit in the run succeeded."""
+        blog_id = self.blog_id(i)
+        version = self._versions.get(blog_id, 1)
+        self._versions[blog_id] = version + 1
+        return api_event("POST", "/update-blog", body={"id": blog_id, "version": version, **fields})
+
+    def category(self, i: int) -> str:
+        return CATEGORIES[i % len(CATEGORIES)]
+
+    def image(self, i: int) -> bytes:
+        # Twenty distinct "posters" so repeat uploads of the same file happen.
+        slot = i % 20
+        if slot not in self._images:
+            self._images[slot] = random.Random(slot).randbytes(self.image_kb * 1024)
+        return self._images[slot]
+
+    def poster(self, i: int) -> str:
+        """Content key of an uploaded image, as the UI sends with a post."""
+        slot = i % 20
+        if slot not in self._posters:
+            from common.media import store_media
+
+            self._posters[slot] = store_media(self.local.bucket_name(), "poster.jpg", self.image(i))[0]
+        return self._posters[slot]
+
+    def page_key(self) -> str:
+        if self._page_key is None:
+            handler = self.local.handler("blogs.get")
+            response = handler(api_event("GET", "/get-blogs", {"limit": 10}), LambdaContext())
+            self._page_key = json.loads(response["body"]).get("last_evaluated_key") or ""
+        return self._page_key
+
+    def title_prefix(self, i: int) -> str:
+        """What a user has typed so far: 1 to 8 characters of a real title."""
+        title = self.corpus.titles[(i * 104729) % len(self.corpus.titles)]
+        return title[: 1 + i % 8]
+
+    def archived_month(self, i: int) -> str:
+        if self._archived_months is None:
+            self.local.handler("blogs.archive_posts")({}, LambdaContext(timeout=900))
+            keys = boto3.client("s3").list_objects_v2(Bucket=self.local.bucket_name(), Prefix="archive/posts/")
+            self._archived_months = sorted({k["Key"].split("month=")[1][:7] for k in keys.get("Contents", [])})
+        return self._archived_months[i % len(self._archived_months)]
+
+    def unconfirmed_users(self, i: int, n: int) -> list:
+        """Sign up ``n`` users that have not been used by an earlier call."""
+        cognito = boto3.client("cognito-idp")
+        pool_id = self.local.user_pool_id("jaladUserPool")
+        if self._pool_client is None:
+            self._pool_client = cognito.create_user_pool_client(
+                UserPoolId=pool_id, ClientName="bench"
+            )["UserPoolClient"]["ClientId"]
+        self._signups += 1
+        usernames = [f"officer-{self._signups}-{k}" for k in range(n)]
+        for username in usernames:
+            cognito.sign_up(
+                ClientId=self._pool_client,
+                Username=username,
+                Password="Bench-passw0rd!",
+                UserAttributes=[{"Name": "email", "Value": f"{username}@example.org"}],
+            )
+        return usernames
+
+    def title_edits(self, i: int, n: int) -> list:
+        """(old, new) images for ``n`` posts whose title was just edited."""
+        table = boto3.resource("dynamodb").Table(self.local.table_name("BlogsTable"))
+        changes = []
+        for k in range(n):
+            old = table.get_item(Key={"id": self.blog_id(i * n + k)})["Item"]
+            new = {**old, "title": f"{old['title']} ({i})", "updatedAt": f"2026-01-01T00:{i % 60:02d}:{k:02d}"}
+            changes.append((old, new))
+        return changes
+
+    def ensure_derived(self):
+        """Build the feeds and related-posts model, as a deployed stack's schedule would have."""
+        if not self._derived_built:
+            self.local.handler("blogs.post_stream")({"rebuild": ["related", "feeds"]}, LambdaContext())
+            self._derived_built = True
+
+    def ensure_popular(self, views: int = 5000):
+        """Flush a skewed week of views into the counters and roll them up."""
+        if self._popular_built:
+            return
+        from common.counters import ViewBuffer
+
+        table = boto3.resource("dynamodb").Table(self.local.table_name("CountersTable"))
+        rng = random.Random(35)
+        for shard in range(4):
+            buffer = ViewBuffer(shard=shard)
+            for _ in range(views // 4):
+                n = int(rng.paretovariate(1.2)) % len(self.corpus.ids)
+                buffer.record(self.corpus.ids[n], self.corpus.categories[n])
+            buffer.flush(table)
+        self.local.handler("blogs.compact_views")({}, LambdaContext())
+        self._popular_built = True
+
+    def search_query(self, i: int) -> str:
+        """A single word most of the time, otherwise two words or a partly typed one."""
+        if i % 4 == 1:
+            return f"{self.corpus.search_term()} {self.corpus.search_term()}"
+        if i % 4 == 3:
+            return self.corpus.search_term()[:4]
+        return self.corpus.search_term()
+
+    def ensure_search_index(self):
+        if not self._search_built:
+            self.local.handler("blogs.post_stream")({"rebuild": ["search"]}, LambdaContext())
+            self._search_built = True
+
+    def search_snapshot_report(self, queries: int = 200) -> dict:
+        """Cold load of the search snapshot into an empty /tmp, then warm in-process queries."""
+        from common.search_index import SearchSnapshots
+
+        with tempfile.TemporaryDirectory() as directory:
+            snapshots = SearchSnapshots(directory)
+            started = time.perf_counter()
+            view = snapshots.view(self.local.bucket_name())
+            first_view_ms = (time.perf_counter() - started) * 1000
+            latencies = []
+            for i in range(queries):
+                query = self.search_query(i)
+                started = time.perf_counter()
+                view.search(query, 20)
+                latencies.append((time.perf_counter() - started) * 1000)
+            snapshots.snapshot.close()
+        return {
+            "search_snapshot": {
+                **snapshots.load_stats,
+                "first_view_ms": round(first_view_ms, 3),
+                "query_ms": {p: round(percentile(latencies, int(p[1:])), 3) for p in ("p50", "p95", "p99")},
+            }
+        }
+
+    def ensure_suggest_index(self):
+        if not self._suggest_built:
+            self.local.handler("blogs.post_stream")({"rebuild": ["suggest"]}, LambdaContext())
+            self._suggest_built = True
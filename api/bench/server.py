@@ -0,0 +1,278 @@
+"""
+Serve every API route in template.yaml from one local process, backed by the
+same DynamoDB/S3/Cognito stand-ins as the benchmark suite.
+
+    cd api
+    pip install -r bench/requirements.txt
+    python -m bench.server --posts 1000 --port 3001
+    python -m bench.loadgen --url http://127.0.0.1:3001 --duration 30 --concurrency 8
+
+Requests are translated into API Gateway proxy events and run on simulated
+Lambda containers. A container imports its handler (and everything under
+lambda/) into its own module namespace on the first request it serves, and
+keeps that module state for later ones, so caches, circuit breakers and
+index snapshots behave as they do between warm invocations. A function gets
+another container only when all of its containers are busy, up to
+``--max-containers``, and containers idle for ``--idle-timeout`` seconds
+are reclaimed. Handlers share one interpreter, so only one of them executes
+at a time; requests queue for it the way they would for a single CPU.
+
+Every response carries ``X-Local-Container`` and ``X-Local-Cold-Start``;
+GET /_local/containers lists the live containers. No authorizer runs, so
+handlers that check Cognito claims (users/confirm_bulk.py) answer 401.
+"""
+import argparse
+import base64
+import importlib
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from bench.corpus import Corpus
+from bench.events import LambdaContext, http_event
+from bench.local_aws import HANDLER_PACKAGES, LocalAWS
+from bench.stack import FunctionSpec, Stack
+
+STATS_PATH = "/_local/containers"
+# The rebuilds a deployed stack would have run from its stream and schedule.
+DERIVED_DATA = ["suggest", "related", "search", "feeds"]
+
+
+class Container:
+    """One simulated Lambda container: a handler and its private module state."""
+
+    def __init__(self, spec: FunctionSpec, number: int, environment: dict):
+        self.spec = spec
+        self.name = f"{spec.logical_id}#{number}"
+        self.environment = environment
+        self.modules = {}
+        self.handler = None
+        self.init_ms: Optional[float] = None
+        self.invocations = 0
+        self.last_used = time.monotonic()
+
+    def invoke(self, event: dict, context: LambdaContext) -> dict:
+        """Run one request; the caller must hold the interpreter lock."""
+        os.environ.update(self.environment)
+        sys.modules.update(self.modules)
+        try:
+            if self.handler is None:
+                started = time.perf_counter()
+                self.handler = importlib.import_module(self.spec.module).lambda_handler
+                self.init_ms = (time.perf_counter() - started) * 1000
+            self.invocations += 1
+            return self.handler(event, context)
+        finally:
+            # Take this container's modules back out, so the next one imports its own.
+            names = [name for name in sys.modules if name.split(".")[0] in HANDLER_PACKAGES]
+            self.modules = {name: sys.modules.pop(name) for name in names}
+
+
+class ContainerPool:
+    """
+    Containers per function, most recently used first, as Lambda reuses
+    them. A request holds its container while it waits for the interpreter,
+    so concurrent requests to one function start new containers.
+    """
+
+    def __init__(self, local: LocalAWS, max_containers: int = 4, idle_timeout: float = 300.0):
+        self.local = local
+        self.max_containers = max_containers
+        self.idle_timeout = idle_timeout
+        self._idle: Dict[str, List[Container]] = defaultdict(list)
+        self._live: Dict[str, int] = defaultdict(int)
+        self._started: Dict[str, int] = defaultdict(int)
+        self._available = threading.Condition()
+        self._interpreter = threading.Lock()
+
+    def _reclaim(self, logical_id: str):
+        now = time.monotonic()
+        idle = self._idle[logical_id]
+        expired = [c for c in idle if now - c.last_used > self.idle_timeout]
+        for container in expired:
+            idle.remove(container)
+            self._live[logical_id] -= 1
+
+    def _acquire(self, spec: FunctionSpec) -> Container:
+        with self._available:
+            while True:
+                self._reclaim(spec.logical_id)
+                if self._idle[spec.logical_id]:
+                    return self._idle[spec.logical_id].pop()
+                if self._live[spec.logical_id] < self.max_containers:
+                    self._live[spec.logical_id] += 1
+                    self._started[spec.logical_id] += 1
+                    number = self._started[spec.logical_id]
+                    return Container(spec, number, self.local.environment(spec))
+                self._available.wait()
+
+    def _release(self, container: Container):
+        with self._available:
+            container.last_used = time.monotonic()
+            self._idle[container.spec.logical_id].append(container)
+            self._available.notify_all()
+
+    def invoke(self, spec: FunctionSpec, event: dict) -> Tuple[dict, Container, bool]:
+        """Returns the handler's response, the container that ran it and whether it was a cold start."""
+        container = self._acquire(spec)
+        try:
+            with self._interpreter:
+                cold = container.handler is None
+                response = container.invoke(event, LambdaContext(spec.logical_id, spec.memory_size, spec.timeout))
+            return response, container, cold
+        finally:
+            self._release(container)
+
+    def describe(self) -> dict:
+        with self._available:
+            return {
+                logical_id: {
+                    "started": self._started[logical_id],
+                    "live": self._live[logical_id],
+                    "idle": [
+                        {"name": c.name, "invocations": c.invocations, "init_ms": round(c.init_ms or 0, 3)}
+                        for c in self._idle[logical_id]
+                    ],
+                }
+                for logical_id in sorted(self._started)
+            }
+
+
+class Router:
+    """(method, path) -> function, from the Api events in template.yaml."""
+
+    def __init__(self, stack: Stack):
+        self.routes = []
+        for spec in stack.functions():
+            for method, path in spec.routes:
+                pattern = re.sub(r"\\\{(\w+)\\\}", r"(?P<\1>[^/]+)", re.escape(path))
+                self.routes.append((method, path, re.compile(f"^{pattern}$"), spec))
+
+    def match(self, method: str, path: str) -> Optional[Tuple[FunctionSpec, str, dict]]:
+        for route_method, resource, pattern, spec in self.routes:
+            found = pattern.match(path)
+            # Every function also handles its CORS preflight.
+            if found and method in (route_method, "OPTIONS"):
+                return spec, resource, found.groupdict()
+        return None
+
+
+def make_handler(router: Router, pool: ContainerPool, binary_media_types: List[str]):
+    class RequestHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Send headers and body in one segment; split writes stall on delayed ACKs.
+        wbufsize = -1
+        disable_nagle_algorithm = True
+
+        def _send(self, status: int, headers: dict, body: bytes):
+            self.send_response(status)
+            for name, value in headers.items():
+                self.send_header(name, str(value))
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            if self.command != "HEAD":
+                self.wfile.write(body)
+
+        def _json(self, status: int, payload: dict):
+            self._send(status, {"Content-Type": "application/json"}, json.dumps(payload).encode())
+
+        def _dispatch(self):
+            url = urlsplit(self.path)
+            if url.path == STATS_PATH:
+                return self._json(200, pool.describe())
+            route = router.match(self.command, url.path)
+            if route is None:
+                # What API Gateway answers for a route it does not have.
+                return self._json(403, {"message": "Missing Authentication Token"})
+            spec, resource, path_parameters = route
+
+            body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            forwarded = self.headers.get("X-Forwarded-For")
+            event = http_event(
+                self.command,
+                url.path,
+                resource,
+                url.query,
+                list(self.headers.items()),
+                body,
+                source_ip=forwarded.split(",")[0].strip() if forwarded else self.client_address[0],
+                path_parameters=path_parameters,
+                binary_media_types=binary_media_types,
+            )
+            try:
+                response, container, cold = pool.invoke(spec, event)
+            except Exception as e:
+                logging.error(f"{spec.logical_id} raised: {e}", exc_info=True)
+                return self._json(502, {"message": "Internal server error"})
+
+            headers = dict(response.get("headers") or {})
+            for name, values in (response.get("multiValueHeaders") or {}).items():
+                headers[name] = ", ".join(str(v) for v in values)
+            headers["X-Local-Container"] = container.name
+            headers["X-Local-Cold-Start"] = "1" if cold else "0"
+            payload = response.get("body") or ""
+            payload = base64.b64decode(payload) if response.get("isBase64Encoded") else payload.encode("utf-8")
+            self._send(int(response.get("statusCode", 200)), headers, payload)
+
+        do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = do_OPTIONS = do_HEAD = _dispatch
+
+        def log_message(self, format, *args):
+            pass
+
+    return RequestHandler
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=3001)
+    parser.add_argument("--posts", type=int, default=1000, help="posts to seed the local table with")
+    parser.add_argument("--html-kb", type=float, default=6.0)
+    parser.add_argument("--seed", type=int, default=26)
+    parser.add_argument("--max-containers", type=int, default=4, help="concurrent containers per function")
+    parser.add_argument("--idle-timeout", type=float, default=300.0, help="seconds before an idle container is reclaimed")
+    parser.add_argument("--verbose", action="store_true", help="keep handler logging")
+    args = parser.parse_args(argv)
+    if not args.verbose:
+        logging.disable(logging.ERROR)
+
+    with LocalAWS() as local:
+        corpus = Corpus(args.posts, html_kb=args.html_kb, seed=args.seed)
+        corpus.seed(local.table_name("BlogsTable"), local.bucket_name())
+        # Seeding imported lambda modules; containers start from a clean slate.
+        local.cold_start()
+        pool = ContainerPool(local, args.max_containers, args.idle_timeout)
+
+        # Streams are not replayed locally, so derived data is built once up front.
+        stream = local.stack.function("blogs.post_stream")
+        if stream:
+            pool.invoke(stream, {"rebuild": DERIVED_DATA})
+
+        router = Router(local.stack)
+        server = ThreadingHTTPServer(
+            (args.host, args.port), make_handler(router, pool, local.stack.binary_media_types())
+        )
+        server.daemon_threads = True
+        for method, resource, _, spec in router.routes:
+            print(f"{method:<6} {resource:<28} {spec.handler}", file=sys.stderr)
+        print(f"Serving {len(router.routes)} routes with {args.posts} posts on http://{args.host}:{args.port}",
+              file=sys.stderr)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
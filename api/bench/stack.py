@@ -0,0 +1,196 @@
+"""
+Read the resources the handlers depend on straight out of template.yaml so the
+local stand-ins always match what CloudFormation deploys.
+"""
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set, Tuple
+
+import yaml
+
+from bench import TEMPLATE_PATH
+
+INTRINSIC_TAGS = {
+    "Ref": "Ref",
+    "Sub": "Fn::Sub",
+    "GetAtt": "Fn::GetAtt",
+    "Join": "Fn::Join",
+    "If": "Fn::If",
+    "Equals": "Fn::Equals",
+    "Select": "Fn::Select",
+    "Split": "Fn::Split",
+    "ImportValue": "Fn::ImportValue",
+    "FindInMap": "Fn::FindInMap",
+    "Base64": "Fn::Base64",
+}
+
+
+class _TemplateLoader(yaml.SafeLoader):
+    """SafeLoader that keeps CloudFormation short-form intrinsics as dicts."""
+
+
+def _intrinsic_constructor(loader, tag_suffix, node):
+    name = INTRINSIC_TAGS.get(tag_suffix, tag_suffix)
+    if isinstance(node, yaml.ScalarNode):
+        value = loader.construct_scalar(node)
+        if name == "Fn::GetAtt":
+            value = value.split(".", 1)
+    elif isinstance(node, yaml.SequenceNode):
+        value = loader.construct_sequence(node, deep=True)
+    else:
+        value = loader.construct_mapping(node, deep=True)
+    return {name: value}
+
+
+_TemplateLoader.add_multi_constructor("!", _intrinsic_constructor)
+
+
+@dataclass
+class TableSpec:
+    logical_id: str
+    name: str
+    properties: dict
+
+    @property
+    def gsi_projections(self) -> List[Tuple[List[str], Optional[Set[str]]]]:
+        """
+        (key attributes, projected attributes or None for ALL) for every GSI,
+        used to estimate write fan-out.
+        """
+        table_keys = [key["AttributeName"] for key in self.properties["KeySchema"]]
+        projections = []
+        for index in self.properties.get("GlobalSecondaryIndexes", []):
+            keys = [key["AttributeName"] for key in index["KeySchema"]]
+            projection = index.get("Projection", {})
+            if projection.get("ProjectionType", "ALL") == "ALL":
+                projections.append((keys, None))
+            else:
+                projections.append((keys, {*keys, *table_keys, *projection.get("NonKeyAttributes", [])}))
+        return projections
+
+
+@dataclass
+class FunctionSpec:
+    logical_id: str
+    handler: str
+    environment: Dict[str, str]
+    routes: List[tuple] = field(default_factory=list)
+    memory_size: int = 128
+    timeout: int = 3
+
+    @property
+    def module(self) -> str:
+        return self.handler.rsplit(".", 1)[0]
+
+
+class Stack:
+    """Resolved view of template.yaml for a given environment name."""
+
+    def __init__(self, env: str = "bench", project: str = "jalad", path: str = TEMPLATE_PATH):
+        with open(path) as f:
+            self.template = yaml.load(f, Loader=_TemplateLoader)
+        self.parameters = {
+            name: str(spec.get("Default", ""))
+            for name, spec in self.template.get("Parameters", {}).items()
+        }
+        self.parameters.update({"Env": env, "ProjectName": project})
+        self.resources = self.template.get("Resources", {})
+        self.globals = self.template.get("Globals", {}).get("Function", {})
+
+    def resolve(self, value):
+        if isinstance(value, dict):
+            if "Ref" in value:
+                return self._ref(value["Ref"])
+            if "Fn::Sub" in value:
+                return self._sub(value["Fn::Sub"])
+            if "Fn::GetAtt" in value:
+                logical_id, attribute = value["Fn::GetAtt"]
+                return f"{self._ref(logical_id)}.{attribute}"
+            return {k: self.resolve(v) for k, v in value.items()}
+        if isinstance(value, list):
+            return [self.resolve(v) for v in value]
+        return value
+
+    def _ref(self, name: str) -> str:
+        if name in self.parameters:
+            return self.parameters[name]
+        if name.startswith("AWS::"):
+            return {"AWS::Region": "us-east-1", "AWS::AccountId": "123456789012"}.get(name, name)
+        resource = self.resources.get(name)
+        if not resource:
+            return name
+        props = resource.get("Properties", {})
+        for key in ("TableName", "BucketName", "FunctionName", "UserPoolName", "Name"):
+            if key in props:
+                return self.resolve(props[key])
+        return name
+
+    def _sub(self, value) -> str:
+        if isinstance(value, list):
+            template, variables = value
+        else:
+            template, variables = value, {}
+        return re.sub(
+            r"\$\{([^}]+)\}",
+            lambda m: str(self.resolve(variables[m.group(1)])) if m.group(1) in variables
+            else self._ref(m.group(1).split(".")[0]),
+            template,
+        )
+
+    def _resources_of(self, resource_type: str):
+        for logical_id, resource in self.resources.items():
+            if resource.get("Type") == resource_type:
+                yield logical_id, resource.get("Properties", {})
+
+    def tables(self) -> List[TableSpec]:
+        return [
+            TableSpec(logical_id, self.resolve(props["TableName"]), props)
+            for logical_id, props in self._resources_of("AWS::DynamoDB::Table")
+        ]
+
+    def table(self, logical_id: str) -> Optional[TableSpec]:
+        return next((t for t in self.tables() if t.logical_id == logical_id), None)
+
+    def buckets(self) -> List[str]:
+        return [
+            self.resolve(props.get("BucketName", logical_id.lower()))
+            for logical_id, props in self._resources_of("AWS::S3::Bucket")
+        ]
+
+    def binary_media_types(self) -> List[str]:
+        """Content types API Gateway passes to the handlers base64-encoded."""
+        return [t for _, props in self._resources_of("AWS::Serverless::Api") for t in props.get("BinaryMediaTypes", [])]
+
+    def user_pools(self) -> List[Tuple[str, str, List[str]]]:
+        """(logical id, pool name, group names) for every Cognito user pool."""
+        groups = [
+            (props["UserPoolId"].get("Ref"), self.resolve(props["GroupName"]))
+            for _, props in self._resources_of("AWS::Cognito::UserPoolGroup")
+        ]
+        return [
+            (logical_id, self.resolve(props["UserPoolName"]), [g for pool, g in groups if pool == logical_id])
+            for logical_id, props in self._resources_of("AWS::Cognito::UserPool")
+        ]
+
+    def functions(self) -> List[FunctionSpec]:
+        specs = []
+        for logical_id, props in self._resources_of("AWS::Serverless::Function"):
+            variables = props.get("Environment", {}).get("Variables", {})
+            spec = FunctionSpec(
+                logical_id=logical_id,
+                handler=props["Handler"],
+                environment={k.strip(): str(self.resolve(v)) for k, v in variables.items()},
+                memory_size=int(props.get("MemorySize", self.globals.get("MemorySize", 128))),
+                timeout=int(props.get("Timeout", self.globals.get("Timeout", 3))),
+            )
+            for event in props.get("Events", {}).values():
+                if event.get("Type") != "Api":
+                    continue
+                method = event["Properties"]["Method"].upper()
+                if method != "OPTIONS":
+                    spec.routes.append((method, event["Properties"]["Path"]))
+            specs.append(spec)
+        return specs
+
+    def function(self, handler_module: str) -> Optional[FunctionSpec]:
+        return next((f for f in self.functions() if f.module == handler_module), None)
@@ -0,0 +1,173 @@
+"""
+Assertions for common/resilience.py and the listing handlers under injected
+DynamoDB faults, against the same moto stand-ins the benchmark uses.
+
+    cd api && python -m pytest bench/tests
+"""
+import json
+import time
+
+import boto3
+import pytest
+from botocore.exceptions import ClientError, EndpointConnectionError
+
+from bench.corpus import Corpus
+from bench.events import LambdaContext, api_event
+from bench.local_aws import LocalAWS
+
+POSTS = 60
+
+
+def client_error(code: str, message: str = "") -> ClientError:
+    return ClientError({"Error": {"Code": code, "Message": message}}, "Query")
+
+
+@pytest.fixture(scope="module")
+def local():
+    with LocalAWS() as local:
+        Corpus(posts=POSTS, seed=27).seed(local.table_name("BlogsTable"), local.bucket_name())
+        yield local
+
+
+@pytest.fixture
+def container(local):
+    """A fresh container: module level breakers, caches and budgets start over."""
+    local.cold_start()
+    local.faults.configure()
+    yield local
+    local.faults.configure()
+
+
+@pytest.fixture
+def resilience(container):
+    from common import resilience
+
+    return resilience
+
+
+def get_blogs(local, query: dict) -> dict:
+    response = local.handler("blogs.get")(api_event("GET", "/get-blogs", query), LambdaContext())
+    return {"statusCode": response["statusCode"], "headers": response["headers"], **json.loads(response["body"])}
+
+
+def test_classify_error(resilience):
+    assert resilience.classify_error(client_error("ProvisionedThroughputExceededException")) == resilience.THROTTLED
+    assert resilience.classify_error(client_error("ThrottlingException")) == resilience.THROTTLED
+    assert resilience.classify_error(client_error("InternalServerError")) == resilience.TRANSIENT
+    assert resilience.classify_error(EndpointConnectionError(endpoint_url="http://x")) == resilience.TRANSIENT
+    missing = client_error("ValidationException", "The table does not have the specified index: statusPublishedAtIndex")
+    assert resilience.classify_error(missing) == resilience.MISSING_INDEX
+    assert resilience.classify_error(client_error("ValidationException", "Invalid KeyConditionExpression")) == resilience.CLIENT
+    assert resilience.classify_error(resilience.CircuitOpenError("x", 1.0)) == resilience.THROTTLED
+    assert resilience.classify_error(ValueError("boom")) == resilience.UNKNOWN
+
+
+def test_breaker_opens_and_probes_half_open(resilience):
+    breaker = resilience.CircuitBreaker("test", failure_threshold=2, reset_timeout=0.05)
+
+    def throttled():
+        raise client_error("ProvisionedThroughputExceededException")
+
+    for _ in range(2):
+        with pytest.raises(ClientError):
+            breaker.call(throttled)
+    assert breaker.state == breaker.OPEN
+    with pytest.raises(resilience.CircuitOpenError):
+        breaker.call(lambda: "refused")
+
+    time.sleep(0.06)
+    assert breaker.state == breaker.HALF_OPEN
+    # One probe at a time; a failed probe opens the breaker again.
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == breaker.OPEN
+
+    time.sleep(0.06)
+    assert breaker.call(lambda: "ok") == "ok"
+    assert breaker.state == breaker.CLOSED
+
+
+def test_breaker_ignores_client_errors(resilience):
+    breaker = resilience.CircuitBreaker("test", failure_threshold=1)
+
+    def invalid():
+        raise client_error("ValidationException", "Invalid KeyConditionExpression")
+
+    with pytest.raises(ClientError):
+        breaker.call(invalid)
+    assert breaker.state == breaker.CLOSED
+
+
+def test_scan_budget_exhaustion(resilience):
+    budget = resilience.ScanBudget(capacity=30, rate=10.0)
+    assert budget.take(20) == 20
+    assert budget.take(20) == 10
+    assert budget.take(5) == 0
+    assert budget.retry_after(10) >= 1.0
+    budget.give_back(8)
+    assert budget.take(20) == 8
+
+
+def test_throttled_query_serves_stale_then_sheds(container):
+    fresh = get_blogs(container, {"limit": 5})
+    assert fresh["statusCode"] == 200 and not fresh.get("stale")
+
+    container.faults.configure({"Query": ("throttle", 1.0)})
+    stale = get_blogs(container, {"limit": 5})
+    assert stale["statusCode"] == 200
+    assert stale["stale"] is True
+    assert [b["id"] for b in stale["blogs"]] == [b["id"] for b in fresh["blogs"]]
+
+    # Nothing cached for this page: shed instead of scanning a throttled table.
+    shed = get_blogs(container, {"limit": 7})
+    assert shed["statusCode"] == 503
+    assert int(shed["headers"]["Retry-After"]) >= 1
+
+
+def test_missing_index_scans_every_page_once(container):
+    container.faults.configure({"Query": ("missing_index", 1.0)})
+    seen, cursor, pages = [], None, 0
+    while True:
+        query = {"limit": 7, **({"last_evaluated_key": cursor} if cursor else {})}
+        page = get_blogs(container, query)
+        assert page["statusCode"] == 200, page
+        seen.extend(b["id"] for b in page.get("blogs", []))
+        pages += 1
+        if not page.get("has_more"):
+            break
+        cursor = page["last_evaluated_key"]
+        assert "scan" in json.loads(cursor)
+        assert pages < POSTS
+
+    table = boto3.resource("dynamodb").Table(container.table_name("BlogsTable"))
+    published = {item["id"] for item in table.scan()["Items"] if item["status"] == "published"}
+    assert len(seen) == len(set(seen))
+    assert set(seen) == published
+
+
+def test_scan_cursor_never_reaches_the_index(container):
+    container.faults.configure({"Query": ("missing_index", 1.0)})
+    first = get_blogs(container, {"limit": 5})
+    cursor = first["last_evaluated_key"]
+
+    # The index is back, but a scan position still continues the scan.
+    container.faults.configure()
+    second = get_blogs(container, {"limit": 5, "last_evaluated_key": cursor})
+    assert second["statusCode"] == 200
+    assert not {b["id"] for b in first["blogs"]} & {b["id"] for b in second["blogs"]}
+
+
+def test_scan_budget_spent_sheds(container, resilience):
+    container.faults.configure({"Query": ("missing_index", 1.0)})
+    resilience.scan_budget.tokens = 0
+    resilience.scan_budget.rate = 0.001
+    shed = get_blogs(container, {"limit": 5})
+    assert shed["statusCode"] == 503
+    assert int(shed["headers"]["Retry-After"]) >= 1
+
+
+def test_throttled_fallback_scan_sheds(container):
+    container.faults.configure({"Query": ("missing_index", 1.0), "Scan": ("throttle", 1.0)})
+    shed = get_blogs(container, {"limit": 5})
+    assert shed["statusCode"] == 503
@@ -0,0 +1,151 @@
+"""
+Scheduled job moving expired published posts out of the blogs table into
+the S3 archive (common/archive.py), a few days after endDate and before TTL
+would delete them. Drafts are not archived; TTL removes them as before.
+The table is scanned in parallel segments; each batch is written to its
+partitions before its items are deleted, so a failed run leaves posts in
+the table for the next one rather than losing them. Items are only deleted
+if their endDate, status and version still match the scan; posts edited
+meanwhile stay live and are taken back out of this run's files. A failed
+run raises, which the stack alarms on: TTL catches up after a few days.
+Partitions that have gathered several small files are then compacted.
+"""
+import os
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+import boto3
+from boto3.dynamodb.conditions import Attr
+from botocore.exceptions import ClientError
+from common.archive import COMPACT_MIN_FILES, compact_partition, group_by_partition, partition_files, write_partition
+from common.body import with_body
+from common.s3 import delete_s3_file
+from common.windows import today
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+ARCHIVE_AFTER_DAYS = 3
+SEGMENTS = 4
+BATCH_SIZE = 500
+# Stop starting new pages when the invocation is this close to its timeout.
+RESERVE_MS = 60_000
+
+
+def _delete_if_unchanged(table, post: dict) -> bool:
+    """Delete ``post`` unless it was edited since the scan; False if it was."""
+    condition = Attr("endDate").eq(post["endDate"]) & Attr("status").eq("published")
+    if "version" in post:
+        condition &= Attr("version").eq(post["version"])
+    else:
+        condition &= Attr("version").not_exists()
+    try:
+        table.delete_item(Key={"id": post["id"]}, ConditionExpression=condition)
+        return True
+    except ClientError as e:
+        if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+            raise
+        return False
+
+
+def _archive_batch(table, bucket: str, run_id: str, posts: list) -> tuple:
+    """Archive and delete ``posts``; returns (files written, posts archived)."""
+    partitions = group_by_partition(posts)
+    keys = {}
+    for partition, records in partitions.items():
+        keys[partition] = write_partition(bucket, *partition, run_id, records)
+        if not keys[partition]:
+            raise RuntimeError(f"Could not write archive partition {partition[0]}/{partition[1]}")
+
+    kept = {post["id"] for post in posts if not _delete_if_unchanged(table, post)}
+    if kept:
+        logger.info(f"Keeping {len(kept)} posts edited since the scan")
+        for partition, records in partitions.items():
+            remaining = [r for r in records if r["id"] not in kept]
+            if len(remaining) == len(records):
+                continue
+            if not remaining:
+                delete_s3_file(bucket, keys.pop(partition))
+            elif not write_partition(bucket, *partition, run_id, remaining):
+                raise RuntimeError(f"Could not rewrite archive partition {partition[0]}/{partition[1]}")
+    return len(keys), len(posts) - len(kept)
+
+
+def archive_segment(table_name: str, bucket: str, segment: int, cutoff: str, run_started: str, context=None) -> dict:
+    # boto3 resources are not thread-safe, so each segment worker builds its own.
+    table = boto3.session.Session().resource("dynamodb").Table(table_name)
+    params = {
+        "Segment": segment,
+        "TotalSegments": SEGMENTS,
+        "FilterExpression": Attr("endDate").lt(cutoff) & Attr("status").eq("published"),
+    }
+    counts = {"archived": 0, "files": 0}
+    buffer, flushes = [], 0
+
+    def flush():
+        nonlocal buffer, flushes
+        if buffer:
+            run_id = f"{run_started}-s{segment}-{flushes}"
+            files, archived = _archive_batch(table, bucket, run_id, buffer)
+            counts["files"] += files
+            counts["archived"] += archived
+            buffer, flushes = [], flushes + 1
+
+    while True:
+        if context and context.get_remaining_time_in_millis() < RESERVE_MS:
+            logger.warning(f"Segment {segment} stopping early, the next run continues")
+            break
+        response = table.scan(**params)
+        buffer.extend(with_body(bucket, item) for item in response.get("Items", []))
+        if len(buffer) >= BATCH_SIZE:
+            flush()
+        if "LastEvaluatedKey" not in response:
+            break
+        params["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+    flush()
+    return counts
+
+
+def archive_expired(table_name: str, bucket: str, context=None) -> dict:
+    cutoff = (today() - timedelta(days=ARCHIVE_AFTER_DAYS)).isoformat()
+    run_started = datetime.utcnow().strftime("%Y%m%dT%H%M%S")
+    with ThreadPoolExecutor(max_workers=SEGMENTS) as pool:
+        results = list(pool.map(
+            lambda segment: archive_segment(table_name, bucket, segment, cutoff, run_started, context),
+            range(SEGMENTS),
+        ))
+    compacted = 0
+    if not context or context.get_remaining_time_in_millis() >= RESERVE_MS:
+        compacted = compact_archive(bucket, run_started)
+    return {
+        "cutoff": cutoff,
+        "archived": sum(r["archived"] for r in results),
+        "files": sum(r["files"] for r in results),
+        "compacted": compacted,
+    }
+
+
+def compact_archive(bucket: str, run_started: str) -> int:
+    """Merge every partition holding COMPACT_MIN_FILES or more files; returns how many were merged."""
+    compacted = 0
+    for (month, category), keys in partition_files(bucket).items():
+        if len(keys) < COMPACT_MIN_FILES:
+            continue
+        if not compact_partition(bucket, month, category, keys, f"{run_started}-compacted"):
+            raise RuntimeError(f"Could not compact archive partition {month}/{category}")
+        compacted += 1
+    return compacted
+
+
+def lambda_handler(event, context):
+    BLOGS_TABLE = os.getenv("BLOGS_TABLE")
+    S3_BUCKET = os.getenv("BLOG_IMAGES_BUCKET")
+    if not BLOGS_TABLE or not S3_BUCKET:
+        raise RuntimeError("Environment variables BLOGS_TABLE or BLOG_IMAGES_BUCKET not set.")
+
+    result = archive_expired(BLOGS_TABLE, S3_BUCKET, context)
+    logger.info(
+        f"Archived {result['archived']} posts ending before {result['cutoff']} into {result['files']} files, "
+        f"compacted {result['compacted']} partitions"
+    )
+    return result
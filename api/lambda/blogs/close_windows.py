@@ -0,0 +1,110 @@
+"""
+Scheduled job keeping the sparse window index current: upcoming posts whose
+startDate has arrived become open, and posts past endDate leave the index.
+Invoke with {"backfill": true} once to add the attribute to existing posts.
+"""
+import os
+import logging
+import boto3
+from boto3.dynamodb.conditions import Attr, Key
+from botocore.exceptions import ClientError
+from common.windows import OPEN, UPCOMING, WINDOW_ATTRIBUTE, WINDOW_INDEX, today, window_for
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+dynamodb = boto3.resource("dynamodb")
+
+
+def _query_all(table, **params):
+    while True:
+        response = table.query(**params)
+        yield from response.get("Items", [])
+        if "LastEvaluatedKey" not in response:
+            return
+        params["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+
+def _set_window(table, blog_id: str, expected, window) -> bool:
+    """Move one post to ``window`` (None removes it) if it is still in ``expected``."""
+    params = {"Key": {"id": blog_id}}
+    if expected is None:
+        params["ConditionExpression"] = Attr(WINDOW_ATTRIBUTE).not_exists()
+    else:
+        params["ConditionExpression"] = Attr(WINDOW_ATTRIBUTE).eq(expected)
+    if window is None:
+        params["UpdateExpression"] = "REMOVE #w"
+        params["ExpressionAttributeNames"] = {"#w": WINDOW_ATTRIBUTE}
+    else:
+        params["UpdateExpression"] = "SET #w = :w"
+        params["ExpressionAttributeNames"] = {"#w": WINDOW_ATTRIBUTE}
+        params["ExpressionAttributeValues"] = {":w": window}
+    try:
+        table.update_item(**params)
+        return True
+    except ClientError as e:
+        if e.response["Error"]["Code"] == "ConditionalCheckFailedException":
+            # Edited or closed concurrently; the next run picks it up.
+            return False
+        raise
+
+
+def refresh_windows(table) -> dict:
+    """One pass over the live window only; cost scales with posts that change."""
+    start = today().isoformat()
+    counts = {"closed": 0, "opened": 0}
+    for phase in (OPEN, UPCOMING):
+        expired = _query_all(
+            table,
+            IndexName=WINDOW_INDEX,
+            KeyConditionExpression=Key(WINDOW_ATTRIBUTE).eq(phase) & Key("endDate").lt(start),
+            ProjectionExpression="id",
+        )
+        for item in expired:
+            counts["closed"] += _set_window(table, item["id"], phase, None)
+
+    starting = _query_all(
+        table,
+        IndexName=WINDOW_INDEX,
+        KeyConditionExpression=Key(WINDOW_ATTRIBUTE).eq(UPCOMING) & Key("endDate").gte(start),
+        FilterExpression=Attr("startDate").lte(start),
+        ProjectionExpression="id",
+    )
+    for item in starting:
+        counts["opened"] += _set_window(table, item["id"], UPCOMING, OPEN)
+    return counts
+
+
+def backfill_windows(table) -> int:
+    """Add the window attribute to live posts written before the index existed."""
+    added = 0
+    params = {
+        "FilterExpression": Attr("status").eq("published") & Attr(WINDOW_ATTRIBUTE).not_exists() & Attr("endDate").gte(today().isoformat()),
+        "ProjectionExpression": "id, startDate, endDate, #s",
+        "ExpressionAttributeNames": {"#s": "status"},
+    }
+    while True:
+        response = table.scan(**params)
+        for item in response.get("Items", []):
+            window = window_for(item.get("startDate"), item.get("endDate"), item.get("status"))
+            if window:
+                added += _set_window(table, item["id"], None, window)
+        if "LastEvaluatedKey" not in response:
+            return added
+        params["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+
+def lambda_handler(event, context):
+    BLOGS_TABLE = os.getenv("BLOGS_TABLE")
+    if not BLOGS_TABLE:
+        raise RuntimeError("Environment variable BLOGS_TABLE not set.")
+
+    logger.info(f"Received event: {event}")
+    table = dynamodb.Table(BLOGS_TABLE)
+
+    result = {}
+    if (event or {}).get("backfill"):
+        result["backfilled"] = backfill_windows(table)
+    result.update(refresh_windows(table))
+    logger.info(f"Window refresh: {result}")
+    return result
@@ -0,0 +1,69 @@
+"""
+Scheduled roll-up of the sharded view counters (common/counters.py) into
+one "popular" item per category holding the most viewed posts of the last
+week with their cards, so the popular listing is a single GetItem.
+"""
+import os
+import logging
+from datetime import datetime
+import boto3
+from boto3.dynamodb.conditions import Key
+from common.counters import POPULAR_KEY, chunks, popular_key, recent_views, top_by_category
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+dynamodb = boto3.resource("dynamodb")
+
+CARD_FIELDS = ["id", "title", "contentSummary", "image", "category", "startDate", "endDate", "status"]
+
+
+def fetch_cards(table_name: str, post_ids) -> dict:
+    """Published posts among ``post_ids``, keyed by id, with listing fields only."""
+    names = {f"#f{i}": field for i, field in enumerate(CARD_FIELDS)}
+    cards = {}
+    for batch in chunks(sorted(post_ids), 100):
+        request = {table_name: {
+            "Keys": [{"id": post_id} for post_id in batch],
+            "ProjectionExpression": ", ".join(names),
+            "ExpressionAttributeNames": names,
+        }}
+        while request:
+            response = dynamodb.batch_get_item(RequestItems=request)
+            for item in response.get("Responses", {}).get(table_name, []):
+                if item.get("status") == "published":
+                    cards[item["id"]] = {k: v for k, v in item.items() if k != "status"}
+            request = response.get("UnprocessedKeys") or None
+    return cards
+
+
+def compact(counters, blogs_table_name: str) -> dict:
+    totals = recent_views(counters)
+    groups = top_by_category(totals)
+    cards = fetch_cards(blogs_table_name, {post_id for entries in groups.values() for post_id, _ in entries})
+    now = datetime.utcnow().isoformat()
+
+    stale = {
+        item["sk"] for item in counters.query(
+            KeyConditionExpression=Key("pk").eq(POPULAR_KEY), ProjectionExpression="sk"
+        ).get("Items", [])
+    }
+    with counters.batch_writer() as batch:
+        for category, entries in groups.items():
+            posts = [{**cards[post_id], "views": views} for post_id, views in entries if post_id in cards]
+            batch.put_item(Item={**popular_key(category), "posts": posts, "updatedAt": now})
+            stale.discard(category)
+        for category in stale:
+            batch.delete_item(Key=popular_key(category))
+    return {"posts": len(totals), "categories": len(groups)}
+
+
+def lambda_handler(event, context):
+    BLOGS_TABLE = os.getenv("BLOGS_TABLE")
+    COUNTERS_TABLE = os.getenv("COUNTERS_TABLE")
+    if not BLOGS_TABLE or not COUNTERS_TABLE:
+        raise RuntimeError("Environment variables BLOGS_TABLE or COUNTERS_TABLE not set.")
+
+    result = compact(dynamodb.Table(COUNTERS_TABLE), BLOGS_TABLE)
+    logger.info(f"Compacted views of {result['posts']} posts into {result['categories']} popular lists")
+    return result
@@ -6,9 +6,11 @@ import logging
 from datetime import datetime, timedelta
 from requests_toolbelt.multipart import decoder
 import boto3
-from common.s3 import put_s3_file
+from common.body import store_body
+from common.media import is_stored_media
 from common.utils import build_response
 from common.constants import StatusCodes, Headers
+from common.windows import WINDOW_ATTRIBUTE, window_for
 from json import loads  
 
 logger = logging.getLogger()
@@ -44,17 +46,24 @@ def lambda_handler(event, context):
         summary = payload.get("contentSummary")
         startDate = payload.get("startDate")
         endDate = payload.get("endDate")
-        imageType = payload.get("imageType")
+        image = payload.get("image")
         category = payload.get("category")
         blog_status = payload.get("status", "published")
 
-        if not title or not content or not imageType:
-            logger.error(f"Invalid Title: {title} or Content: {content} or Images: {imageType}")
+        if not title or not content or not image:
+            logger.error(f"Invalid Title: {title} or Content: {content} or Images: {image}")
             return build_response(
                 StatusCodes.BAD_REQUEST,
                 Headers.BAD_REQUEST,
                 {"message": "Title and content and image are required."},
             )
+        # The key /upload-to-s3 returned; content keys cannot be re-pointed.
+        if not is_stored_media(S3_BUCKET, image):
+            return build_response(
+                StatusCodes.BAD_REQUEST,
+                Headers.BAD_REQUEST,
+                {"message": "'image' must be a key returned by /upload-to-s3."},
+            )
 
         blog_id = str(uuid.uuid4())
 
@@ -70,19 +79,29 @@ def lambda_handler(event, context):
         item = {
             "id": blog_id,
             "title": title,
-            "htmlContent": content,  # Changed from 'content' to 'htmlContent'
             "contentSummary": summary,
-            "startDate": startDate,
-            "endDate": endDate,
             "category": category or "general",  # Ensure category is not None
             "status": blog_status,
-            "image": f"{blog_id}{imageType}",
+            "image": image,
             "createdAt": now,
             "updatedAt": now,
             "publishedAt": now,  # Separate field for the GSI
+            "version": 1,  # Checked by update.py to reject stale edits
         }
+        # endDate keys the open-window index, which rejects null and empty
+        # values; missing dates are left out, as update.py removes them.
+        if startDate:
+            item["startDate"] = startDate
+        if endDate:
+            item["endDate"] = endDate
+        # Compressed inline, or offloaded to S3 with a pointer when large.
+        item.update(store_body(S3_BUCKET, content))
         if ttl_value:
             item["ttl"] = ttl_value
+        # Sparse attribute: only live published posts enter the window index.
+        window = window_for(startDate, endDate, blog_status)
+        if window:
+            item[WINDOW_ATTRIBUTE] = window
 
         table = dynamodb.Table(BLOGS_TABLE)
         table.put_item(Item=item)
@@ -2,23 +2,35 @@
 Get all blogs with pagination
 """
 import os
-import json
 import logging
 import boto3
 from boto3.dynamodb.conditions import Key, Attr
-from common.s3 import get_s3_file_url
+from common.media import media_url
 from common.utils import build_response
 from common.constants import StatusCodes, Headers
+from common.resilience import (
+    DYNAMODB_CLIENT_CONFIG,
+    ReadUnavailableError,
+    decode_cursor,
+    encode_cursor,
+    resilient_query,
+)
+from common.ratelimit import LISTING, RateLimiter, client_id, consumed_units
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
-dynamodb = boto3.resource("dynamodb")
+dynamodb = boto3.resource("dynamodb", config=DYNAMODB_CLIENT_CONFIG)
+
+MAX_LIMIT = 50
+
+limiter = RateLimiter(LISTING)
 
 def lambda_handler(event, context):
     try:
         BLOGS_TABLE = os.getenv("BLOGS_TABLE")
         S3_BUCKET = os.getenv("BLOG_IMAGES_BUCKET")
+        COUNTERS_TABLE = os.getenv("COUNTERS_TABLE")
 
         if not BLOGS_TABLE or not S3_BUCKET:
             return build_response(
@@ -30,72 +42,85 @@ def lambda_handler(event, context):
         logger.info(f"Received event: {event}")
 
         params = event.get("queryStringParameters") or {}
-        limit = int(params.get("limit", 10))
+        try:
+            limit = max(1, min(int(params.get("limit", 10)), MAX_LIMIT))
+        except ValueError:
+            limit = 10
         last_evaluated_key = params.get("last_evaluated_key")
         status = params.get("status", "published")  # Default to published blogs
 
         table = dynamodb.Table(BLOGS_TABLE)
 
-        # First try to scan the table to see if we have any data at all
-        try:
-            scan_response = table.scan(Limit=5)
-            logger.info(f"Sample items from table: {scan_response.get('Items', [])}")
-            logger.info(f"Table scan count: {scan_response.get('Count', 0)}")
-        except Exception as scan_error:
-            logger.error(f"Table scan failed: {scan_error}")
-            return build_response(
-                StatusCodes.INTERNAL_SERVER_ERROR,
-                Headers.INTERNAL_SERVER_ERROR,
-                {"message": f"Table access failed: {str(scan_error)}"},
-            )
-        
         # Query using the status-publishedAt index to get published blogs ordered by date
         query_params = {
             "IndexName": "statusPublishedAtIndex",
             "KeyConditionExpression": Key("status").eq(status),
             "ScanIndexForward": False,  # Sort in descending order (newest first)
-            "Limit": limit
+            "Limit": limit,
+            "ReturnConsumedCapacity": "TOTAL",
         }
-        
+
+        # Scan only when the index itself is unusable; throttling is served
+        # from the last good response instead of adding load to the table.
+        fallback_scan_params = {"ReturnConsumedCapacity": "TOTAL"}
+        if status and status != "all":
+            fallback_scan_params["FilterExpression"] = Attr("status").eq(status)
+
         if last_evaluated_key:
             try:
-                query_params["ExclusiveStartKey"] = json.loads(last_evaluated_key)
+                # Scan cursors continue the fallback scan, never the index.
+                source, start_key = decode_cursor(last_evaluated_key)
+                params_for = fallback_scan_params if source == "scan" else query_params
+                params_for["ExclusiveStartKey"] = start_key
             except Exception as e:
                 logger.warning(f"Invalid last_evaluated_key: {last_evaluated_key}, error: {e}")
 
         logger.info(f"Query params: {query_params}")
-        
+
+        counters = dynamodb.Table(COUNTERS_TABLE) if COUNTERS_TABLE else None
+        quota = limiter.admit(counters, client_id(event))
+        if not quota.allowed:
+            return build_response(
+                StatusCodes.TOO_MANY_REQUESTS,
+                {**Headers.TOO_MANY_REQUESTS, "Retry-After": str(max(1, int(quota.retry_after)))},
+                {"message": "Too many requests, please retry shortly."},
+            )
+
         try:
-            response = table.query(**query_params)
-            blogs = response.get("Items", [])
-        except Exception as query_error:
-            logger.error(f"GSI query failed: {query_error}")
-            # Fallback to scan if GSI query fails
-            logger.info("Falling back to table scan")
-            scan_params = {
-                "Limit": limit
-            }
-            if status and status != "all":
-                scan_params["FilterExpression"] = Attr("status").eq(status)
-            
-            response = table.scan(**scan_params)
-            blogs = response.get("Items", [])
-        
-        logger.info(f"Found {len(blogs)} blogs")
+            response, source = resilient_query(
+                table,
+                query_params,
+                cache_key=f"get:{status}:{limit}:{last_evaluated_key or ''}",
+                breaker_name="statusPublishedAtIndex",
+                fallback_scan_params=fallback_scan_params,
+                context=context,
+            )
+        except ReadUnavailableError as e:
+            logger.error(f"Blogs query unavailable: {e.cause}")
+            return build_response(
+                StatusCodes.SERVICE_UNAVAILABLE,
+                {**Headers.SERVICE_UNAVAILABLE, "Retry-After": str(max(1, int(e.retry_after)))},
+                {"message": "Blogs are temporarily unavailable, please retry shortly."},
+            )
+        blogs = response.get("Items", [])
+        # Stale responses were served from memory and read nothing.
+        limiter.settle(counters, quota, 0 if source == "stale" else consumed_units(response))
+
+        logger.info(f"Found {len(blogs)} blogs from {source}")
         logger.info(f"Response keys: {list(response.keys())}")
 
         if not blogs:
             return build_response(
                 StatusCodes.OK,
                 Headers.DEFAULT,
-                {"blogs": [], "message": "No blogs found.", "table_items_count": scan_response.get("Count", 0)},
+                {"blogs": [], "message": "No blogs found."},
             )
 
         formatted_blogs = []
         for blog in blogs:
             image_path = blog.get("image")
             if image_path:
-                image = get_s3_file_url(S3_BUCKET, image_path)
+                image = media_url(S3_BUCKET, image_path)
             else:
                 image = ""
 
@@ -104,7 +129,6 @@ def lambda_handler(event, context):
                 "title": blog.get("title"),
                 "summary": blog.get("contentSummary", blog.get("content", "")),
                 "image": image,
-                "htmlContent": blog.get("htmlContent", blog.get("content", "")),
                 "textContent": "",
                 "startDate": blog.get("startDate"),
                 "endDate": blog.get("endDate"),
@@ -118,10 +142,12 @@ def lambda_handler(event, context):
             "blogs": formatted_blogs,
             "count": len(formatted_blogs)
         }
+        if source == "stale":
+            result["stale"] = True
         
         # Include pagination info if there are more items
         if "LastEvaluatedKey" in response:
-            result["last_evaluated_key"] = json.dumps(response["LastEvaluatedKey"])
+            result["last_evaluated_key"] = encode_cursor(response, source)
             result["has_more"] = True
         else:
             result["has_more"] = False
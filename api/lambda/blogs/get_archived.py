@@ -0,0 +1,95 @@
+"""
+Read-only queries over archived posts: one month, optionally one category,
+optionally filtered by a search term, or a single post by id.
+"""
+import os
+import logging
+from common.utils import build_response
+from common.constants import StatusCodes, Headers
+from common.archive import MONTH_PATTERN, read_partition
+from common.media import media_url
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+MAX_LIMIT = 50
+
+
+def _card(bucket: str, post: dict) -> dict:
+    return {
+        "id": post.get("id"),
+        "title": post.get("title"),
+        "summary": post.get("contentSummary", ""),
+        "image": media_url(bucket, post.get("image")) or "",
+        "startDate": post.get("startDate"),
+        "endDate": post.get("endDate"),
+        "category": post.get("category"),
+        "publishedAt": post.get("publishedAt"),
+    }
+
+
+def lambda_handler(event, context):
+    try:
+        S3_BUCKET = os.getenv("BLOG_IMAGES_BUCKET")
+
+        if not S3_BUCKET:
+            return build_response(
+                StatusCodes.INTERNAL_SERVER_ERROR,
+                Headers.INTERNAL_SERVER_ERROR,
+                {"message": "Environment variable BLOG_IMAGES_BUCKET not set."},
+            )
+
+        params = event.get("queryStringParameters") or {}
+        month = params.get("month", "")
+        category = params.get("category")
+        query = (params.get("q") or "").strip().lower()
+        blog_id = params.get("id")
+        try:
+            limit = max(1, min(int(params.get("limit", 20)), MAX_LIMIT))
+        except ValueError:
+            limit = 20
+
+        if not MONTH_PATTERN.match(month):
+            return build_response(
+                StatusCodes.BAD_REQUEST,
+                Headers.BAD_REQUEST,
+                {"message": "'month' query parameter (YYYY-MM) is required."},
+            )
+
+        posts = read_partition(S3_BUCKET, month, category)
+
+        if blog_id:
+            post = next((p for p in posts if p.get("id") == blog_id), None)
+            if not post:
+                return build_response(StatusCodes.NOT_FOUND, Headers.NOT_FOUND, {"message": "Archived blog not found."})
+            return build_response(
+                StatusCodes.OK,
+                {**Headers.DEFAULT, "Cache-Control": "public, max-age=86400"},
+                {"post": {**_card(S3_BUCKET, post), "htmlContent": post.get("htmlContent", ""), "archived": True}},
+            )
+
+        if query:
+            posts = (
+                p for p in posts
+                if query in (p.get("title") or "").lower() or query in (p.get("contentSummary") or "").lower()
+            )
+        matches = sorted(posts, key=lambda p: p.get("endDate") or "", reverse=True)
+
+        return build_response(
+            StatusCodes.OK,
+            {**Headers.DEFAULT, "Cache-Control": "public, max-age=3600"},
+            {
+                "blogs": [_card(S3_BUCKET, p) for p in matches[:limit]],
+                "total": len(matches),
+                "month": month,
+                "archived": True,
+            },
+        )
+
+    except Exception as e:
+        logger.error(f"Error querying archive: {str(e)}", exc_info=True)
+        return build_response(
+            StatusCodes.INTERNAL_SERVER_ERROR,
+            Headers.INTERNAL_SERVER_ERROR,
+            {"message": "An error occurred while querying the archive."},
+        )
@@ -6,19 +6,26 @@ import json
 import logging
 import boto3
 from boto3.dynamodb.conditions import Key, Attr
-from common.s3 import get_s3_file_url
+from common.media import media_url
 from common.utils import build_response
 from common.constants import StatusCodes, Headers
+from common.resilience import DYNAMODB_CLIENT_CONFIG, ReadUnavailableError, decode_cursor, resilient_query
+from common.ratelimit import LISTING, RateLimiter, client_id, consumed_units
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
-dynamodb = boto3.resource("dynamodb")
+dynamodb = boto3.resource("dynamodb", config=DYNAMODB_CLIENT_CONFIG)
+
+MAX_LIMIT = 50
+
+limiter = RateLimiter(LISTING)
 
 def lambda_handler(event, context):
     try:
         BLOGS_TABLE = os.getenv("BLOGS_TABLE")
         S3_BUCKET = os.getenv("BLOG_IMAGES_BUCKET")
+        COUNTERS_TABLE = os.getenv("COUNTERS_TABLE")
 
         if not BLOGS_TABLE or not S3_BUCKET:
             return build_response(
@@ -31,7 +38,10 @@ def lambda_handler(event, context):
 
         params = event.get("queryStringParameters") or {}
         category = params.get("category")
-        limit = int(params.get("limit", 10))
+        try:
+            limit = max(1, min(int(params.get("limit", 10)), MAX_LIMIT))
+        except ValueError:
+            limit = 10
         last_evaluated_key = params.get("last_evaluated_key")
 
         if not category:
@@ -46,32 +56,54 @@ def lambda_handler(event, context):
         query_params = {
             "IndexName": "statusCategoryIndex",
             "KeyConditionExpression": Key("status").eq("published") & Key("category").eq(category),
-            "Limit": limit
+            "Limit": limit,
+            "ReturnConsumedCapacity": "TOTAL",
+        }
+        fallback_scan_params = {
+            "FilterExpression": Attr("category").eq(category) & Attr("status").eq("published"),
+            "ReturnConsumedCapacity": "TOTAL",
         }
         if last_evaluated_key:
             try:
-                query_params["ExclusiveStartKey"] = json.loads(last_evaluated_key)
+                # Scan cursors continue the fallback scan, never the index.
+                source, start_key = decode_cursor(last_evaluated_key)
+                params_for = fallback_scan_params if source == "scan" else query_params
+                params_for["ExclusiveStartKey"] = start_key
             except Exception as e:
                 logger.warning(f"Invalid last_evaluated_key: {last_evaluated_key}, error: {e}")
 
         logger.info(f"Query params: {query_params}")
         
+        counters = dynamodb.Table(COUNTERS_TABLE) if COUNTERS_TABLE else None
+        quota = limiter.admit(counters, client_id(event))
+        if not quota.allowed:
+            return build_response(
+                StatusCodes.TOO_MANY_REQUESTS,
+                {**Headers.TOO_MANY_REQUESTS, "Retry-After": str(max(1, int(quota.retry_after)))},
+                {"message": "Too many requests, please retry shortly."},
+            )
+
         try:
-            response = table.query(**query_params)
-            blogs = response.get("Items", [])
-        except Exception as query_error:
-            logger.error(f"GSI query failed: {query_error}")
-            # Fallback to scan if GSI query fails
-            logger.info("Falling back to table scan")
-            scan_params = {
-                "FilterExpression": Attr("category").eq(category) & Attr("status").eq("published"),
-                "Limit": limit
-            }
-            
-            response = table.scan(**scan_params)
-            blogs = response.get("Items", [])
-        
-        logger.info(f"Found {len(blogs)} blogs for category {category}")
+            response, source = resilient_query(
+                table,
+                query_params,
+                cache_key=f"category:{category}:{limit}:{last_evaluated_key or ''}",
+                breaker_name="statusCategoryIndex",
+                fallback_scan_params=fallback_scan_params,
+                context=context,
+            )
+        except ReadUnavailableError as e:
+            logger.error(f"Category query unavailable: {e.cause}")
+            return build_response(
+                StatusCodes.SERVICE_UNAVAILABLE,
+                {**Headers.SERVICE_UNAVAILABLE, "Retry-After": str(max(1, int(e.retry_after)))},
+                {"message": "Blogs are temporarily unavailable, please retry shortly."},
+            )
+        blogs = response.get("Items", [])
+        # Stale responses were served from memory and read nothing.
+        limiter.settle(counters, quota, 0 if source == "stale" else consumed_units(response))
+
+        logger.info(f"Found {len(blogs)} blogs for category {category} from {source}")
         logger.info(f"Response keys: {list(response.keys())}")
 
         if not blogs:
@@ -85,7 +117,7 @@ def lambda_handler(event, context):
         for blog in blogs:
             image_path = blog.get("image")
             if image_path:
-                image = get_s3_file_url(S3_BUCKET, image_path)
+                image = media_url(S3_BUCKET, image_path)
             else:
                 image = ""
 
@@ -94,7 +126,6 @@ def lambda_handler(event, context):
                 "title": blog.get("title"),
                 "summary": blog.get("contentSummary", blog.get("content", "")),
                 "image": image,
-                "htmlContent": blog.get("htmlContent", blog.get("content", "")),
                 "textContent": "",
                 "startDate": blog.get("startDate"),
                 "endDate": blog.get("endDate"),
@@ -104,13 +135,17 @@ def lambda_handler(event, context):
             }
             formatted_blogs.append(formatted_blog)
 
+        result = {
+            "blogs": formatted_blogs,
+            # "last_evaluated_key": json.dumps(response.get("LastEvaluatedKey")) if "LastEvaluatedKey" in response else None
+        }
+        if source == "stale":
+            result["stale"] = True
+
         return build_response(
             StatusCodes.OK,
             Headers.DEFAULT,
-            {
-                "blogs": formatted_blogs,
-                # "last_evaluated_key": json.dumps(response.get("LastEvaluatedKey")) if "LastEvaluatedKey" in response else None
-            },
+            result,
         )
 
     except Exception as e:
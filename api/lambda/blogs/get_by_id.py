@@ -4,14 +4,63 @@ Get blogs by their Id
 import logging
 import os
 import boto3
+from concurrent.futures import ThreadPoolExecutor
 from common.utils import build_response
 from common.constants import StatusCodes, Headers
-from common.s3 import get_s3_file_url
+from common.media import media_url
+from common.body import POINTER_ATTRIBUTE, load_body
+from common.counters import ViewBuffer
+from common.related import CARD_FIELDS, RELATED_ATTRIBUTE, stored_ids
 from boto3.dynamodb.conditions import Key
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 dynamodb = boto3.resource("dynamodb")
+# Offloaded bodies, related cards and view counts are handled while the image URLs are signed.
+executor = ThreadPoolExecutor(max_workers=3)
+# Views are counted in memory and flushed every few seconds (common/counters.py).
+views = ViewBuffer()
+
+
+def _flush_views(table_name: str):
+    try:
+        views.maybe_flush(dynamodb.Table(table_name))
+    except Exception as e:
+        # Counting must never fail a read.
+        logger.warning(f"Could not flush view counts: {e}")
+
+
+def _count_view(blog: dict):
+    """Record the view; a due flush runs beside the rest of the request, a few posts at a time."""
+    COUNTERS_TABLE = os.getenv("COUNTERS_TABLE")
+    if not COUNTERS_TABLE or blog.get("status") != "published":
+        return None
+    views.record(blog["id"], blog.get("category"))
+    return executor.submit(_flush_views, COUNTERS_TABLE) if views.due() else None
+
+
+def _related_cards(table_name: str, related) -> list:
+    """Cards for the neighbour ids the post stream stored on the item, in one BatchGetItem."""
+    post_ids = list(dict.fromkeys(stored_ids(related)))
+    if not post_ids:
+        return []
+    names = {f"#f{i}": field for i, field in enumerate(CARD_FIELDS)}
+    request = {table_name: {
+        "Keys": [{"id": post_id} for post_id in post_ids],
+        "ProjectionExpression": ", ".join(names),
+        "ExpressionAttributeNames": names,
+    }}
+    cards = {}
+    while request:
+        response = dynamodb.batch_get_item(RequestItems=request)
+        for item in response.get("Responses", {}).get(table_name, []):
+            # Unpublished since the stream last ran.
+            if item.get("status") == "published":
+                cards[item["id"]] = {k: v for k, v in item.items() if k != "status"}
+        request = response.get("UnprocessedKeys") or None
+    return [cards[post_id] for post_id in post_ids if post_id in cards]
+
+
 def lambda_handler(event, context):
     try:
         BLOGS_TABLE = os.getenv("BLOGS_TABLE")
@@ -49,23 +98,37 @@ def lambda_handler(event, context):
                 Headers.NOT_FOUND,
                 {"message": "Blog not found."},
             )
+        body = executor.submit(load_body, S3_BUCKET, blog) if blog.get(POINTER_ATTRIBUTE) else None
+        cards = executor.submit(_related_cards, BLOGS_TABLE, blog.get(RELATED_ATTRIBUTE))
+        flush = _count_view(blog)
         image = ""
         if blog.get("image"):
-            image = get_s3_file_url(S3_BUCKET, blog["image"])
+            image = media_url(S3_BUCKET, blog["image"])
+        related = [
+            {**card, "image": media_url(S3_BUCKET, card["image"]) if card.get("image") else ""}
+            for card in cards.result()
+        ]
         formatted_blog = {
             "id": blog.get("id"),
             "title": blog.get("title"),
             "summary": blog.get("contentSummary", blog.get("content", "")),
             "image": image,
-            "htmlContent": blog.get("htmlContent", blog.get("content", "")),
+            "htmlContent": body.result() if body else load_body(S3_BUCKET, blog),
             "textContent": "",
             "startDate": blog.get("startDate"),
             "endDate": blog.get("endDate"),
             "category": blog.get("category"),
             "publishedAt": blog.get("publishedAt"),
-            "status": blog.get("status")
+            "status": blog.get("status"),
+            # Sent back with edits (update.py); posts from before versioning are 0.
+            "version": int(blog.get("version", 0)),
+            # Neighbours precomputed by the post stream (common/related.py).
+            "related": related,
         }
-        
+        # Finish before returning: Lambda freezes the container once the response is sent.
+        if flush:
+            flush.result()
+
         return build_response(
             StatusCodes.OK,
             Headers.DEFAULT,
@@ -0,0 +1,191 @@
+"""
+List live schemes by application window: open now, closing soon, upcoming
+"""
+import os
+import logging
+import boto3
+from boto3.dynamodb.conditions import Key
+from common.media import media_url
+from common.utils import build_response
+from common.constants import StatusCodes, Headers
+from common.resilience import (
+    DYNAMODB_CLIENT_CONFIG,
+    ReadUnavailableError,
+    decode_cursor,
+    encode_cursor,
+    resilient_query,
+)
+from common.ratelimit import LISTING, RateLimiter, client_id, consumed_units
+from common.windows import (
+    OPEN,
+    UPCOMING,
+    WINDOW_ATTRIBUTE,
+    WINDOW_INDEX,
+    days_from_today,
+    end_of_day,
+    today,
+)
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+dynamodb = boto3.resource("dynamodb", config=DYNAMODB_CLIENT_CONFIG)
+
+# API path -> listing served on it
+ROUTES = {
+    "/get-open-blogs": "open",
+    "/get-closing-soon-blogs": "closing-soon",
+    "/get-upcoming-blogs": "upcoming",
+}
+DEFAULT_CLOSING_DAYS = 7
+MAX_CLOSING_DAYS = 60
+MAX_LIMIT = 50
+
+limiter = RateLimiter(LISTING)
+
+
+def key_condition(listing: str, days: int):
+    """Key condition on the sparse window index for a listing."""
+    start = today().isoformat()
+    if listing == "open":
+        return Key(WINDOW_ATTRIBUTE).eq(OPEN) & Key("endDate").gte(start)
+    if listing == "closing-soon":
+        return Key(WINDOW_ATTRIBUTE).eq(OPEN) & Key("endDate").between(start, end_of_day(days_from_today(days)))
+    return Key(WINDOW_ATTRIBUTE).eq(UPCOMING) & Key("endDate").gte(start)
+
+
+def lambda_handler(event, context):
+    try:
+        BLOGS_TABLE = os.getenv("BLOGS_TABLE")
+        S3_BUCKET = os.getenv("BLOG_IMAGES_BUCKET")
+        COUNTERS_TABLE = os.getenv("COUNTERS_TABLE")
+
+        if not BLOGS_TABLE or not S3_BUCKET:
+            return build_response(
+                StatusCodes.INTERNAL_SERVER_ERROR,
+                Headers.INTERNAL_SERVER_ERROR,
+                {"message": "Environment variables BLOGS_TABLE or BLOG_IMAGES_BUCKET not set."},
+            )
+
+        logger.info(f"Received event: {event}")
+
+        params = event.get("queryStringParameters") or {}
+        listing = params.get("window") or ROUTES.get(event.get("resource") or event.get("path"))
+        try:
+            limit = max(1, min(int(params.get("limit", 10)), MAX_LIMIT))
+        except ValueError:
+            limit = 10
+        last_evaluated_key = params.get("last_evaluated_key")
+
+        if listing not in ROUTES.values():
+            return build_response(
+                StatusCodes.BAD_REQUEST,
+                Headers.BAD_REQUEST,
+                {"message": f"'window' must be one of: {', '.join(ROUTES.values())}."},
+            )
+
+        try:
+            # Negative days would invert the BETWEEN range, which DynamoDB rejects.
+            days = max(0, min(int(params.get("days", DEFAULT_CLOSING_DAYS)), MAX_CLOSING_DAYS))
+        except ValueError:
+            days = DEFAULT_CLOSING_DAYS
+
+        table = dynamodb.Table(BLOGS_TABLE)
+
+        # Ascending endDate: soonest deadline first.
+        query_params = {
+            "IndexName": WINDOW_INDEX,
+            "KeyConditionExpression": key_condition(listing, days),
+            "ScanIndexForward": True,
+            "Limit": limit,
+            "ReturnConsumedCapacity": "TOTAL",
+        }
+        if last_evaluated_key:
+            try:
+                source, start_key = decode_cursor(last_evaluated_key)
+                if source != "query":
+                    raise ValueError("not an index cursor")
+                query_params["ExclusiveStartKey"] = start_key
+            except Exception as e:
+                logger.warning(f"Invalid last_evaluated_key: {last_evaluated_key}, error: {e}")
+
+        logger.info(f"Query params: {query_params}")
+
+        counters = dynamodb.Table(COUNTERS_TABLE) if COUNTERS_TABLE else None
+        quota = limiter.admit(counters, client_id(event))
+        if not quota.allowed:
+            return build_response(
+                StatusCodes.TOO_MANY_REQUESTS,
+                {**Headers.TOO_MANY_REQUESTS, "Retry-After": str(max(1, int(quota.retry_after)))},
+                {"message": "Too many requests, please retry shortly."},
+            )
+
+        try:
+            response, source = resilient_query(
+                table,
+                query_params,
+                cache_key=f"window:{listing}:{days}:{today()}:{limit}:{last_evaluated_key or ''}",
+                breaker_name=WINDOW_INDEX,
+                context=context,
+            )
+        except ReadUnavailableError as e:
+            logger.error(f"Window query unavailable: {e.cause}")
+            return build_response(
+                StatusCodes.SERVICE_UNAVAILABLE,
+                {**Headers.SERVICE_UNAVAILABLE, "Retry-After": str(max(1, int(e.retry_after)))},
+                {"message": "Blogs are temporarily unavailable, please retry shortly."},
+            )
+        blogs = response.get("Items", [])
+        # Stale responses were served from memory and read nothing.
+        limiter.settle(counters, quota, 0 if source == "stale" else consumed_units(response))
+
+        logger.info(f"Found {len(blogs)} {listing} blogs from {source}")
+
+        formatted_blogs = []
+        for blog in blogs:
+            image_path = blog.get("image")
+            if image_path:
+                image = media_url(S3_BUCKET, image_path)
+            else:
+                image = ""
+
+            # The index projects listing fields only, htmlContent is not read.
+            formatted_blog = {
+                "id": blog.get("id"),
+                "title": blog.get("title"),
+                "summary": blog.get("contentSummary", ""),
+                "image": image,
+                "startDate": blog.get("startDate"),
+                "endDate": blog.get("endDate"),
+                "category": blog.get("category"),
+                "publishedAt": blog.get("publishedAt"),
+                "status": blog.get("status")
+            }
+            formatted_blogs.append(formatted_blog)
+
+        result = {
+            "blogs": formatted_blogs,
+            "count": len(formatted_blogs),
+            "window": listing,
+        }
+        if source == "stale":
+            result["stale"] = True
+        if "LastEvaluatedKey" in response:
+            result["last_evaluated_key"] = encode_cursor(response, source)
+            result["has_more"] = True
+        else:
+            result["has_more"] = False
+
+        return build_response(
+            StatusCodes.OK,
+            Headers.DEFAULT,
+            result,
+        )
+
+    except Exception as e:
+        logger.error(f"Error fetching blogs by window: {str(e)}", exc_info=True)
+        return build_response(
+            StatusCodes.INTERNAL_SERVER_ERROR,
+            Headers.INTERNAL_SERVER_ERROR,
+            {"message": "An error occurred while fetching blogs."},
+        )
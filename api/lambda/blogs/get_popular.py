@@ -0,0 +1,65 @@
+"""
+Most viewed posts of the last week, overall or per category, as precomputed
+by compact_views.py
+"""
+import os
+import logging
+import boto3
+from common.utils import build_response
+from common.constants import StatusCodes, Headers
+from common.counters import TOP_N, popular_key
+from common.media import media_url
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+dynamodb = boto3.resource("dynamodb")
+
+
+def lambda_handler(event, context):
+    try:
+        COUNTERS_TABLE = os.getenv("COUNTERS_TABLE")
+        S3_BUCKET = os.getenv("BLOG_IMAGES_BUCKET")
+
+        if not COUNTERS_TABLE or not S3_BUCKET:
+            return build_response(
+                StatusCodes.INTERNAL_SERVER_ERROR,
+                Headers.INTERNAL_SERVER_ERROR,
+                {"message": "Environment variables COUNTERS_TABLE or BLOG_IMAGES_BUCKET not set."},
+            )
+
+        params = event.get("queryStringParameters") or {}
+        category = params.get("category")
+        try:
+            limit = max(1, min(int(params.get("limit", 10)), TOP_N))
+        except ValueError:
+            limit = 10
+
+        item = dynamodb.Table(COUNTERS_TABLE).get_item(Key=popular_key(category)).get("Item") or {}
+        blogs = [
+            {
+                "id": post.get("id"),
+                "title": post.get("title"),
+                "summary": post.get("contentSummary", ""),
+                "image": media_url(S3_BUCKET, post.get("image")) or "",
+                "startDate": post.get("startDate"),
+                "endDate": post.get("endDate"),
+                "category": post.get("category"),
+                "views": int(post.get("views", 0)),
+            }
+            for post in item.get("posts", [])[:limit]
+        ]
+
+        return build_response(
+            StatusCodes.OK,
+            {**Headers.DEFAULT, "Cache-Control": "public, max-age=300"},
+            {"blogs": blogs, "category": category or "all", "updatedAt": item.get("updatedAt")},
+        )
+
+    except Exception as e:
+        logger.error(f"Error fetching popular blogs: {str(e)}", exc_info=True)
+        return build_response(
+            StatusCodes.INTERNAL_SERVER_ERROR,
+            Headers.INTERNAL_SERVER_ERROR,
+            {"message": "An error occurred while fetching popular blogs."},
+        )
@@ -0,0 +1,303 @@
+"""
+Keep data derived from blog posts in sync with the blogs table stream.
+
+Every processor receives the batch as (old_image, new_image) pairs and must
+be safe to replay, since a failed batch is retried as a whole. Invoke with
+{"rebuild": ["suggest"]} to rebuild derived data from a full table scan;
+the related-posts model is rebuilt this way on a daily schedule, and
+{"rebuild": ["bodies"]} moves bodies of older items out of ``htmlContent``.
+Sitemaps and feeds (common/feeds.py) go to FEEDS_BUCKET and are skipped
+when it is not set. The search index (common/search_index.py) takes
+changes into its delta segment and is rebuilt into a new snapshot daily,
+or as soon as the delta outgrows DELTA_LIMIT.
+"""
+import os
+import logging
+import boto3
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from boto3.dynamodb.conditions import Attr
+from boto3.dynamodb.types import TypeDeserializer
+from botocore.exceptions import ClientError
+from common.body import LEGACY_ATTRIBUTE, store_body, with_body
+from common.feeds import (
+    CACHE_CONTROL,
+    FEED_FIELDS,
+    SITEMAP_KEY,
+    SITEMAP_SHARDS,
+    Feed,
+    Sitemap,
+    SitemapIndex,
+    affected_categories,
+    affected_shards,
+    feed_changed,
+    feed_key,
+    shard_key,
+)
+from common.index_store import ConcurrentUpdateError, IndexHolder
+from common.related import (
+    MODEL_KEY,
+    RELATED_ATTRIBUTE,
+    SOURCE_FIELDS,
+    RelatedModel,
+    relevant_change,
+    stored_ids,
+    write_related,
+)
+from common.s3 import delete_s3_file, put_s3_bytes
+from common.search_index import (
+    DELTA_KEY,
+    DELTA_LIMIT,
+    SEARCH_FIELDS,
+    SearchDelta,
+    build_snapshot,
+    document,
+    search_changed,
+    snapshot_key,
+)
+from common.suggest import INDEX_KEY, SuggestIndex
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+dynamodb = boto3.resource("dynamodb")
+deserializer = TypeDeserializer()
+
+suggest_index = IndexHolder(SuggestIndex, INDEX_KEY)
+related_model = IndexHolder(RelatedModel, MODEL_KEY)
+search_delta = IndexHolder(SearchDelta, DELTA_KEY)
+feed_objects = {}
+
+
+def _image(record: dict, name: str):
+    image = record.get("dynamodb", {}).get(name)
+    if not image:
+        return None
+    return {k: deserializer.deserialize(v) for k, v in image.items()}
+
+
+def changes_from_records(records) -> list:
+    """(old_image, new_image) per stream record, in stream order."""
+    return [(_image(r, "OldImage"), _image(r, "NewImage")) for r in records]
+
+
+def scan_posts(table, attributes):
+    """Yield published posts with only ``attributes`` projected."""
+    names = {f"#a{i}": name for i, name in enumerate(attributes)}
+    params = {
+        "FilterExpression": Attr("status").eq("published"),
+        "ProjectionExpression": ", ".join(names),
+        "ExpressionAttributeNames": names,
+    }
+    while True:
+        response = table.scan(**params)
+        yield from response.get("Items", [])
+        if "LastEvaluatedKey" not in response:
+            return
+        params["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+
+def update_suggestions(changes, table, bucket: str):
+    suggest_index.update(bucket, changes)
+
+
+def rebuild_suggestions(table, bucket: str):
+    index = SuggestIndex.from_posts(scan_posts(table, ["id", "title", "status"]))
+    suggest_index.get(bucket, force=True)
+    if not suggest_index.save(bucket, index):
+        raise RuntimeError("Suggest index changed during rebuild")
+    return len(index)
+
+
+def update_related(changes, table, bucket: str):
+    changes = [(old, with_body(bucket, new)) for old, new in changes if relevant_change(old, new)]
+    if not changes:
+        return
+    affected = related_model.update(bucket, changes)
+    if affected:
+        written = write_related(table, related_model.index, affected)
+        logger.info(f"Rewrote related posts on {written} items")
+
+
+def rebuild_related(table, bucket: str):
+    related_model.get(bucket, force=True)
+    stored = {}
+
+    def load(post):
+        stored[post["id"]] = stored_ids(post.pop(RELATED_ATTRIBUTE, None))
+        return with_body(bucket, post)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        posts = pool.map(load, scan_posts(table, (*SOURCE_FIELDS, RELATED_ATTRIBUTE)))
+        model = RelatedModel.from_posts(posts)
+    # Only items whose stored neighbour ids differ from the new model are rewritten.
+    changed = [doc_id for doc_id in model.vectors if model.related_ids(doc_id) != stored.get(doc_id, [])]
+    written = write_related(table, model, changed)
+    if not related_model.save(bucket, model):
+        raise RuntimeError("Related model changed during rebuild")
+    return {"posts": len(model), "written": written}
+
+
+def _feed_object(key: str, index_cls, factory=None) -> IndexHolder:
+    if key not in feed_objects:
+        feed_objects[key] = IndexHolder(index_cls, key, factory=factory)
+    return feed_objects[key]
+
+
+def _write_rss(bucket: str, feed: Feed):
+    if not put_s3_bytes(bucket, feed_key(feed.category, "rss"), feed.to_rss(), "application/rss+xml",
+                        CacheControl=CACHE_CONTROL):
+        raise RuntimeError(f"Could not write RSS feed for {feed.category or 'all'}")
+
+
+def update_feeds(changes, table, bucket: str):
+    feeds_bucket = os.getenv("FEEDS_BUCKET")
+    changes = [(old, new) for old, new in changes if feed_changed(old, new)]
+    if not feeds_bucket or not changes:
+        return
+    shards = []
+    for shard, shard_changes in affected_shards(changes).items():
+        holder = _feed_object(shard_key(shard), Sitemap)
+        if holder.update(feeds_bucket, shard_changes):
+            shards.append((shard, holder.index.lastmod()))
+    if shards:
+        _feed_object(SITEMAP_KEY, SitemapIndex).update(feeds_bucket, shards)
+    for category, feed_changes in affected_categories(changes).items():
+        holder = _feed_object(feed_key(category), Feed, factory=lambda category=category: Feed(category))
+        if holder.update(feeds_bucket, feed_changes):
+            # The RSS copy follows the Atom feed it was rendered from.
+            _write_rss(feeds_bucket, holder.index)
+    logger.info(f"Patched {len(shards)} sitemap shards for {len(changes)} changes")
+
+
+def rebuild_feeds(table, bucket: str):
+    feeds_bucket = os.getenv("FEEDS_BUCKET")
+    if not feeds_bucket:
+        raise RuntimeError("Environment variable FEEDS_BUCKET not set.")
+
+    def replace(key, index_cls, document):
+        holder = _feed_object(key, index_cls)
+        holder.get(feeds_bucket, force=True)
+        if not holder.save(feeds_bucket, document):
+            raise RuntimeError(f"{key} changed during rebuild")
+
+    changes = [(None, post) for post in scan_posts(table, FEED_FIELDS)]
+    by_shard = affected_shards(changes)
+    index = SitemapIndex()
+    for shard in range(SITEMAP_SHARDS):
+        sitemap = Sitemap()
+        sitemap.apply(by_shard.get(shard, []))
+        replace(shard_key(shard), Sitemap, sitemap)
+        index.apply([(shard, sitemap.lastmod())])
+    replace(SITEMAP_KEY, SitemapIndex, index)
+
+    by_category = affected_categories(changes)
+    for category, feed_changes in by_category.items():
+        feed = Feed(category)
+        feed.apply(feed_changes)
+        replace(feed_key(category), Feed, feed)
+        _write_rss(feeds_bucket, feed)
+    return {"posts": len(changes), "feeds": len(by_category)}
+
+
+def update_search(changes, table, bucket: str):
+    changes = [(old, with_body(bucket, new)) for old, new in changes if search_changed(old, new)]
+    if not changes:
+        return
+    search_delta.update(bucket, changes)
+    if len(search_delta.index) > DELTA_LIMIT:
+        logger.info(f"Search delta holds {len(search_delta.index)} posts, rebuilding the snapshot")
+        rebuild_search(table, bucket)
+
+
+def rebuild_search(table, bucket: str):
+    started = datetime.utcnow().isoformat()
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        documents = list(pool.map(lambda post: document(with_body(bucket, post)), scan_posts(table, SEARCH_FIELDS)))
+    previous = search_delta.get(bucket, force=True)
+    version = (previous.base_version if previous is not None else 0) + 1
+    data = build_snapshot(documents, version, started)
+    # Snapshots are immutable; a concurrent rebuild that took this version wins.
+    if not put_s3_bytes(bucket, snapshot_key(version), data, if_none_match="*"):
+        raise RuntimeError(f"Could not write search snapshot {version}")
+
+    # Switch readers over, keeping changes the scan may have missed.
+    for _ in range(5):
+        delta = search_delta.get(bucket, force=True)
+        if delta is None:
+            delta = SearchDelta()
+        if search_delta.save(bucket, delta.rebased(version, started)):
+            break
+    else:
+        raise ConcurrentUpdateError(f"Could not switch {DELTA_KEY} to snapshot {version}")
+    # Containers still on the previous snapshot may yet download it; older ones are unused.
+    if version > 2:
+        delete_s3_file(bucket, snapshot_key(version - 2))
+    return {"posts": len(documents), "version": version, "bytes": len(data)}
+
+
+def migrate_bodies(table, bucket: str):
+    """One-off: store plain ``htmlContent`` bodies in the compressed layout (common/body.py)."""
+    params = {
+        "FilterExpression": Attr(LEGACY_ATTRIBUTE).exists(),
+        "ProjectionExpression": "id, #b",
+        "ExpressionAttributeNames": {"#b": LEGACY_ATTRIBUTE},
+    }
+    migrated = 0
+    while True:
+        response = table.scan(**params)
+        for item in response.get("Items", []):
+            attributes = store_body(bucket, item[LEGACY_ATTRIBUTE])
+            names = {f"#a{i}": name for i, name in enumerate(attributes)}
+            values = {f":a{i}": value for i, value in enumerate(attributes.values())}
+            try:
+                table.update_item(
+                    Key={"id": item["id"]},
+                    UpdateExpression=f"SET {', '.join(f'{n} = :{n[1:]}' for n in names)} REMOVE #b",
+                    ConditionExpression="#b = :old",
+                    ExpressionAttributeNames={**names, "#b": LEGACY_ATTRIBUTE},
+                    ExpressionAttributeValues={**values, ":old": item[LEGACY_ATTRIBUTE]},
+                )
+                migrated += 1
+            except ClientError as e:
+                if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                    raise
+        if "LastEvaluatedKey" not in response:
+            return migrated
+        params["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+
+PROCESSORS = {
+    "suggest": update_suggestions,
+    "related": update_related,
+    "feeds": update_feeds,
+    "search": update_search,
+}
+REBUILDERS = {
+    "suggest": rebuild_suggestions,
+    "related": rebuild_related,
+    "bodies": migrate_bodies,
+    "feeds": rebuild_feeds,
+    "search": rebuild_search,
+}
+
+
+def lambda_handler(event, context):
+    BLOGS_TABLE = os.getenv("BLOGS_TABLE")
+    S3_BUCKET = os.getenv("BLOG_IMAGES_BUCKET")
+    if not BLOGS_TABLE or not S3_BUCKET:
+        raise RuntimeError("Environment variables BLOGS_TABLE or BLOG_IMAGES_BUCKET not set.")
+
+    table = dynamodb.Table(BLOGS_TABLE)
+    if event.get("rebuild"):
+        result = {}
+        for name in event["rebuild"]:
+            result[name] = REBUILDERS[name](table, S3_BUCKET)
+            logger.info(f"Rebuilt {name}: {result[name]}")
+        return result
+
+    changes = changes_from_records(event.get("Records", []))
+    logger.info(f"Processing {len(changes)} post changes")
+    for name, processor in PROCESSORS.items():
+        processor(changes, table, S3_BUCKET)
+    return {"processed": len(changes)}
@@ -1,24 +1,76 @@
 """
 Search blogs by title, summary, and content
+
+Queries are answered in-process from the search index snapshot
+(common/search_index.py), which needs no table reads. Until the first
+snapshot is built, or if it cannot be loaded, the handler falls back to
+scanning the table, rate limited per client. The scan matches legacy and
+inline bodies; bodies offloaded to S3 are only searched through the index.
 """
 import os
 import json
 import logging
 import boto3
 from boto3.dynamodb.conditions import Key, Attr
-from common.s3 import get_s3_file_url
+from common.body import INLINE_ATTRIBUTE, POINTER_ATTRIBUTE, load_body
+from common.media import media_url
 from common.utils import build_response
 from common.constants import StatusCodes, Headers
+from common.ratelimit import SEARCH, RateLimiter, client_id, consumed_units
+from common.search_index import SearchSnapshots
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
 dynamodb = boto3.resource("dynamodb")
 
+MAX_LIMIT = 50
+
+limiter = RateLimiter(SEARCH)
+snapshots = SearchSnapshots()
+
+
+def format_blog(blog, bucket):
+    image_path = blog.get("image")
+    return {
+        "id": blog.get("id"),
+        "title": blog.get("title"),
+        "summary": blog.get("contentSummary", blog.get("content", "")),
+        "image": media_url(bucket, image_path) if image_path else "",
+        "textContent": "",
+        "startDate": blog.get("startDate"),
+        "endDate": blog.get("endDate"),
+        "category": blog.get("category"),
+        "publishedAt": blog.get("publishedAt"),
+        "status": blog.get("status", "published"),
+    }
+
+
+def found(query, blogs, bucket):
+    if not blogs:
+        return build_response(
+            StatusCodes.OK,
+            Headers.DEFAULT,
+            {"blogs": [], "message": f"No blogs found matching '{query}'."},
+        )
+    formatted_blogs = [format_blog(blog, bucket) for blog in blogs]
+    return build_response(
+        StatusCodes.OK,
+        Headers.DEFAULT,
+        {
+            "blogs": formatted_blogs,
+            "count": len(formatted_blogs),
+            "query": query,
+            "message": f"Found {len(formatted_blogs)} blogs matching '{query}'."
+        },
+    )
+
+
 def lambda_handler(event, context):
     try:
         BLOGS_TABLE = os.getenv("BLOGS_TABLE")
         S3_BUCKET = os.getenv("BLOG_IMAGES_BUCKET")
+        COUNTERS_TABLE = os.getenv("COUNTERS_TABLE")
 
         if not BLOGS_TABLE or not S3_BUCKET:
             return build_response(
@@ -31,7 +83,10 @@ def lambda_handler(event, context):
 
         params = event.get("queryStringParameters") or {}
         query = params.get("q", "").strip()
-        limit = int(params.get("limit", 20))
+        try:
+            limit = max(1, min(int(params.get("limit", 20)), MAX_LIMIT))
+        except ValueError:
+            limit = 20
 
         if not query:
             return build_response(
@@ -47,6 +102,15 @@ def lambda_handler(event, context):
                 {"message": "Search query must be at least 2 characters long."},
             )
 
+        try:
+            index = snapshots.view(S3_BUCKET)
+        except Exception as e:
+            logger.error(f"Search index unavailable, scanning instead: {e}", exc_info=True)
+            index = None
+        if index is not None:
+            # Cards carry no body; result lists only show the summary.
+            return found(query, index.search(query, limit), S3_BUCKET)
+
         table = dynamodb.Table(BLOGS_TABLE)
         
         # Convert query to lowercase for case-insensitive search
@@ -67,16 +131,19 @@ def lambda_handler(event, context):
             "#title": "title",
             "#summary": "contentSummary", 
             "#content": "htmlContent",
+            "#inline": INLINE_ATTRIBUTE,
             "#status": "status"
         }
         
         # Create filter expression for case-insensitive search
         # DynamoDB doesn't have a native lower() function, so we'll use contains() directly
-        # and handle case-insensitivity in the application logic
+        # and handle case-insensitivity in the application logic.
+        # Compressed inline bodies cannot be matched here; they are decoded below.
         filter_expression = (
             "(contains(#title, :search_term) OR "
             "contains(#summary, :search_term) OR "
-            "contains(#content, :search_term)) AND "
+            "contains(#content, :search_term) OR "
+            "attribute_exists(#inline)) AND "
             "#status = :status"
         )
         
@@ -84,12 +151,23 @@ def lambda_handler(event, context):
             "FilterExpression": filter_expression,
             "ExpressionAttributeNames": expression_attribute_names,
             "ExpressionAttributeValues": expression_attribute_values,
-            "Limit": limit * 2  # Get more items to account for filtering
+            "Limit": limit * 2,  # Get more items to account for filtering
+            "ReturnConsumedCapacity": "TOTAL",
         }
         
         logger.info(f"Scan params: {scan_params}")
-        
+
+        counters = dynamodb.Table(COUNTERS_TABLE) if COUNTERS_TABLE else None
+        quota = limiter.admit(counters, client_id(event))
+        if not quota.allowed:
+            return build_response(
+                StatusCodes.TOO_MANY_REQUESTS,
+                {**Headers.TOO_MANY_REQUESTS, "Retry-After": str(max(1, int(quota.retry_after)))},
+                {"message": "Too many searches, please retry shortly."},
+            )
+
         response = table.scan(**scan_params)
+        limiter.settle(counters, quota, consumed_units(response))
         all_blogs = response.get("Items", [])
         
         # Since DynamoDB doesn't support case-insensitive search natively,
@@ -98,7 +176,8 @@ def lambda_handler(event, context):
         for blog in all_blogs:
             title = (blog.get("title") or "").lower()
             summary = (blog.get("contentSummary") or "").lower()
-            content = (blog.get("htmlContent") or "").lower()
+            # Offloaded bodies would cost an S3 read per item; the index covers them.
+            content = "" if blog.get(POINTER_ATTRIBUTE) else (load_body(S3_BUCKET, blog) or "").lower()
             
             if (search_term in title or 
                 search_term in summary or 
@@ -107,13 +186,6 @@ def lambda_handler(event, context):
         
         logger.info(f"Found {len(blogs)} blogs matching search term after filtering")
 
-        if not blogs:
-            return build_response(
-                StatusCodes.OK,
-                Headers.DEFAULT,
-                {"blogs": [], "message": f"No blogs found matching '{query}'."},
-            )
-
         # Sort results by relevance (title matches first, then by date)
         def calculate_relevance(blog):
             title = blog.get("title", "").lower()
@@ -143,39 +215,7 @@ def lambda_handler(event, context):
         # Limit results after sorting
         blogs = blogs[:limit]
 
-        formatted_blogs = []
-        for blog in blogs:
-            image_path = blog.get("image")
-            if image_path:
-                image = get_s3_file_url(S3_BUCKET, image_path)
-            else:
-                image = ""
-
-            formatted_blog = {
-                "id": blog.get("id"),
-                "title": blog.get("title"),
-                "summary": blog.get("contentSummary", blog.get("content", "")),
-                "image": image,
-                "htmlContent": blog.get("htmlContent", blog.get("content", "")),
-                "textContent": "",
-                "startDate": blog.get("startDate"),
-                "endDate": blog.get("endDate"),
-                "category": blog.get("category"),
-                "publishedAt": blog.get("publishedAt"),
-                "status": blog.get("status")
-            }
-            formatted_blogs.append(formatted_blog)
-
-        return build_response(
-            StatusCodes.OK,
-            Headers.DEFAULT,
-            {
-                "blogs": formatted_blogs,
-                "count": len(formatted_blogs),
-                "query": query,
-                "message": f"Found {len(formatted_blogs)} blogs matching '{query}'."
-            },
-        )
+        return found(query, blogs, S3_BUCKET)
 
     except Exception as e:
         logger.error(f"Error searching blogs: {str(e)}", exc_info=True)
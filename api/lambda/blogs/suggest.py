@@ -0,0 +1,58 @@
+"""
+Type-ahead suggestions for blog search, served from the in-memory prefix index
+"""
+import os
+import logging
+from common.utils import build_response
+from common.constants import StatusCodes, Headers
+from common.index_store import IndexHolder
+from common.suggest import INDEX_KEY, MAX_SUGGESTIONS, SuggestIndex
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+# Loaded on the first request and kept for the life of the container.
+suggest_index = IndexHolder(SuggestIndex, INDEX_KEY)
+
+
+def lambda_handler(event, context):
+    try:
+        S3_BUCKET = os.getenv("BLOG_IMAGES_BUCKET")
+
+        if not S3_BUCKET:
+            return build_response(
+                StatusCodes.INTERNAL_SERVER_ERROR,
+                Headers.INTERNAL_SERVER_ERROR,
+                {"message": "Environment variable BLOG_IMAGES_BUCKET not set."},
+            )
+
+        params = event.get("queryStringParameters") or {}
+        query = params.get("q", "")
+        try:
+            limit = max(1, min(int(params.get("limit", 8)), MAX_SUGGESTIONS))
+        except ValueError:
+            limit = 8
+
+        if not query.strip():
+            return build_response(
+                StatusCodes.BAD_REQUEST,
+                Headers.BAD_REQUEST,
+                {"message": "Missing 'q' query parameter for suggestions."},
+            )
+
+        index = suggest_index.get(S3_BUCKET)
+        suggestions = index.suggest(query, limit) if index else []
+
+        return build_response(
+            StatusCodes.OK,
+            {**Headers.DEFAULT, "Cache-Control": "public, max-age=60"},
+            {"suggestions": suggestions, "query": query},
+        )
+
+    except Exception as e:
+        logger.error(f"Error fetching suggestions: {str(e)}", exc_info=True)
+        return build_response(
+            StatusCodes.INTERNAL_SERVER_ERROR,
+            Headers.INTERNAL_SERVER_ERROR,
+            {"message": "An error occurred while fetching suggestions."},
+        )
@@ -0,0 +1,214 @@
+"""
+Partially update a blog post.
+
+Only the attributes present in the request are written, in one UpdateItem
+guarded by the post's version number so concurrent edits cannot silently
+overwrite each other. The request must carry the version it was based on;
+a stale version gets 409 with the current one. A body large enough to live
+in S3 is uploaded only once the edit has been accepted.
+"""
+import os
+import json
+import logging
+from datetime import datetime, timedelta
+import boto3
+from botocore.exceptions import ClientError
+from common.body import BODY_ATTRIBUTES, encode_body, upload_body
+from common.utils import build_response
+from common.constants import StatusCodes, Headers
+from common.invalidation import publish_invalidation
+from common.media import is_stored_media
+from common.windows import WINDOW_ATTRIBUTE, window_for
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+dynamodb = boto3.resource("dynamodb")
+
+EDITABLE = {"title", "htmlContent", "contentSummary", "startDate", "endDate", "category", "status", "image"}
+REQUIRED = {"title", "htmlContent", "image"}
+WINDOW_INPUTS = ("startDate", "endDate", "status")
+
+
+def _ttl_for(end_date):
+    """Same rule as create.py: a week after endDate, or no TTL."""
+    if not end_date:
+        return None
+    try:
+        return int((datetime.fromisoformat(end_date) + timedelta(days=7)).timestamp())
+    except ValueError as e:
+        logger.warning(f"Invalid endDate format: {end_date} ({e})")
+        return None
+
+
+def build_changes(payload: dict) -> tuple:
+    """
+    Attribute name -> new value (None removes it) for the fields in
+    ``payload``, and the compressed body still to upload (see common/body.py).
+    """
+    changes, pending_body = {}, None
+    for field in EDITABLE & payload.keys():
+        value = payload[field]
+        if field == "htmlContent":
+            stored, pending_body = encode_body(value)
+            changes.update({attr: stored.get(attr) for attr in BODY_ATTRIBUTES})
+        elif field == "category":
+            changes["category"] = value or "general"
+        else:
+            changes[field] = value if value != "" else None
+    if "endDate" in payload:
+        changes["ttl"] = _ttl_for(payload["endDate"])
+    return changes, pending_body
+
+
+def build_update(changes: dict, version: int, now: str) -> dict:
+    """UpdateItem parameters that touch only ``changes`` and bump the version."""
+    names = {"#version": "version", "#updatedAt": "updatedAt"}
+    values = {":expected": version, ":next": version + 1, ":now": now}
+    sets, removes = ["#version = :next", "#updatedAt = :now"], []
+    for i, (attr, value) in enumerate(sorted(changes.items())):
+        names[f"#a{i}"] = attr
+        if value is None:
+            removes.append(f"#a{i}")
+        else:
+            sets.append(f"#a{i} = :a{i}")
+            values[f":a{i}"] = value
+    expression = "SET " + ", ".join(sets)
+    if removes:
+        expression += " REMOVE " + ", ".join(removes)
+    # Posts written before versioning count as version 0.
+    condition = "attribute_exists(id) AND "
+    condition += "attribute_not_exists(#version)" if version == 0 else "#version = :expected"
+    if version == 0:
+        del values[":expected"]
+    return {
+        "UpdateExpression": expression,
+        "ConditionExpression": condition,
+        "ExpressionAttributeNames": names,
+        "ExpressionAttributeValues": values,
+    }
+
+
+def lambda_handler(event, context):
+    try:
+        BLOGS_TABLE = os.getenv("BLOGS_TABLE")
+        S3_BUCKET = os.getenv("BLOG_IMAGES_BUCKET")
+
+        if not BLOGS_TABLE or not S3_BUCKET:
+            return build_response(
+                StatusCodes.INTERNAL_SERVER_ERROR,
+                Headers.INTERNAL_SERVER_ERROR,
+                {"message": "Environment variables BLOGS_TABLE or BLOG_IMAGES_BUCKET not set."},
+            )
+
+        payload = json.loads(event.get("body") or "{}")
+        blog_id = payload.get("id")
+        version = payload.get("version")
+        if not blog_id or not isinstance(version, int) or isinstance(version, bool) or version < 0:
+            return build_response(
+                StatusCodes.BAD_REQUEST,
+                Headers.BAD_REQUEST,
+                {"message": "'id' and the integer 'version' being edited are required."},
+            )
+
+        unknown = payload.keys() - EDITABLE - {"id", "version"}
+        if unknown:
+            return build_response(
+                StatusCodes.BAD_REQUEST,
+                Headers.BAD_REQUEST,
+                {"message": f"Fields cannot be updated: {', '.join(sorted(unknown))}."},
+            )
+        if not EDITABLE & payload.keys():
+            return build_response(
+                StatusCodes.BAD_REQUEST,
+                Headers.BAD_REQUEST,
+                {"message": "No fields to update."},
+            )
+        # status and category key GSIs, which reject anything but strings.
+        not_strings = [f for f in EDITABLE & payload.keys() if not isinstance(payload[f], str)]
+        if not_strings:
+            return build_response(
+                StatusCodes.BAD_REQUEST,
+                Headers.BAD_REQUEST,
+                {"message": f"Fields must be strings: {', '.join(sorted(not_strings))}."},
+            )
+        empty = [f for f in REQUIRED & payload.keys() if not payload[f]]
+        if empty:
+            return build_response(
+                StatusCodes.BAD_REQUEST,
+                Headers.BAD_REQUEST,
+                {"message": f"Fields cannot be empty: {', '.join(sorted(empty))}."},
+            )
+
+        if "image" in payload and not is_stored_media(S3_BUCKET, payload["image"]):
+            return build_response(
+                StatusCodes.BAD_REQUEST,
+                Headers.BAD_REQUEST,
+                {"message": "'image' must be a key returned by /upload-to-s3."},
+            )
+
+        table = dynamodb.Table(BLOGS_TABLE)
+        changes, pending_body = build_changes(payload)
+
+        if any(f in payload for f in WINDOW_INPUTS):
+            # The window depends on all three; read the ones not being edited.
+            current = table.get_item(
+                Key={"id": blog_id},
+                ProjectionExpression="startDate, endDate, #s",
+                ExpressionAttributeNames={"#s": "status"},
+                ConsistentRead=True,
+            ).get("Item")
+            if current is None:
+                return build_response(StatusCodes.NOT_FOUND, Headers.NOT_FOUND, {"message": "Blog not found."})
+            merged = {f: payload[f] if f in payload else current.get(f) for f in WINDOW_INPUTS}
+            changes[WINDOW_ATTRIBUTE] = window_for(merged["startDate"], merged["endDate"], merged["status"] or "published")
+
+        now = datetime.utcnow().isoformat()
+        try:
+            response = table.update_item(
+                Key={"id": blog_id},
+                ReturnValues="ALL_OLD",
+                ReturnValuesOnConditionCheckFailure="ALL_OLD",
+                **build_update(changes, version, now),
+            )
+        except ClientError as e:
+            if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                raise
+            old = e.response.get("Item")
+            if not old:
+                return build_response(StatusCodes.NOT_FOUND, Headers.NOT_FOUND, {"message": "Blog not found."})
+            current_version = int(old.get("version", {}).get("N", 0))
+            return build_response(
+                StatusCodes.CONFLICT,
+                Headers.CONFLICT,
+                {"message": "Blog was changed by someone else.", "id": blog_id, "version": current_version},
+            )
+
+        # After the condition passed, so rejected edits leave nothing in S3.
+        upload_body(S3_BUCKET, changes, pending_body)
+
+        old = response.get("Attributes", {})
+        changed = [attr for attr, value in changes.items() if old.get(attr) != value]
+        categories = [old.get("category"), changes.get("category", old.get("category"))]
+        publish_invalidation(blog_id, version + 1, changed, categories)
+
+        return build_response(
+            StatusCodes.OK,
+            Headers.DEFAULT,
+            {"message": "Blog updated successfully.", "id": blog_id, "version": version + 1, "updatedAt": now,
+             "status": "success"}
+        )
+
+    except json.JSONDecodeError:
+        return build_response(
+            StatusCodes.BAD_REQUEST,
+            Headers.BAD_REQUEST,
+            {"message": "Request body must be JSON."},
+        )
+    except Exception as e:
+        logger.error(f"Error: {e}", exc_info=True)
+        return build_response(
+            StatusCodes.INTERNAL_SERVER_ERROR,
+            Headers.INTERNAL_SERVER_ERROR,
+            {"message": "Failed to update blog."},
+        )
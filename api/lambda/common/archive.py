@@ -0,0 +1,128 @@
+"""
+Archive of expired posts in the media bucket.
+
+Posts are written as gzipped JSON Lines, one object per archive run and
+partition, under ``archive/posts/month=YYYY-MM/category=<category>/``
+with the month taken from endDate. Each line is the whole post with its
+body decoded, so the archive does not depend on the table or on body
+objects. Once a partition holds ``COMPACT_MIN_FILES`` files the archive
+job merges them into one under a new key, so a read lists and fetches a
+handful of objects however many runs have archived into it.
+"""
+
+import gzip
+import json
+import re
+from collections import OrderedDict
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional
+
+from common.body import BODY_ATTRIBUTES, LEGACY_ATTRIBUTE
+from common.s3 import delete_s3_file, get_s3_bytes_if_changed, list_s3_files, put_s3_bytes
+
+ARCHIVE_PREFIX = "archive/posts/"
+MONTH_PATTERN = re.compile(r"^\d{4}-\d{2}$")
+FILE_PATTERN = re.compile(r"^month=([^/]+)/category=([^/]+)/[^/]+\.jsonl\.gz$")
+# Derived or live-table-only attributes that are not worth archiving.
+DROPPED_ATTRIBUTES = {"related", "openWindow", "ttl", *BODY_ATTRIBUTES} - {LEGACY_ATTRIBUTE}
+CACHED_FILES = 64
+COMPACT_MIN_FILES = 4
+
+
+def _json_default(value):
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    raise TypeError(f"Cannot archive {type(value).__name__}")
+
+
+def partition_of(post: dict) -> tuple:
+    """(month, category) a post is archived under."""
+    end_date = str(post.get("endDate") or post.get("publishedAt") or "")
+    month = end_date[:7] if MONTH_PATTERN.match(end_date[:7]) else "unknown"
+    return month, post.get("category") or "general"
+
+
+def partition_prefix(month: str, category: Optional[str] = None) -> str:
+    prefix = f"{ARCHIVE_PREFIX}month={month}/"
+    return f"{prefix}category={category}/" if category else prefix
+
+
+def archive_record(post: dict) -> dict:
+    """The archived form of a post whose body has been decoded (common.body.with_body)."""
+    return {k: v for k, v in post.items() if k not in DROPPED_ATTRIBUTES}
+
+
+def write_partition(bucket: str, month: str, category: str, run_id: str, records: List[dict]) -> Optional[str]:
+    """Write one partition file; returns its key, or None if the upload failed."""
+    key = f"{partition_prefix(month, category)}{run_id}.jsonl.gz"
+    lines = "".join(json.dumps(r, default=_json_default, separators=(",", ":")) + "\n" for r in records)
+    if not put_s3_bytes(bucket, key, gzip.compress(lines.encode("utf-8")), "application/gzip"):
+        return None
+    return key
+
+
+_files: "OrderedDict[str, List[dict]]" = OrderedDict()
+
+
+def read_file(bucket: str, key: str) -> List[dict]:
+    """Records of one archive file; recently read files are kept in memory."""
+    if key in _files:
+        _files.move_to_end(key)
+        return _files[key]
+    data, _ = get_s3_bytes_if_changed(bucket, key)
+    records = [json.loads(line) for line in gzip.decompress(data).splitlines() if line] if data else []
+    _files[key] = records
+    if len(_files) > CACHED_FILES:
+        _files.popitem(last=False)
+    return records
+
+
+def read_partition(bucket: str, month: str, category: Optional[str] = None) -> Iterable[dict]:
+    # A listing taken mid-compaction can hold both the merged file and its sources.
+    seen = set()
+    for key in sorted(list_s3_files(bucket, partition_prefix(month, category))):
+        if key.endswith(".jsonl.gz"):
+            for record in read_file(bucket, key):
+                if record.get("id") not in seen:
+                    seen.add(record.get("id"))
+                    yield record
+
+
+def partition_files(bucket: str) -> Dict[tuple, List[str]]:
+    """Archive file keys by (month, category)."""
+    partitions: Dict[tuple, List[str]] = {}
+    for key in list_s3_files(bucket, ARCHIVE_PREFIX):
+        match = FILE_PATTERN.match(key[len(ARCHIVE_PREFIX):])
+        if match:
+            partitions.setdefault(match.groups(), []).append(key)
+    return partitions
+
+
+def compact_partition(bucket: str, month: str, category: str, keys: List[str], run_id: str) -> Optional[str]:
+    """
+    Merge ``keys`` into one file, then delete them. Returns the merged key,
+    or None (leaving every file in place) if a file could not be read or
+    the merged one written.
+    """
+    records: "OrderedDict[str, dict]" = OrderedDict()
+    for key in sorted(keys):
+        # strict: a failed read must not be mistaken for an empty file.
+        data, _ = get_s3_bytes_if_changed(bucket, key, strict=True)
+        for line in gzip.decompress(data).splitlines() if data else []:
+            if line:
+                record = json.loads(line)
+                records[record.get("id")] = record
+    merged = write_partition(bucket, month, category, run_id, list(records.values()))
+    if not merged:
+        return None
+    for key in keys:
+        if key != merged:
+            delete_s3_file(bucket, key)
+    return merged
+
+
+def group_by_partition(posts: Iterable[dict]) -> Dict[tuple, List[dict]]:
+    partitions: Dict[tuple, List[dict]] = {}
+    for post in posts:
+        partitions.setdefault(partition_of(post), []).append(archive_record(post))
+    return partitions
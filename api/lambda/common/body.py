@@ -0,0 +1,105 @@
+"""
+Storage for blog bodies outside the metadata attributes.
+
+Bodies are gzip-compressed. A compressed body up to ``INLINE_LIMIT`` bytes
+is kept on the item as binary ``htmlCompressed``; anything larger goes to
+the media bucket under a content-hash key and the item keeps only the
+``htmlObjectKey`` pointer, so reads, queries and scans of post metadata
+cost the same however long the post is. Items written before this layout
+still carry a plain ``htmlContent`` string, which is read as-is.
+"""
+
+import gzip
+import hashlib
+import logging
+from typing import Optional, Tuple
+
+from boto3.dynamodb.types import Binary
+
+from common.s3 import get_s3_bytes_if_changed, put_s3_bytes, s3_file_exists
+
+logger = logging.getLogger(__name__)
+
+LEGACY_ATTRIBUTE = "htmlContent"
+INLINE_ATTRIBUTE = "htmlCompressed"
+POINTER_ATTRIBUTE = "htmlObjectKey"
+BODY_ATTRIBUTES = (LEGACY_ATTRIBUTE, INLINE_ATTRIBUTE, POINTER_ATTRIBUTE)
+BODY_PREFIX = "bodies/"
+# Compressed bodies above this size move to S3; keeps items within one 4 KB read unit.
+INLINE_LIMIT = 2048
+
+
+class BodyUnavailableError(Exception):
+    """The body pointer could not be resolved."""
+
+
+def compress(html: str) -> bytes:
+    # mtime=0 keeps the output, and so the content hash, deterministic.
+    return gzip.compress(html.encode("utf-8"), compresslevel=6, mtime=0)
+
+
+def body_key(compressed: bytes) -> str:
+    return f"{BODY_PREFIX}{hashlib.sha256(compressed).hexdigest()}.html.gz"
+
+
+def encode_body(html: str) -> Tuple[dict, Optional[bytes]]:
+    """
+    The item attributes that reference ``html``, and the compressed bytes
+    ``upload_body`` must store before they can be read when the body is too
+    large to inline (None otherwise).
+    """
+    compressed = compress(html or "")
+    if len(compressed) <= INLINE_LIMIT:
+        return {INLINE_ATTRIBUTE: Binary(compressed)}, None
+    return {POINTER_ATTRIBUTE: body_key(compressed)}, compressed
+
+
+def upload_body(bucket: str, attributes: dict, compressed: Optional[bytes]):
+    """Store the object ``attributes`` points at, unless it is inline or already there."""
+    if compressed is None:
+        return
+    key = attributes[POINTER_ATTRIBUTE]
+    if not s3_file_exists(bucket, key):
+        if not put_s3_bytes(bucket, key, compressed, "application/gzip") and not s3_file_exists(bucket, key):
+            raise BodyUnavailableError(f"Could not store body {key}")
+
+
+def store_body(bucket: str, html: str) -> dict:
+    """
+    Compress ``html`` and return the item attributes that reference it,
+    uploading it first when it is too large to inline. Identical bodies
+    share one object, so re-saving an unchanged post uploads nothing.
+    """
+    attributes, compressed = encode_body(html)
+    upload_body(bucket, attributes, compressed)
+    return attributes
+
+
+def has_body(item: dict) -> bool:
+    return any(attr in item for attr in BODY_ATTRIBUTES)
+
+
+def _bytes(value) -> bytes:
+    return value.value if isinstance(value, Binary) else bytes(value)
+
+
+def load_body(bucket: str, item: dict) -> str:
+    """The HTML body of ``item`` in whichever layout it was stored."""
+    if item.get(LEGACY_ATTRIBUTE) is not None:
+        return item[LEGACY_ATTRIBUTE]
+    if item.get(INLINE_ATTRIBUTE) is not None:
+        return gzip.decompress(_bytes(item[INLINE_ATTRIBUTE])).decode("utf-8")
+    key = item.get(POINTER_ATTRIBUTE)
+    if not key:
+        return item.get("content", "")
+    data, _ = get_s3_bytes_if_changed(bucket, key)
+    if data is None:
+        raise BodyUnavailableError(f"Body object {key} is missing")
+    return gzip.decompress(data).decode("utf-8")
+
+
+def with_body(bucket: str, item: Optional[dict]) -> Optional[dict]:
+    """Copy of ``item`` with the body decoded into ``htmlContent``."""
+    if not item or not has_body(item):
+        return item
+    return {**item, LEGACY_ATTRIBUTE: load_body(bucket, item)}
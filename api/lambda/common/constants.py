@@ -3,10 +3,13 @@ class StatusCodes:
     CREATED = 201
     BAD_REQUEST = 400
     NOT_FOUND = 404
+    CONFLICT = 409
     INTERNAL_SERVER_ERROR = 500
     UNAUTHORIZED = 401
     FORBIDDEN = 403
     METHOD_NOT_ALLOWED = 405
+    TOO_MANY_REQUESTS = 429
+    SERVICE_UNAVAILABLE = 503
 
 
 class Headers:
@@ -28,4 +31,31 @@ class Headers:
         "Content-Type": "application/json",
         "Access-Control-Allow-Origin": "*",
         "Access-Control-Allow-Methods": "GET, POST, OPTIONS"
+    }
+    FORBIDDEN = {
+        "Content-Type": "application/json",
+        "Access-Control-Allow-Origin": "*",
+        "Access-Control-Allow-Methods": "GET, POST, OPTIONS"
+    }
+    NOT_FOUND = {
+        "Content-Type": "application/json",
+        "Access-Control-Allow-Origin": "*",
+        "Access-Control-Allow-Methods": "GET, POST, OPTIONS"
+    }
+    CONFLICT = {
+        "Content-Type": "application/json",
+        "Access-Control-Allow-Origin": "*",
+        "Access-Control-Allow-Methods": "GET, POST, OPTIONS"
+    }
+    SERVICE_UNAVAILABLE = {
+        "Content-Type": "application/json",
+        "Access-Control-Allow-Origin": "*",
+        "Access-Control-Allow-Methods": "GET, POST, OPTIONS",
+        "Access-Control-Expose-Headers": "Retry-After"
+    }
+    TOO_MANY_REQUESTS = {
+        "Content-Type": "application/json",
+        "Access-Control-Allow-Origin": "*",
+        "Access-Control-Allow-Methods": "GET, POST, OPTIONS",
+        "Access-Control-Expose-Headers": "Retry-After"
     }
\ No newline at end of file
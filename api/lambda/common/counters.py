@@ -0,0 +1,158 @@
+"""
+Buffered, sharded view counters.
+
+Each warm container adds views up in memory and flushes them at most every
+``FLUSH_SECONDS`` as one ADD per viewed post, so write units follow the
+number of distinct posts viewed rather than the number of views. A request
+flushes at most ``FLUSH_BATCH`` posts; the rest stay due for the next one.
+Counts go to one item per post in a per-day partition of the counters
+table, spread over ``SHARDS`` partitions per day (one per container) so a
+popular post never concentrates writes on one key. Day items expire after
+the popularity window; compact_views.py queries the window's partitions
+and rolls them up into per-category top lists, without reading the rate
+limit buckets that share the table.
+"""
+
+import logging
+import random
+import threading
+import time
+from collections import Counter
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, Optional
+
+from boto3.dynamodb.conditions import Key
+from botocore.exceptions import ClientError
+
+logger = logging.getLogger(__name__)
+
+VIEWS_PREFIX = "views#"
+POPULAR_KEY = "popular"
+ALL_CATEGORIES = "all"
+SHARDS = 8
+FLUSH_SECONDS = 30.0
+# Flush early if a container has seen this many distinct posts.
+MAX_PENDING = 200
+# Most writes one request spends on flushing.
+FLUSH_BATCH = 10
+WINDOW_DAYS = 7
+TOP_N = 20
+
+
+def views_partition(day: date, shard: int) -> str:
+    return f"{VIEWS_PREFIX}{day.isoformat()}#{shard}"
+
+
+def _expires_at(day: date) -> int:
+    # Kept one day past the window so a late compaction still sees it.
+    return int(datetime.combine(day + timedelta(days=WINDOW_DAYS + 1), datetime.min.time()).timestamp())
+
+
+class ViewBuffer:
+    def __init__(self, flush_seconds: float = FLUSH_SECONDS, shard: Optional[int] = None):
+        self.flush_seconds = flush_seconds
+        self.shard = random.randrange(SHARDS) if shard is None else shard
+        self.pending: Counter = Counter()
+        self.categories: Dict[str, str] = {}
+        self.flushed_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def record(self, post_id: str, category: Optional[str] = None, views: int = 1):
+        with self._lock:
+            self.pending[post_id] += views
+            if category:
+                self.categories[post_id] = category
+
+    def due(self) -> bool:
+        return bool(self.pending) and (
+            time.monotonic() - self.flushed_at >= self.flush_seconds or len(self.pending) >= MAX_PENDING
+        )
+
+    def flush(self, table, day: date = None, limit: Optional[int] = None) -> int:
+        """
+        Write pending counts, or only the ``limit`` most viewed posts, leaving
+        the buffer due; counts that fail to write are kept for the next flush.
+        """
+        with self._lock:
+            if limit is None or len(self.pending) <= limit:
+                pending, categories = self.pending, self.categories
+                self.pending, self.categories = Counter(), {}
+                self.flushed_at = time.monotonic()
+            else:
+                pending = Counter(dict(self.pending.most_common(limit)))
+                categories = {p: self.categories.pop(p) for p in pending if p in self.categories}
+                for post_id in pending:
+                    del self.pending[post_id]
+        day = day or datetime.utcnow().date()
+        written = 0
+        for post_id, views in pending.items():
+            names = {"#c": "count", "#e": "expiresAt"}
+            values = {":n": views, ":e": _expires_at(day)}
+            expression = "ADD #c :n SET #e = :e"
+            if post_id in categories:
+                names["#g"] = "category"
+                values[":g"] = categories[post_id]
+                expression += ", #g = :g"
+            try:
+                table.update_item(
+                    Key={"pk": views_partition(day, self.shard), "sk": post_id},
+                    UpdateExpression=expression,
+                    ExpressionAttributeNames=names,
+                    ExpressionAttributeValues=values,
+                )
+                written += 1
+            except ClientError as e:
+                logger.warning(f"Could not flush {views} views for {post_id}: {e}")
+                self.record(post_id, categories.get(post_id), views)
+        return written
+
+    def maybe_flush(self, table, limit: int = FLUSH_BATCH) -> int:
+        return self.flush(table, limit=limit) if self.due() else 0
+
+
+def recent_views(table, days: int = WINDOW_DAYS, today: date = None) -> Dict[str, dict]:
+    """post id -> {"views", "category"} summed over the shards of the last ``days`` days."""
+    today = today or datetime.utcnow().date()
+    totals: Dict[str, dict] = {}
+    for offset in range(days):
+        for shard in range(SHARDS):
+            params = {"KeyConditionExpression": Key("pk").eq(views_partition(today - timedelta(days=offset), shard))}
+            while True:
+                response = table.query(**params)
+                for item in response.get("Items", []):
+                    post = totals.setdefault(item["sk"], {"views": 0, "category": None})
+                    post["views"] += int(item.get("count", 0))
+                    post["category"] = item.get("category") or post["category"]
+                if "LastEvaluatedKey" not in response:
+                    break
+                params["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+    return totals
+
+
+def top_by_category(totals: Dict[str, dict], n: int = TOP_N) -> Dict[str, list]:
+    """category (and ``all``) -> [(post_id, views)] most viewed first."""
+    groups: Dict[str, list] = {ALL_CATEGORIES: []}
+    for post_id, post in totals.items():
+        entry = (post_id, post["views"])
+        groups[ALL_CATEGORIES].append(entry)
+        if post["category"]:
+            groups.setdefault(post["category"], []).append(entry)
+    return {
+        category: sorted(entries, key=lambda e: (-e[1], e[0]))[:n]
+        for category, entries in groups.items()
+    }
+
+
+def popular_key(category: Optional[str]) -> dict:
+    return {"pk": POPULAR_KEY, "sk": category or ALL_CATEGORIES}
+
+
+def chunks(items: Iterable, size: int):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
@@ -0,0 +1,297 @@
+"""
+Sitemaps and per-category RSS/Atom feeds kept as static objects in the
+public feeds bucket, so crawlers and feed readers never reach the API.
+
+Posts are spread over ``SITEMAP_SHARDS`` sitemap files by a hash of their
+id, and ``sitemap.xml`` indexes the shards. Each category has an Atom feed
+(and an RSS copy) of its latest ``FEED_SIZE`` posts, and ``all`` covers
+every category. Stream batches patch only the shards and feeds their posts
+belong to. Each object is parsed back from its own XML and written with a
+conditional put (common/index_store.py), so no separate state is stored.
+"""
+
+import os
+import re
+import zlib
+from datetime import datetime
+from email.utils import format_datetime
+from typing import Dict, List, Optional
+from xml.etree import ElementTree as ET
+
+SITEMAP_KEY = "sitemap.xml"
+SITEMAP_PREFIX = "sitemaps/"
+SITEMAP_SHARDS = 16
+FEED_PREFIX = "feeds/"
+FEED_SIZE = 50
+ALL_FEED = "all"
+FEED_TITLE = "Jalad e-Seva"
+CACHE_CONTROL = "public, max-age=900"
+FEED_FIELDS = ["id", "title", "contentSummary", "category", "status", "publishedAt", "updatedAt"]
+
+SITEMAP_NS = "http://www.sitemaps.org/schemas/sitemap/0.9"
+ATOM_NS = "http://www.w3.org/2005/Atom"
+
+
+def site_url() -> str:
+    return os.getenv("SITE_URL", "").rstrip("/")
+
+
+def feeds_url() -> str:
+    return os.getenv("FEEDS_URL", "").rstrip("/")
+
+
+def post_url(post_id: str) -> str:
+    return f"{site_url()}/blog/{post_id}"
+
+
+def shard_of(post_id: str) -> int:
+    return zlib.crc32(post_id.encode("utf-8")) % SITEMAP_SHARDS
+
+
+def shard_key(shard: int) -> str:
+    return f"{SITEMAP_PREFIX}sitemap-{shard:02d}.xml"
+
+
+def slug(category: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", category.lower()).strip("-") or "uncategorized"
+
+
+def feed_key(category: Optional[str], extension: str = "atom") -> str:
+    return f"{FEED_PREFIX}{slug(category) if category else ALL_FEED}.{extension}"
+
+
+def listed(post: Optional[dict]) -> bool:
+    return bool(post) and post.get("status") == "published"
+
+
+def _w3c(timestamp: Optional[str]) -> str:
+    """Stored timestamps are naive UTC ISO strings; crawlers want an explicit zone."""
+    if not timestamp:
+        return "1970-01-01T00:00:00Z"
+    return timestamp[:19] + "Z" if len(timestamp) > 10 else timestamp
+
+
+def _rfc822(timestamp: Optional[str]) -> str:
+    moment = datetime.fromisoformat(_w3c(timestamp).replace("Z", "+00:00"))
+    return format_datetime(moment, usegmt=True)
+
+
+def _xml(root: ET.Element) -> bytes:
+    ET.indent(root)
+    return ET.tostring(root, encoding="utf-8", xml_declaration=True)
+
+
+def _text(element: ET.Element, path: str, ns: str = "") -> str:
+    found = element.find(f"{{{ns}}}{path}" if ns else path)
+    return found.text or "" if found is not None else ""
+
+
+class Sitemap:
+    """One sitemap shard: post id -> lastmod."""
+
+    CONTENT_TYPE = "application/xml"
+    CACHE_CONTROL = CACHE_CONTROL
+
+    def __init__(self, urls: Dict[str, str] = None):
+        self.urls = dict(urls or {})
+
+    def __len__(self):
+        return len(self.urls)
+
+    def lastmod(self) -> Optional[str]:
+        return max(self.urls.values(), default=None)
+
+    def apply(self, changes) -> bool:
+        before = dict(self.urls)
+        for old, new in changes:
+            post_id = (new or old)["id"]
+            if listed(new):
+                self.urls[post_id] = _w3c(new.get("updatedAt") or new.get("publishedAt"))
+            else:
+                self.urls.pop(post_id, None)
+        return self.urls != before
+
+    def to_bytes(self) -> bytes:
+        root = ET.Element("urlset", xmlns=SITEMAP_NS)
+        for post_id in sorted(self.urls):
+            url = ET.SubElement(root, "url")
+            ET.SubElement(url, "loc").text = post_url(post_id)
+            ET.SubElement(url, "lastmod").text = self.urls[post_id]
+        return _xml(root)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "Sitemap":
+        urls = {}
+        for url in ET.fromstring(data).iter(f"{{{SITEMAP_NS}}}url"):
+            urls[_text(url, "loc", SITEMAP_NS).rsplit("/", 1)[-1]] = _text(url, "lastmod", SITEMAP_NS)
+        return cls(urls)
+
+
+class SitemapIndex:
+    """shard -> lastmod for every non-empty shard."""
+
+    CONTENT_TYPE = "application/xml"
+    CACHE_CONTROL = CACHE_CONTROL
+
+    def __init__(self, shards: Dict[int, str] = None):
+        self.shards = dict(shards or {})
+
+    def apply(self, changes) -> bool:
+        """``changes`` are (shard, lastmod or None when the shard is empty)."""
+        before = dict(self.shards)
+        for shard, lastmod in changes:
+            if lastmod:
+                # Batches can land out of order; never move a shard back in time.
+                self.shards[shard] = max(lastmod, self.shards.get(shard, ""))
+            else:
+                self.shards.pop(shard, None)
+        return self.shards != before
+
+    def to_bytes(self) -> bytes:
+        root = ET.Element("sitemapindex", xmlns=SITEMAP_NS)
+        for shard in sorted(self.shards):
+            sitemap = ET.SubElement(root, "sitemap")
+            ET.SubElement(sitemap, "loc").text = f"{feeds_url()}/{shard_key(shard)}"
+            ET.SubElement(sitemap, "lastmod").text = self.shards[shard]
+        return _xml(root)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "SitemapIndex":
+        shards = {}
+        for sitemap in ET.fromstring(data).iter(f"{{{SITEMAP_NS}}}sitemap"):
+            name = _text(sitemap, "loc", SITEMAP_NS).rsplit("-", 1)[-1].split(".")[0]
+            shards[int(name)] = _text(sitemap, "lastmod", SITEMAP_NS)
+        return cls(shards)
+
+
+class Feed:
+    """Latest posts of one category (or of all, when ``category`` is None), stored as Atom."""
+
+    CONTENT_TYPE = "application/atom+xml"
+    CACHE_CONTROL = CACHE_CONTROL
+
+    def __init__(self, category: Optional[str] = None, entries: Dict[str, dict] = None):
+        self.category = category
+        self.entries = dict(entries or {})
+
+    def __len__(self):
+        return len(self.entries)
+
+    def belongs(self, post: Optional[dict]) -> bool:
+        return listed(post) and (self.category is None or post.get("category") == self.category)
+
+    def latest(self) -> List[dict]:
+        return sorted(self.entries.values(), key=lambda e: (e["published"], e["id"]), reverse=True)
+
+    def apply(self, changes) -> bool:
+        before = dict(self.entries)
+        for old, new in changes:
+            post_id = (new or old)["id"]
+            if self.belongs(new):
+                self.entries[post_id] = {
+                    "id": post_id,
+                    "title": new.get("title") or "",
+                    "summary": new.get("contentSummary") or "",
+                    "category": new.get("category") or "",
+                    "published": _w3c(new.get("publishedAt")),
+                    "updated": _w3c(new.get("updatedAt") or new.get("publishedAt")),
+                }
+            else:
+                self.entries.pop(post_id, None)
+        self.entries = {e["id"]: e for e in self.latest()[:FEED_SIZE]}
+        return self.entries != before
+
+    def _title(self) -> str:
+        return f"{FEED_TITLE}: {self.category}" if self.category else FEED_TITLE
+
+    def _link(self) -> str:
+        return f"{site_url()}/category/{self.category}" if self.category else f"{site_url()}/blogs"
+
+    def to_bytes(self) -> bytes:
+        entries = self.latest()
+        root = ET.Element("feed", xmlns=ATOM_NS)
+        ET.SubElement(root, "id").text = self._link()
+        ET.SubElement(root, "title").text = self._title()
+        ET.SubElement(root, "link", rel="alternate", href=self._link())
+        ET.SubElement(root, "link", rel="self", href=f"{feeds_url()}/{feed_key(self.category)}")
+        ET.SubElement(root, "updated").text = max((e["updated"] for e in entries), default=_w3c(None))
+        if self.category:
+            ET.SubElement(root, "category", term=self.category)
+        for e in entries:
+            entry = ET.SubElement(root, "entry")
+            ET.SubElement(entry, "id").text = post_url(e["id"])
+            ET.SubElement(entry, "title").text = e["title"]
+            ET.SubElement(entry, "link", rel="alternate", href=post_url(e["id"]))
+            ET.SubElement(entry, "published").text = e["published"]
+            ET.SubElement(entry, "updated").text = e["updated"]
+            ET.SubElement(entry, "summary").text = e["summary"]
+            if e["category"]:
+                ET.SubElement(entry, "category", term=e["category"])
+        return _xml(root)
+
+    def to_rss(self) -> bytes:
+        entries = self.latest()
+        root = ET.Element("rss", version="2.0")
+        channel = ET.SubElement(root, "channel")
+        ET.SubElement(channel, "title").text = self._title()
+        ET.SubElement(channel, "link").text = self._link()
+        ET.SubElement(channel, "description").text = self._title()
+        ET.SubElement(channel, "lastBuildDate").text = _rfc822(max((e["updated"] for e in entries), default=None))
+        for e in entries:
+            item = ET.SubElement(channel, "item")
+            ET.SubElement(item, "title").text = e["title"]
+            ET.SubElement(item, "link").text = post_url(e["id"])
+            ET.SubElement(item, "guid", isPermaLink="true").text = post_url(e["id"])
+            ET.SubElement(item, "description").text = e["summary"]
+            ET.SubElement(item, "pubDate").text = _rfc822(e["published"])
+            if e["category"]:
+                ET.SubElement(item, "category").text = e["category"]
+        return _xml(root)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "Feed":
+        root = ET.fromstring(data)
+        category = root.find(f"{{{ATOM_NS}}}category")
+        entries = {}
+        for entry in root.iter(f"{{{ATOM_NS}}}entry"):
+            post_id = _text(entry, "id", ATOM_NS).rsplit("/", 1)[-1]
+            term = entry.find(f"{{{ATOM_NS}}}category")
+            entries[post_id] = {
+                "id": post_id,
+                "title": _text(entry, "title", ATOM_NS),
+                "summary": _text(entry, "summary", ATOM_NS),
+                "category": term.get("term", "") if term is not None else "",
+                "published": _text(entry, "published", ATOM_NS),
+                "updated": _text(entry, "updated", ATOM_NS),
+            }
+        return cls(category.get("term") if category is not None else None, entries)
+
+
+def affected_shards(changes) -> Dict[int, list]:
+    """Sitemap shard -> the changes touching it."""
+    shards: Dict[int, list] = {}
+    for old, new in changes:
+        if listed(old) or listed(new):
+            shards.setdefault(shard_of((new or old)["id"]), []).append((old, new))
+    return shards
+
+
+def affected_categories(changes) -> Dict[Optional[str], list]:
+    """Feed category (None for the all-posts feed) -> the changes touching it."""
+    feeds: Dict[Optional[str], list] = {}
+    for old, new in changes:
+        categories = {post.get("category") for post in (old, new) if listed(post)}
+        if categories:
+            feeds.setdefault(None, []).append((old, new))
+        for category in categories - {None}:
+            feeds.setdefault(category, []).append((old, new))
+    return feeds
+
+
+def feed_changed(old: Optional[dict], new: Optional[dict]) -> bool:
+    """Whether a stream change can alter a sitemap or feed entry."""
+    if listed(old) != listed(new):
+        return True
+    return listed(new) and any(old.get(f) != new.get(f) for f in FEED_FIELDS)
+
+
@@ -0,0 +1,98 @@
+"""
+Derived indexes stored as single S3 objects and cached in module state.
+
+An index class provides ``to_bytes``, ``from_bytes`` and ``apply(changes)``
+(returning a falsy value when nothing changed), and may set ``CONTENT_TYPE``
+and ``CACHE_CONTROL`` for the stored object. Writers use S3 conditional
+puts, so concurrent stream batches cannot overwrite each other's updates.
+"""
+
+import logging
+import time
+from typing import Optional
+
+from botocore.exceptions import ClientError
+
+from common.s3 import get_s3_bytes_if_changed, put_s3_bytes
+
+logger = logging.getLogger(__name__)
+
+
+class ConcurrentUpdateError(Exception):
+    """The stored index kept changing underneath an update."""
+
+
+class IndexHolder:
+    """
+    Keeps an index in module state across warm invocations and revalidates
+    it against S3 with a conditional GET at most every ``refresh_seconds``.
+    """
+
+    def __init__(self, index_cls, key: str, refresh_seconds: float = 60.0, factory=None):
+        self.index_cls = index_cls
+        # Builds the empty index when the object does not exist yet.
+        self.factory = factory or index_cls
+        self.key = key
+        self.refresh_seconds = refresh_seconds
+        self.index = None
+        self.etag: Optional[str] = None
+        self.checked_at: Optional[float] = None
+
+    def get(self, bucket: str, force: bool = False):
+        """
+        The cached index, revalidated if it is older than ``refresh_seconds``
+        (or right away with ``force``); None if the object does not exist.
+        S3 errors are raised on a forced read or when nothing is cached yet,
+        so a writer never mistakes an unreadable index for a missing one.
+        """
+        if force or self.checked_at is None or time.monotonic() - self.checked_at > self.refresh_seconds:
+            try:
+                body, etag = get_s3_bytes_if_changed(bucket, self.key, self.etag, strict=True)
+            except ClientError as e:
+                if force or self.etag is None:
+                    raise
+                logger.warning(f"Could not revalidate {self.key}, keeping {self.etag}: {e}")
+                return self.index
+            self.checked_at = time.monotonic()
+            if body is not None:
+                self.index, self.etag = self.index_cls.from_bytes(body), etag
+                logger.info(f"Loaded {self.key} ({etag}, {len(body)} bytes)")
+            elif etag is None:
+                self.index, self.etag = None, None
+        return self.index
+
+    def save(self, bucket: str, index) -> bool:
+        """
+        Write ``index`` only if nobody else replaced it since it was loaded.
+        After a failed write the cached copy is dropped, since ``apply`` may
+        already have changed it, and the next read downloads the object.
+        """
+        content_type = getattr(self.index_cls, "CONTENT_TYPE", "application/gzip")
+        extra = {"CacheControl": self.index_cls.CACHE_CONTROL} if hasattr(self.index_cls, "CACHE_CONTROL") else {}
+        if self.etag:
+            etag = put_s3_bytes(bucket, self.key, index.to_bytes(), content_type, if_match=self.etag, **extra)
+        else:
+            etag = put_s3_bytes(bucket, self.key, index.to_bytes(), content_type, if_none_match="*", **extra)
+        if etag:
+            self.index, self.etag = index, etag
+        else:
+            self.index, self.etag, self.checked_at = None, None, None
+        return etag is not None
+
+    def update(self, bucket: str, changes, attempts: int = 5):
+        """
+        Apply stream changes to the latest stored index and save it. The
+        cached copy is revalidated with a conditional GET, so the object is
+        only downloaded when another writer changed it. Returns whatever
+        ``apply`` returned; raises ConcurrentUpdateError if every attempt
+        lost the race.
+        """
+        for _ in range(attempts):
+            index = self.get(bucket, force=True)
+            if index is None:
+                index = self.factory()
+            result = index.apply(changes)
+            if not result or self.save(bucket, index):
+                return result
+            logger.warning(f"{self.key} changed concurrently, retrying")
+        raise ConcurrentUpdateError(f"Could not update {self.key} after {attempts} attempts")
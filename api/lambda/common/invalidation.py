@@ -0,0 +1,72 @@
+"""
+Invalidation events for edited posts.
+
+Derived data (suggestions, related posts) already follows the table stream;
+these events tell caches in front of the API which responses went stale.
+They go to the EventBridge bus named by INVALIDATION_BUS and are skipped
+when it is not set.
+"""
+
+import json
+import logging
+import os
+from typing import Iterable, List, Optional
+
+import boto3
+from botocore.exceptions import ClientError
+
+from common.windows import WINDOW_ATTRIBUTE
+
+logger = logging.getLogger(__name__)
+
+events_client = boto3.client("events")
+
+EVENT_SOURCE = "jalad.blogs"
+DETAIL_TYPE = "BlogPostChanged"
+# Changes to these attributes show up in listing and search responses.
+LISTED_ATTRIBUTES = {"title", "contentSummary", "image", "category", "status", "startDate", "endDate", "publishedAt"}
+WINDOW_PATHS = ["/get-open-blogs", "/get-closing-soon-blogs", "/get-upcoming-blogs"]
+
+
+def stale_paths(post_id: str, changed: Iterable[str], categories: Iterable[Optional[str]] = ()) -> List[str]:
+    """API paths whose cached responses may include the old version of the post."""
+    changed = set(changed)
+    paths = [f"/get-blog-by-id?id={post_id}"]
+    if changed & LISTED_ATTRIBUTES:
+        paths.append("/get-blogs")
+        paths.extend(f"/get-blogs-by-category?category={c}" for c in sorted({c for c in categories if c}))
+        paths.append("/search-blogs")
+    if "title" in changed or "status" in changed:
+        paths.append("/suggest-blogs")
+    if changed & {WINDOW_ATTRIBUTE, "endDate", "startDate", "status"}:
+        paths.extend(WINDOW_PATHS)
+    return paths
+
+
+def publish_invalidation(post_id: str, version: int, changed: Iterable[str],
+                         categories: Iterable[Optional[str]] = ()) -> bool:
+    bus = os.getenv("INVALIDATION_BUS")
+    if not bus:
+        return False
+    changed = sorted(set(changed))
+    detail = {
+        "id": post_id,
+        "version": version,
+        "changed": changed,
+        "paths": stale_paths(post_id, changed, categories),
+    }
+    try:
+        response = events_client.put_events(Entries=[{
+            "EventBusName": bus,
+            "Source": EVENT_SOURCE,
+            "DetailType": DETAIL_TYPE,
+            "Detail": json.dumps(detail),
+        }])
+        if response.get("FailedEntryCount"):
+            logger.error(f"Invalidation event for {post_id} rejected: {response['Entries']}")
+            return False
+        return True
+    except ClientError as e:
+        # The edit is already stored; caches fall back to their TTLs.
+        logger.error(f"Error publishing invalidation for {post_id}: {e}")
+        return False
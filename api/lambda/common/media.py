@@ -0,0 +1,83 @@
+"""
+Content-addressed media storage.
+
+Uploaded files are stored once under ``media/<sha256><ext>``, so a file
+uploaded again (the same poster on several posts, a retried upload) reuses
+the existing object and URL. Objects never change once written and are
+served with an immutable Cache-Control. Posts store the key the upload
+returned; a client-chosen file name never decides what a post points at.
+"""
+
+import hashlib
+import mimetypes
+import os
+import re
+import time
+from typing import Dict, Optional, Tuple
+
+from common.s3 import get_s3_file_url, put_s3_bytes, s3_file_exists
+
+MEDIA_PREFIX = "media/"
+MEDIA_KEY = re.compile(r"^media/[0-9a-f]{64}(\.[a-z0-9]{1,10})?$")
+CHUNK_SIZE = 1024 * 1024
+CACHE_CONTROL = "public, max-age=31536000, immutable"
+# Signed URLs are reused for a while so repeated responses point browsers at
+# the same URL; they stay valid well past the reuse window.
+URL_EXPIRES_IN = 4 * 3600
+URL_REUSE_SECONDS = 2 * 3600
+
+
+def content_digest(content, chunk_size: int = CHUNK_SIZE) -> str:
+    """SHA-256 of ``content`` (bytes or a binary file object), read in chunks."""
+    digest = hashlib.sha256()
+    if isinstance(content, (bytes, bytearray, memoryview)):
+        view = memoryview(content)
+        for start in range(0, len(view), chunk_size):
+            digest.update(view[start:start + chunk_size])
+    else:
+        for chunk in iter(lambda: content.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def content_key(digest: str, file_name: str) -> str:
+    ext = os.path.splitext(file_name)[1].lower()
+    key = f"{MEDIA_PREFIX}{digest}{ext}"
+    # Extensions that are not plain alphanumerics are dropped from the key.
+    return key if MEDIA_KEY.match(key) else f"{MEDIA_PREFIX}{digest}"
+
+
+_urls: Dict[Tuple[str, str], Tuple[str, float]] = {}
+
+
+def is_stored_media(bucket: str, key) -> bool:
+    """Whether ``key`` is a content key that an upload has written."""
+    return isinstance(key, str) and bool(MEDIA_KEY.match(key)) and s3_file_exists(bucket, key)
+
+
+def store_media(bucket: str, file_name: str, content: bytes, content_type: str = None) -> Tuple[str, bool]:
+    """
+    Store ``content`` under its content key unless it is already there.
+    ``file_name`` only supplies the extension and content type. Returns
+    (key, already_stored).
+    """
+    key = content_key(content_digest(content), file_name)
+    existed = s3_file_exists(bucket, key)
+    if not existed:
+        content_type = content_type or mimetypes.guess_type(file_name)[0] or "application/octet-stream"
+        if not put_s3_bytes(bucket, key, content, content_type, CacheControl=CACHE_CONTROL):
+            raise RuntimeError(f"Failed to upload {key} to S3")
+    return key, existed
+
+
+def media_url(bucket: str, key: Optional[str]) -> Optional[str]:
+    """Signed URL for a post's image key, the same one for repeated calls in a container."""
+    if not key:
+        return None
+    cached = _urls.get((bucket, key))
+    if cached and time.monotonic() - cached[1] < URL_REUSE_SECONDS:
+        return cached[0]
+    url = get_s3_file_url(bucket, key, expires_in=URL_EXPIRES_IN)
+    if url:
+        _urls[(bucket, key)] = (url, time.monotonic())
+    return url
@@ -0,0 +1,233 @@
+"""
+Per-client rate limiting for the read endpoints.
+
+Each client (Cognito user when the request is authorized, source IP
+otherwise) has a token bucket per endpoint group in the counters table,
+under ``rate#<client>``. Tokens are read capacity units: a request is
+admitted against an estimate of what it will read and the capacity it
+actually consumed is settled afterwards, so one expensive search drains
+the bucket faster than many cheap listings.
+
+The bucket is stored as the time it will next be full (GCRA), which lets a
+single conditional UpdateItem both check and charge it. A missing bucket
+is created by the same write (``if_not_exists``), and the container keeps
+the last full-again time it saw for each client, so the write it tries
+first is usually the one whose condition holds; a failed condition returns
+the stored time, which picks the second write or refuses outright. Clients
+that were refused are remembered in the container until their retry time,
+so a client hammering an endpoint costs no writes while it waits. Errors from
+the store fail open: the limiter protects capacity, it must not take the
+endpoints down with it.
+"""
+
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict
+from decimal import Decimal
+from typing import Optional
+
+from botocore.exceptions import ClientError
+
+logger = logging.getLogger(__name__)
+
+RATE_PREFIX = "rate#"
+ANONYMOUS = "anonymous"
+# Extra charges smaller than this are carried in the container and added to
+# the client's next admission instead of costing a write of their own.
+SETTLE_THRESHOLD = 5.0
+MAX_BLOCKED = 1024
+# Bucket items outlive their "full again" time by this much before TTL removes them.
+EXPIRY_MARGIN = 3600
+
+
+class RateLimit:
+    """Token bucket of ``capacity`` tokens refilled at ``rate`` tokens per second."""
+
+    def __init__(self, name: str, capacity: float, rate: float):
+        self.name = name
+        self.capacity = capacity
+        self.rate = rate
+
+
+# Shared by the listing endpoints, so a client's budget does not grow with
+# the number of listing routes it spreads requests over.
+LISTING = RateLimit("list", capacity=120, rate=2.0)
+SEARCH = RateLimit("search", capacity=60, rate=0.5)
+
+
+class Quota:
+    """Outcome of an admission; ``retry_after`` is in seconds when refused."""
+
+    def __init__(self, client: str, allowed: bool, charged: float = 0.0, retry_after: float = 0.0):
+        self.client = client
+        self.allowed = allowed
+        self.charged = charged
+        self.retry_after = retry_after
+
+
+def client_id(event: dict) -> str:
+    """The Cognito ``sub`` when the request went through the authorizer, else the source IP."""
+    request_context = event.get("requestContext") or {}
+    claims = (request_context.get("authorizer") or {}).get("claims") or {}
+    if claims.get("sub"):
+        return f"user:{claims['sub']}"
+    source_ip = (request_context.get("identity") or {}).get("sourceIp")
+    return f"ip:{source_ip}" if source_ip else ANONYMOUS
+
+
+def consumed_units(response: dict) -> Optional[float]:
+    """Capacity units reported by a read made with ReturnConsumedCapacity, if any."""
+    consumed = response.get("ConsumedCapacity")
+    if not consumed:
+        return None
+    if isinstance(consumed, list):
+        return sum(float(c.get("CapacityUnits", 0)) for c in consumed)
+    return float(consumed.get("CapacityUnits", 0))
+
+
+def _decimal(value: float) -> Decimal:
+    return Decimal(str(round(value, 3)))
+
+
+class RateLimiter:
+    def __init__(self, limit: RateLimit, settle_threshold: float = SETTLE_THRESHOLD):
+        self.limit = limit
+        self.settle_threshold = settle_threshold
+        self._blocked = OrderedDict()
+        self._debt = OrderedDict()
+        # Last full-again time seen per client, to pick which write to try.
+        self._full_at = OrderedDict()
+        # Running mean of what admitted requests consumed, used as the
+        # admission charge so settling rarely needs a write of its own.
+        self.typical_cost = 1.0
+        self._lock = threading.Lock()
+
+    def _key(self, client: str) -> dict:
+        return {"pk": f"{RATE_PREFIX}{client}", "sk": self.limit.name}
+
+    def _remember(self, entries: OrderedDict, client: str, value: float):
+        with self._lock:
+            entries[client] = value
+            entries.move_to_end(client)
+            while len(entries) > MAX_BLOCKED:
+                entries.popitem(last=False)
+
+    def _blocked_for(self, client: str, now: float) -> float:
+        with self._lock:
+            until = self._blocked.get(client)
+            if until is None:
+                return 0.0
+            if until <= now:
+                del self._blocked[client]
+                return 0.0
+            return until - now
+
+    def _admitted(self, client: str, cost: float, debt: float) -> Quota:
+        if debt:
+            with self._lock:
+                self._debt.pop(client, None)
+        return Quota(client, True, charged=max(0.0, cost - debt))
+
+    def admit(self, table, client: str, cost: Optional[float] = None, now: float = None) -> Quota:
+        """
+        Take ``cost`` tokens (by default what requests typically consume)
+        from ``client``'s bucket, or refuse with the time until they are
+        available.
+        """
+        now = time.time() if now is None else now
+        if table is None:
+            return Quota(client, True)
+        debt = self._debt.get(client, 0.0)
+        cost = self.typical_cost if cost is None else max(cost, 0.0)
+        cost = min(cost + debt, self.limit.capacity)
+
+        waiting = self._blocked_for(client, now)
+        if waiting:
+            return Quota(client, False, retry_after=waiting)
+
+        interval = cost / self.limit.rate
+        # The bucket holds ``cost`` tokens while its full-again time is no
+        # further ahead than this.
+        latest = now + (self.limit.capacity - cost) / self.limit.rate
+        # Stored full-again times only ever move forward, so one this
+        # container saw is a lower bound and can refuse without a write.
+        full_at = self._full_at.get(client)
+        try:
+            for _ in range(2):
+                if full_at is not None and full_at > latest:
+                    break
+                full = full_at is not None and full_at < now
+                try:
+                    full_at = self._charge(table, client, interval, now, latest, full)
+                    self._remember(self._full_at, client, full_at)
+                    return self._admitted(client, cost, debt)
+                except ClientError as e:
+                    if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                        raise
+                    full_at = float(e.response.get("Item", {}).get("fullAt", {}).get("N", now))
+        except Exception as e:
+            logger.warning(f"Rate limit store unavailable, admitting {client}: {e}")
+            return Quota(client, True)
+
+        self._remember(self._full_at, client, full_at)
+        retry_after = max(1.0, math.ceil(full_at - latest))
+        self._remember(self._blocked, client, now + retry_after)
+        return Quota(client, False, retry_after=retry_after)
+
+    def _charge(self, table, client: str, interval: float, now: float, latest: float, full: bool) -> float:
+        """One conditional write charging ``interval``; returns the new full-again time."""
+        names = {"#t": "fullAt", "#e": "expiresAt"}
+        if full:
+            # Full bucket: charge from now.
+            update, condition = "SET #t = :t, #e = :e", "attribute_not_exists(#t) OR #t < :now"
+            values = {
+                ":t": _decimal(now + interval),
+                ":now": _decimal(now),
+                ":e": int(now + interval) + EXPIRY_MARGIN,
+            }
+        else:
+            # Partly drained bucket, or a new client: move its full-again time forward.
+            update = "SET #t = if_not_exists(#t, :now) + :i, #e = :e"
+            condition = "attribute_not_exists(#t) OR (#t >= :now AND #t <= :latest)"
+            values = {
+                ":i": _decimal(interval),
+                ":now": _decimal(now),
+                ":latest": _decimal(latest),
+                ":e": int(latest + interval) + EXPIRY_MARGIN,
+            }
+        response = table.update_item(
+            Key=self._key(client),
+            UpdateExpression=update,
+            ConditionExpression=condition,
+            ExpressionAttributeNames=names,
+            ExpressionAttributeValues=values,
+            ReturnValues="UPDATED_NEW",
+            ReturnValuesOnConditionCheckFailure="ALL_OLD",
+        )
+        return float(response["Attributes"]["fullAt"])
+
+    def settle(self, table, quota: Quota, consumed: Optional[float]):
+        """Charge what the request consumed beyond what it was admitted for."""
+        if table is None or not quota.allowed or consumed is None:
+            return
+        self.typical_cost = max(1.0, 0.8 * self.typical_cost + 0.2 * consumed)
+        extra = consumed - quota.charged
+        if extra <= 0:
+            return
+        if extra < self.settle_threshold:
+            self._remember(self._debt, quota.client, self._debt.get(quota.client, 0.0) + extra)
+            return
+        try:
+            # Admission left the full-again time in the future, so it can simply grow.
+            table.update_item(
+                Key=self._key(quota.client),
+                UpdateExpression="ADD #t :i",
+                ExpressionAttributeNames={"#t": "fullAt"},
+                ExpressionAttributeValues={":i": _decimal(extra / self.limit.rate)},
+            )
+            if quota.client in self._full_at:
+                self._remember(self._full_at, quota.client, self._full_at[quota.client] + extra / self.limit.rate)
+        except Exception as e:
+            logger.warning(f"Could not settle {extra:.1f} units for {quota.client}: {e}")
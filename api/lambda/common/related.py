@@ -0,0 +1,275 @@
+"""
+Related posts from TF-IDF cosine similarity.
+
+Each published post becomes a sparse vector over its title, summary and
+body text, truncated to its ``MAX_TERMS`` heaviest terms. Similarities are
+accumulated through an inverted index, skipping terms that appear in most
+posts, so a post is only ever compared with posts it shares a useful term
+with. The model (document frequencies, vectors and neighbour lists) is a
+gzipped JSON object in the media bucket. Each post item carries only the
+ids of its neighbours in ``related``, and get_by_id fetches their cards
+with one BatchGetItem, so editing a post's title or image rewrites no other
+item and the attribute stays small in the index projections.
+
+Document frequencies are fixed at the last full build. The post stream
+keeps vectors and neighbour lists current between builds, and the
+scheduled rebuild refreshes the frequencies.
+"""
+
+import gzip
+import heapq
+import json
+import logging
+import math
+from collections import Counter, defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set
+
+from botocore.exceptions import ClientError
+
+from common.body import INLINE_ATTRIBUTE, POINTER_ATTRIBUTE
+from common.text import strip_html, tokenize
+
+logger = logging.getLogger(__name__)
+
+MODEL_KEY = "indexes/related.json.gz"
+VERSION = 2
+# Version 1 also stored neighbour cards; its neighbour lists are still valid.
+READABLE_VERSIONS = (1, VERSION)
+RELATED_ATTRIBUTE = "related"
+K = 5
+MAX_TERMS = 40
+MIN_SCORE = 0.05
+# Terms in more than this share of posts say little about relatedness.
+MAX_DF_RATIO = 0.5
+FIELD_WEIGHTS = {"title": 3, "contentSummary": 2, "htmlContent": 1}
+# Fetched for each neighbour when a post is read (blogs/get_by_id.py).
+CARD_FIELDS = ("id", "title", "image", "category", "endDate", "status")
+# Attributes the model reads; changes to anything else are ignored.
+SOURCE_FIELDS = ("id", "status", *FIELD_WEIGHTS, INLINE_ATTRIBUTE, POINTER_ATTRIBUTE)
+
+
+def relatable(post: Optional[dict]) -> bool:
+    return bool(post) and post.get("status") == "published" and bool(post.get("title"))
+
+
+def relevant_change(old: Optional[dict], new: Optional[dict]) -> bool:
+    """False for writes that only touched attributes the model ignores, such as ``related`` itself."""
+    if not relatable(old) and not relatable(new):
+        return False
+    return any((old or {}).get(f) != (new or {}).get(f) for f in SOURCE_FIELDS)
+
+
+def term_counts(post: dict) -> Counter:
+    """Weighted term counts; the body must already be decoded (common.body.with_body)."""
+    counts = Counter()
+    for field, weight in FIELD_WEIGHTS.items():
+        text = post.get(field) or ""
+        if field == "htmlContent":
+            text = strip_html(text)
+        for term in tokenize(text):
+            counts[term] += weight
+    return counts
+
+
+def stored_ids(related) -> List[str]:
+    """Neighbour ids from an item's ``related`` attribute, including the version 1 card form."""
+    return [entry["id"] if isinstance(entry, dict) else entry for entry in related or []]
+
+
+class RelatedModel:
+    def __init__(self, n_docs: int = 0, df: Dict[str, int] = None, vectors: Dict[str, dict] = None,
+                 neighbours: Dict[str, list] = None, built_at: str = None):
+        self.n_docs = n_docs
+        self.df = df or {}
+        self.vectors = vectors or {}
+        self.neighbours = {}
+        self.built_at = built_at
+        self._common = {t for t, c in self.df.items() if c > MAX_DF_RATIO * max(n_docs, 1)}
+        self._postings: Dict[str, Dict[str, float]] = defaultdict(dict)
+        # Neighbour id -> the posts whose rows list it.
+        self._listed_by: Dict[str, Set[str]] = defaultdict(set)
+        for doc_id, vector in self.vectors.items():
+            self._post(doc_id, vector)
+        for doc_id, row in (neighbours or {}).items():
+            self._set_row(doc_id, row)
+
+    @classmethod
+    def from_posts(cls, posts: Iterable[dict]) -> "RelatedModel":
+        counts = {}
+        for post in posts:
+            if relatable(post):
+                counts[post["id"]] = term_counts(post)
+        df = Counter()
+        for c in counts.values():
+            df.update(c.keys())
+        # Terms seen once get the default idf, so they need not be stored.
+        model = cls(len(counts), {t: n for t, n in df.items() if n > 1}, built_at=datetime.utcnow().isoformat())
+        for doc_id, c in counts.items():
+            model.vectors[doc_id] = model._vector(c)
+            model._post(doc_id, model.vectors[doc_id])
+        for doc_id in model.vectors:
+            model._set_row(doc_id, model._row(doc_id))
+        return model
+
+    def __len__(self):
+        return len(self.vectors)
+
+    def _idf(self, term: str) -> float:
+        return math.log((1 + self.n_docs) / (1 + self.df.get(term, 1))) + 1
+
+    def _vector(self, counts: Counter) -> Dict[str, float]:
+        weights = {t: (1 + math.log(c)) * self._idf(t) for t, c in counts.items()}
+        top = heapq.nlargest(MAX_TERMS, weights.items(), key=lambda kv: (kv[1], kv[0]))
+        norm = math.sqrt(sum(w * w for _, w in top)) or 1.0
+        return {t: round(w / norm, 4) for t, w in top}
+
+    def _post(self, doc_id: str, vector: dict):
+        for term, weight in vector.items():
+            self._postings[term][doc_id] = weight
+
+    def _unpost(self, doc_id: str, vector: dict):
+        for term in vector:
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(doc_id, None)
+                if not postings:
+                    del self._postings[term]
+
+    def _scores(self, doc_id: str) -> Dict[str, float]:
+        scores = defaultdict(float)
+        for term, weight in self.vectors[doc_id].items():
+            if term in self._common:
+                continue
+            for other, other_weight in self._postings.get(term, {}).items():
+                scores[other] += weight * other_weight
+        scores.pop(doc_id, None)
+        return scores
+
+    def _row(self, doc_id: str, scores: Dict[str, float] = None) -> list:
+        scores = self._scores(doc_id) if scores is None else scores
+        top = heapq.nlargest(K, ((_round(s), o) for o, s in scores.items() if s >= MIN_SCORE))
+        return [[o, s] for s, o in top]
+
+    def _set_row(self, doc_id: str, row: Optional[list]) -> bool:
+        """Replace (or with None, drop) a neighbour row; True if the ids it lists changed."""
+        old_ids = self.related_ids(doc_id) if doc_id in self.neighbours else None
+        for other in old_ids or ():
+            listed_by = self._listed_by.get(other)
+            if listed_by is not None:
+                listed_by.discard(doc_id)
+                if not listed_by:
+                    del self._listed_by[other]
+        if row is None:
+            self.neighbours.pop(doc_id, None)
+            return old_ids is not None
+        self.neighbours[doc_id] = row
+        for other, _ in row:
+            self._listed_by[other].add(doc_id)
+        return old_ids != self.related_ids(doc_id)
+
+    def _upsert(self, post: dict) -> Set[str]:
+        doc_id = post["id"]
+        vector = self._vector(term_counts(post))
+        if self.vectors.get(doc_id) == vector:
+            return set()
+        added = doc_id not in self.vectors
+        if not added:
+            self._unpost(doc_id, self.vectors[doc_id])
+        self.vectors[doc_id] = vector
+        self._post(doc_id, vector)
+
+        affected = set()
+        scores = self._scores(doc_id)
+        if self._set_row(doc_id, self._row(doc_id, scores)) or added:
+            affected.add(doc_id)
+        # Rows that already list the post may need it moved or dropped.
+        listing = self._listed_by.get(doc_id, set()) - {doc_id}
+        for other in listing:
+            if self._set_row(other, self._row(other)):
+                affected.add(other)
+        # Similarity is symmetric: the post joins any row whose last entry it beats.
+        for other, score in scores.items():
+            score = _round(score)
+            row = self.neighbours.get(other)
+            if other in listing or row is None or score < MIN_SCORE:
+                continue
+            if len(row) < K or [score, doc_id] > [row[-1][1], row[-1][0]]:
+                row = sorted(row + [[doc_id, score]], key=lambda e: (e[1], e[0]), reverse=True)[:K]
+                self._set_row(other, row)
+                affected.add(other)
+        return affected
+
+    def _remove(self, doc_id: str) -> Set[str]:
+        if doc_id not in self.vectors:
+            return set()
+        self._unpost(doc_id, self.vectors.pop(doc_id))
+        self._set_row(doc_id, None)
+        affected = set()
+        for other in list(self._listed_by.get(doc_id, ())):
+            if self._set_row(other, self._row(other)):
+                affected.add(other)
+        return affected
+
+    def apply(self, changes) -> Set[str]:
+        """
+        Apply ``(old_image, new_image)`` pairs from the post stream and return
+        the ids whose neighbour lists changed (empty if nothing changed).
+        Replaying a batch changes nothing.
+        """
+        affected = set()
+        for old, new in changes:
+            post_id = (new or old or {}).get("id")
+            if not post_id:
+                continue
+            if relatable(new):
+                affected |= self._upsert(new)
+            else:
+                affected |= self._remove(post_id)
+        return affected
+
+    def related_ids(self, doc_id: str) -> List[str]:
+        return [o for o, _ in self.neighbours.get(doc_id, [])]
+
+    def to_bytes(self) -> bytes:
+        payload = {
+            "version": VERSION, "built_at": self.built_at, "n_docs": self.n_docs, "df": self.df,
+            "vectors": self.vectors, "neighbours": self.neighbours,
+        }
+        return gzip.compress(json.dumps(payload, separators=(",", ":")).encode("utf-8"))
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "RelatedModel":
+        payload = json.loads(gzip.decompress(data))
+        if payload.get("version") not in READABLE_VERSIONS:
+            raise ValueError(f"Unsupported related model version {payload.get('version')}")
+        return cls(payload["n_docs"], payload["df"], payload["vectors"], payload["neighbours"],
+                   payload.get("built_at"))
+
+
+def _round(score: float) -> float:
+    # Rounded vector weights can push a cosine just past 1.
+    return round(min(score, 1.0), 4)
+
+
+def write_related(table, model: RelatedModel, ids: Iterable[str]) -> int:
+    """Store each post's neighbour ids on its item; returns the number written."""
+    written = 0
+    for doc_id in ids:
+        if doc_id not in model.vectors:
+            continue
+        try:
+            table.update_item(
+                Key={"id": doc_id},
+                UpdateExpression="SET #r = :r",
+                ConditionExpression="attribute_exists(id)",
+                ExpressionAttributeNames={"#r": RELATED_ATTRIBUTE},
+                ExpressionAttributeValues={":r": model.related_ids(doc_id)},
+            )
+            written += 1
+        except ClientError as e:
+            if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                raise
+            # Deleted since the stream record; its removal record follows.
+            logger.info(f"Skipping related posts for missing post {doc_id}")
+    return written
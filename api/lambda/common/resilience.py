@@ -0,0 +1,441 @@
+"""
+Resilience helpers for DynamoDB reads: error classification, retries with
+jitter, a per-container circuit breaker, a stale response cache and a
+budgeted scan used only when an index cannot serve a query, drawing on a
+per-container scan budget. Pagination cursors record which of the two
+produced them, since a scan position means nothing to an index.
+"""
+
+import json
+import logging
+import random
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional, Tuple
+
+from botocore.config import Config
+from botocore.exceptions import (
+    ClientError,
+    ConnectionClosedError,
+    ConnectTimeoutError,
+    EndpointConnectionError,
+    ReadTimeoutError,
+)
+
+logger = logging.getLogger(__name__)
+
+# botocore would otherwise retry throttled DynamoDB calls up to ten times with
+# no shared budget; retries are handled by ``retry_call`` instead.
+DYNAMODB_CLIENT_CONFIG = Config(retries={"mode": "standard", "max_attempts": 1})
+
+THROTTLED = "throttled"
+TRANSIENT = "transient"
+MISSING_INDEX = "missing_index"
+CLIENT = "client"
+UNKNOWN = "unknown"
+
+# Wraps the start key of cursors handed out for fallback scan pages.
+SCAN_CURSOR = "scan"
+
+THROTTLING_CODES = {
+    "ProvisionedThroughputExceededException",
+    "ThrottlingException",
+    "RequestLimitExceeded",
+    "TooManyRequestsException",
+    "SlowDown",
+}
+TRANSIENT_CODES = {
+    "InternalServerError",
+    "InternalFailure",
+    "ServiceUnavailable",
+    "RequestTimeout",
+}
+CONNECTION_ERRORS = (
+    EndpointConnectionError,
+    ConnectionClosedError,
+    ConnectTimeoutError,
+    ReadTimeoutError,
+)
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is refused because its circuit breaker is open."""
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"Circuit '{name}' is open, retry in {retry_after:.0f}s")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class ReadUnavailableError(Exception):
+    """The table cannot serve the read right now and there is nothing stale to return."""
+
+    def __init__(self, retry_after: float, cause: Exception = None):
+        super().__init__(f"Read unavailable, retry in {retry_after:.0f}s")
+        self.retry_after = retry_after
+        self.cause = cause
+
+
+def classify_error(error: Exception) -> str:
+    """Map an exception to one of THROTTLED, TRANSIENT, MISSING_INDEX, CLIENT or UNKNOWN."""
+    if isinstance(error, CircuitOpenError):
+        return THROTTLED
+    if isinstance(error, ClientError):
+        code = error.response.get("Error", {}).get("Code", "")
+        message = error.response.get("Error", {}).get("Message", "").lower()
+        if code in THROTTLING_CODES:
+            return THROTTLED
+        if code in TRANSIENT_CODES:
+            return TRANSIENT
+        # Index still backfilling, renamed or not yet deployed in this env.
+        if code in ("ValidationException", "ResourceNotFoundException") and "index" in message:
+            return MISSING_INDEX
+        return CLIENT
+    if isinstance(error, CONNECTION_ERRORS):
+        return TRANSIENT
+    return UNKNOWN
+
+
+class RetryQuota:
+    """
+    Container wide retry budget. Each retry spends tokens and each success
+    refunds one, so once most calls are failing the container stops retrying
+    instead of multiplying load on a throttled table.
+    """
+
+    def __init__(self, capacity: int = 50, retry_cost: int = 5, success_refund: int = 1):
+        self.capacity = capacity
+        self.retry_cost = retry_cost
+        self.success_refund = success_refund
+        self.tokens = capacity
+        self._lock = threading.Lock()
+
+    def acquire(self) -> bool:
+        with self._lock:
+            if self.tokens < self.retry_cost:
+                return False
+            self.tokens -= self.retry_cost
+            return True
+
+    def refund(self):
+        with self._lock:
+            self.tokens = min(self.capacity, self.tokens + self.success_refund)
+
+
+retry_quota = RetryQuota()
+
+
+def retry_call(
+    fn: Callable,
+    *args,
+    max_attempts: int = 3,
+    base_delay: float = 0.05,
+    max_delay: float = 1.0,
+    deadline_ms: Optional[int] = None,
+    **kwargs,
+):
+    """
+    Call ``fn`` retrying throttled and transient errors with full jitter
+    exponential backoff, within the container retry quota and the time left
+    in the invocation.
+    """
+    started = time.monotonic()
+    attempt = 0
+    while True:
+        attempt += 1
+        try:
+            result = fn(*args, **kwargs)
+            retry_quota.refund()
+            return result
+        except Exception as e:
+            kind = classify_error(e)
+            if kind not in (THROTTLED, TRANSIENT) or isinstance(e, CircuitOpenError):
+                raise
+            if attempt >= max_attempts or not retry_quota.acquire():
+                raise
+            delay = random.uniform(0, min(max_delay, base_delay * 2 ** attempt))
+            if deadline_ms is not None and (time.monotonic() - started + delay) * 1000 > deadline_ms:
+                raise
+            logger.warning(f"Retrying after {kind} error (attempt {attempt}/{max_attempts}, sleep {delay:.3f}s): {e}")
+            time.sleep(delay)
+
+
+class CircuitBreaker:
+    """
+    Per-container circuit breaker. Opens after ``failure_threshold`` throttled
+    or transient failures in a row, refuses calls for ``reset_timeout``
+    seconds, then lets a single probe through (half open) to decide whether
+    to close again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return self.CLOSED
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def retry_after(self) -> float:
+        if self.opened_at is None:
+            return 0.0
+        return max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at))
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self.state
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._probe_in_flight or self.failures >= self.failure_threshold:
+                logger.warning(f"Circuit '{self.name}' open after {self.failures} failures")
+                self.opened_at = time.monotonic()
+            self._probe_in_flight = False
+
+    def call(self, fn: Callable, *args, **kwargs):
+        if not self.allow():
+            raise CircuitOpenError(self.name, self.retry_after())
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            if classify_error(e) in (THROTTLED, TRANSIENT):
+                self.record_failure()
+            else:
+                # Not a capacity problem; do not hold the probe slot.
+                self._probe_in_flight = False
+            raise
+        self.record_success()
+        return result
+
+
+_breakers = {}
+
+
+def get_breaker(name: str, **kwargs) -> CircuitBreaker:
+    """Return the container wide breaker for ``name``, creating it on first use."""
+    if name not in _breakers:
+        _breakers[name] = CircuitBreaker(name, **kwargs)
+    return _breakers[name]
+
+
+class StaleCache:
+    """Small LRU of the last good responses, served when the table is unavailable."""
+
+    def __init__(self, max_entries: int = 64, max_age: float = 900.0):
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self._entries = OrderedDict()
+
+    def get(self, key: str):
+        entry = self._entries.get(key)
+        if not entry:
+            return None
+        stored_at, value = entry
+        if time.monotonic() - stored_at > self.max_age:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def put(self, key: str, value):
+        self._entries[key] = (time.monotonic(), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+stale_cache = StaleCache()
+
+
+class ScanBudget:
+    """
+    Container wide budget of items the fallback scans may read: a token
+    bucket of ``capacity`` items refilled at ``rate`` items per second, so
+    a missing index cannot turn every request into a table scan.
+    """
+
+    def __init__(self, capacity: int = 2000, rate: float = 50.0):
+        self.capacity = capacity
+        self.rate = rate
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def take(self, wanted: int) -> int:
+        """Reserve up to ``wanted`` items; returns how many were granted."""
+        with self._lock:
+            self._refill()
+            granted = int(min(wanted, self.tokens))
+            self.tokens -= granted
+            return granted
+
+    def give_back(self, unused: int):
+        with self._lock:
+            self.tokens = min(self.capacity, self.tokens + unused)
+
+    def retry_after(self, wanted: int = 10) -> float:
+        with self._lock:
+            self._refill()
+            return max(1.0, (wanted - self.tokens) / self.rate)
+
+
+scan_budget = ScanBudget()
+
+
+def budgeted_scan(table, wanted: int, max_scanned: int = 500, key_names: tuple = ("id",), **scan_params) -> dict:
+    """
+    Scan until ``wanted`` matching items are found, ``max_scanned`` items
+    have been read or the container scan budget runs out, whichever comes
+    first. Returns a Query shaped response whose LastEvaluatedKey (built from
+    the table's ``key_names``) resumes right after the last item returned.
+    Raises ReadUnavailableError if the budget allows no read at all; a
+    throttled page after the first ends the scan early instead.
+    """
+    items, scanned, units, last_key = [], 0, None, None
+    params = dict(scan_params)
+    while True:
+        # Pages grow with the number of matches still missing, so a selective
+        # filter reads more per call while a loose one stops early.
+        limit = scan_budget.take(min(max(2 * (wanted - len(items)), 10), max_scanned - scanned))
+        if not limit:
+            if last_key is None:
+                raise ReadUnavailableError(scan_budget.retry_after())
+            # Later pages continue from the key returned so far.
+            break
+        params["Limit"] = limit
+        try:
+            response = table.scan(**params)
+        except Exception as e:
+            scan_budget.give_back(limit)
+            if last_key is None or classify_error(e) not in (THROTTLED, TRANSIENT):
+                raise
+            logger.warning(f"Fallback scan stopped early after {classify_error(e)} error: {e}")
+            break
+        items.extend(response.get("Items", []))
+        scanned += response.get("ScannedCount", 0)
+        scan_budget.give_back(max(0, limit - response.get("ScannedCount", 0)))
+        if "ConsumedCapacity" in response:
+            units = (units or 0) + response["ConsumedCapacity"].get("CapacityUnits", 0)
+        last_key = response.get("LastEvaluatedKey")
+        if not last_key or len(items) >= wanted or scanned >= max_scanned:
+            break
+        params["ExclusiveStartKey"] = last_key
+    if len(items) > wanted:
+        # Matches past ``wanted`` were read but not returned; resume before them.
+        items = items[:wanted]
+        last_key = {name: items[-1][name] for name in key_names}
+    result = {"Items": items, "Count": len(items), "ScannedCount": scanned}
+    if last_key:
+        result["LastEvaluatedKey"] = last_key
+    if units is not None:
+        result["ConsumedCapacity"] = {"TableName": table.name, "CapacityUnits": units}
+    return result
+
+
+def encode_cursor(response: dict, source: str) -> Optional[str]:
+    """Client cursor for ``response``, marked when it is a fallback scan position."""
+    key = response.get("LastEvaluatedKey")
+    if not key:
+        return None
+    return json.dumps({SCAN_CURSOR: key} if source == "scan" else key)
+
+
+def decode_cursor(cursor: str) -> Tuple[str, dict]:
+    """``(source, key)`` for a cursor from ``encode_cursor``; raises ValueError if malformed."""
+    key = json.loads(cursor)
+    if not isinstance(key, dict):
+        raise ValueError(f"Cursor is not an object: {cursor}")
+    if SCAN_CURSOR in key:
+        return "scan", key[SCAN_CURSOR]
+    return "query", key
+
+
+def resilient_query(
+    table,
+    query_params: dict,
+    cache_key: str,
+    breaker_name: str,
+    fallback_scan_params: Optional[dict] = None,
+    context=None,
+):
+    """
+    Run ``table.query`` behind a circuit breaker with retries.
+
+    Returns ``(response, source)`` where source is ``"query"``, ``"stale"``
+    (last good response for ``cache_key``) or ``"scan"`` (budgeted scan,
+    only when the index itself is unusable). An ``ExclusiveStartKey`` in
+    ``fallback_scan_params`` (a scan cursor) continues that scan without
+    touching the index. Raises ReadUnavailableError when capacity is
+    exhausted and nothing stale is cached.
+    """
+    breaker = get_breaker(breaker_name)
+    deadline_ms = context.get_remaining_time_in_millis() - 1000 if context else None
+    wanted = query_params.get("Limit", 10)
+    if fallback_scan_params and "ExclusiveStartKey" in fallback_scan_params:
+        return _fallback_scan(table, wanted, fallback_scan_params, cache_key)
+    try:
+        response = breaker.call(retry_call, table.query, deadline_ms=deadline_ms, **query_params)
+        stale_cache.put(cache_key, response)
+        return response, "query"
+    except Exception as e:
+        kind = classify_error(e)
+        # An index position cannot be resumed by a scan.
+        if kind == MISSING_INDEX and fallback_scan_params is not None and "ExclusiveStartKey" not in query_params:
+            logger.warning(f"Index unusable for {breaker_name}, falling back to budgeted scan: {e}")
+            return _fallback_scan(table, wanted, fallback_scan_params, cache_key)
+        if kind not in (THROTTLED, TRANSIENT, MISSING_INDEX):
+            raise
+        stale = stale_cache.get(cache_key)
+        if stale is not None:
+            logger.warning(f"Serving stale response for {cache_key} after {kind} error: {e}")
+            return stale, "stale"
+        retry_after = e.retry_after if isinstance(e, CircuitOpenError) else max(1.0, breaker.retry_after())
+        raise ReadUnavailableError(retry_after, e)
+
+
+def _fallback_scan(table, wanted: int, scan_params: dict, cache_key: str):
+    """Budgeted scan for ``resilient_query``, falling back to stale data when it cannot run."""
+    try:
+        return budgeted_scan(table, wanted, **scan_params), "scan"
+    except Exception as e:
+        if not isinstance(e, ReadUnavailableError) and classify_error(e) not in (THROTTLED, TRANSIENT):
+            raise
+        stale = stale_cache.get(cache_key)
+        if stale is not None:
+            logger.warning(f"Fallback scan unavailable, serving stale response for {cache_key}: {e}")
+            return stale, "stale"
+        if isinstance(e, ReadUnavailableError):
+            raise
+        raise ReadUnavailableError(scan_budget.retry_after(), e)
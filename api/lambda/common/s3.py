@@ -4,7 +4,7 @@ This package contains all the basic operations for S3.
 
 import boto3
 from botocore.exceptions import ClientError
-from typing import Optional, List
+from typing import Optional, List, Tuple
 import logging
 import os
 logging.basicConfig(level=os.getenv('LOG_LEVEL', 'INFO'))
@@ -139,4 +139,51 @@ def s3_file_exists(bucket: str, key: str) -> bool:
         if e.response['Error']['Code'] == "404":
             return False
         logging.error(f"Error checking existence of {bucket}/{key}: {e}")
-        return False
\ No newline at end of file
+        return False
+
+
+def get_s3_bytes_if_changed(bucket: str, key: str, etag: Optional[str] = None,
+                            strict: bool = False) -> Tuple[Optional[bytes], Optional[str]]:
+    """
+    Fetch an object's bytes unless it still matches ``etag``.
+    Returns (body, etag); body is None when unchanged, and etag is None too
+    when the object does not exist. Other errors are logged and reported as
+    unchanged, or raised with ``strict``.
+    """
+    try:
+        params = {'Bucket': bucket, 'Key': key}
+        if etag:
+            params['IfNoneMatch'] = etag
+        s3_obj = s3_client.get_object(**params)
+        return s3_obj['Body'].read(), s3_obj['ETag']
+    except ClientError as e:
+        code = e.response['Error']['Code']
+        if code in ('304', 'NotModified'):
+            return None, etag
+        if code in ('404', 'NoSuchKey'):
+            return None, None
+        if strict:
+            raise
+        logging.error(f"Error fetching {key} from bucket {bucket}: {e}")
+        return None, etag
+
+
+def put_s3_bytes(bucket: str, key: str, content: bytes, content_type: str = 'application/octet-stream',
+                 if_match: Optional[str] = None, if_none_match: Optional[str] = None, **extra_args) -> Optional[str]:
+    """
+    Upload bytes, optionally only if the current object still has ETag
+    ``if_match`` (or, with ``if_none_match='*'``, does not exist yet).
+    Returns the new ETag, or None if a precondition failed or the upload errored.
+    """
+    try:
+        put_args = {'Bucket': bucket, 'Key': key, 'Body': content, 'ContentType': content_type, **extra_args}
+        if if_match:
+            put_args['IfMatch'] = if_match
+        if if_none_match:
+            put_args['IfNoneMatch'] = if_none_match
+        return s3_client.put_object(**put_args)['ETag']
+    except ClientError as e:
+        if e.response['Error']['Code'] in ('PreconditionFailed', 'ConditionalRequestConflict', '412'):
+            return None
+        logging.error(f"Error putting file to {bucket}/{key}: {e}")
+        return None
@@ -0,0 +1,486 @@
+"""
+Inverted index for blog search, served in-process from a memory-mapped
+snapshot file.
+
+A snapshot is a versioned binary file built from a full table scan:
+
+    header    magic, format, manifest length
+    manifest  JSON: snapshot version, counts, and where each section starts
+    sections  8-byte aligned, little-endian arrays
+
+The sections are the term dictionary (UTF-8 terms sorted bytewise, with an
+offsets array), the postings (per term, delta-encoded document numbers
+and a flags byte saying which fields the term occurs in) and one string
+column per card field. Documents are numbered newest first, so document
+order is the recency tie-break. The file is downloaded to /tmp once per
+container and opened with mmap; a query bisects the dictionary and walks
+the postings straight out of the mapping.
+
+Posts changed since the snapshot live in a small delta segment (a gzipped
+JSON object kept by the post stream through common/index_store.py) that
+hides their snapshot copy and indexes their current one. The delta also
+names the snapshot it applies to, so it doubles as the pointer readers
+follow to a new snapshot.
+"""
+
+import gzip
+import heapq
+import json
+import logging
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import time
+from array import array
+from bisect import bisect_left
+from collections import defaultdict
+from datetime import datetime
+from itertools import accumulate, islice
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from common.body import BODY_ATTRIBUTES
+from common.index_store import IndexHolder
+from common.s3 import download_s3_file_to_local
+from common.text import normalize, strip_html, tokenize
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_PREFIX = "indexes/search/"
+DELTA_KEY = f"{SNAPSHOT_PREFIX}delta.json.gz"
+MAGIC = b"JSIX"
+FORMAT = 1
+HEADER = struct.Struct("<4sHHI")
+ALIGN = 8
+DELTA_VERSION = 1
+# Past this many changed posts the stream rebuilds the snapshot instead.
+DELTA_LIMIT = 500
+# A query term matches at most this many dictionary terms it is a prefix of.
+MAX_EXPANSIONS = 64
+
+TITLE, SUMMARY, BODY = 1, 2, 4
+COLUMNS = ("id", "title", "contentSummary", "image", "category", "startDate", "endDate", "publishedAt")
+# Attributes a change must touch to alter the index; bodies are loaded with common/body.py.
+SEARCH_FIELDS = ("status", *COLUMNS, *BODY_ATTRIBUTES, "content")
+
+if sys.byteorder != "little":
+    raise ImportError("Search snapshots are little-endian and are read in place")
+
+
+def snapshot_key(version: int) -> str:
+    return f"{SNAPSHOT_PREFIX}snapshot-{version:010d}.bin"
+
+
+def searchable(post: Optional[dict]) -> bool:
+    return bool(post) and post.get("status") == "published" and bool(post.get("title"))
+
+
+def search_changed(old: Optional[dict], new: Optional[dict]) -> bool:
+    if searchable(old) != searchable(new):
+        return True
+    return searchable(new) and any(old.get(f) != new.get(f) for f in SEARCH_FIELDS)
+
+
+def document(post: dict) -> Tuple[Dict[str, int], dict]:
+    """Term -> field flags, and the card columns, of a post with its body loaded."""
+    terms: Dict[str, int] = defaultdict(int)
+    body = strip_html(post.get("htmlContent") or post.get("content") or "")
+    for text, flag in ((post.get("title"), TITLE), (post.get("contentSummary"), SUMMARY), (body, BODY)):
+        for term in tokenize(text):
+            terms[term] |= flag
+    card = {column: str(post.get(column) or "") for column in COLUMNS}
+    return dict(terms), card
+
+
+def _score(flags: int, title: str, phrase: str) -> int:
+    # Same weights the scan search used: title 10, summary 5, any match 1,
+    # and a bonus when the title is, or starts with, the query.
+    score = 1 + (10 if flags & TITLE else 0) + (5 if flags & SUMMARY else 0)
+    if flags & TITLE:
+        title = normalize(title)
+        if title == phrase:
+            score += 20
+        elif title.startswith(phrase):
+            score += 10
+    return score
+
+
+def _intersect(query_terms: List[str], lookup) -> Dict:
+    """
+    Documents containing every query term (each as a prefix of some
+    indexed term), with the fields all of the terms occur in.
+    """
+    matched = None
+    for query_term in query_terms:
+        flags = {}
+        for doc, f in lookup(query_term):
+            flags[doc] = flags.get(doc, 0) | f
+        matched = flags if matched is None else {d: matched[d] & f for d, f in flags.items() if d in matched}
+        if not matched:
+            return {}
+    return matched or {}
+
+
+# ---------------------------------------------------------------------------
+# Snapshot file
+
+
+def build_snapshot(documents: Iterable[Tuple[Dict[str, int], dict]], version: int, built_at: str) -> bytes:
+    docs = sorted(documents, key=lambda d: (d[1]["publishedAt"], d[1]["id"]), reverse=True)
+    postings: Dict[bytes, List[Tuple[int, int]]] = defaultdict(list)
+    for number, (terms, _) in enumerate(docs):
+        for term, flags in terms.items():
+            postings[term.encode("utf-8")].append((number, flags))
+    terms = sorted(postings)
+
+    term_offsets, postings_offsets = array("I", [0]), array("I", [0])
+    deltas, flags = [], array("B")
+    for term in terms:
+        term_offsets.append(term_offsets[-1] + len(term))
+        previous = 0
+        for number, f in postings[term]:
+            deltas.append(number - previous)
+            flags.append(f)
+            previous = number
+        postings_offsets.append(len(deltas))
+    typecode = "H" if max(deltas, default=0) <= 0xFFFF else "I"
+
+    sections = [
+        ("terms", b"".join(terms), "B"),
+        ("term_offsets", term_offsets, "I"),
+        ("postings_offsets", postings_offsets, "I"),
+        ("deltas", array(typecode, deltas), typecode),
+        ("flags", flags, "B"),
+    ]
+    for column in COLUMNS:
+        values = [card[column].encode("utf-8") for _, card in docs]
+        offsets = array("I", [0])
+        for value in values:
+            offsets.append(offsets[-1] + len(value))
+        sections.append((f"{column}.offsets", offsets, "I"))
+        sections.append((f"{column}.data", b"".join(values), "B"))
+
+    blobs = [bytes(data) for _, data, _ in sections]
+    manifest = {
+        "version": version,
+        "built_at": built_at,
+        "docs": len(docs),
+        "terms": len(terms),
+        "sections": {},
+    }
+    # Offsets depend on the manifest's own length, so lay out until it is stable.
+    start = 0
+    while True:
+        offset = start
+        for (name, _, code), blob in zip(sections, blobs):
+            manifest["sections"][name] = [offset, len(blob), code]
+            offset = _aligned(offset + len(blob))
+        encoded = json.dumps(manifest, separators=(",", ":")).encode("utf-8")
+        if _aligned(HEADER.size + len(encoded)) == start:
+            break
+        start = _aligned(HEADER.size + len(encoded))
+
+    out = bytearray(HEADER.pack(MAGIC, FORMAT, 0, len(encoded)) + encoded)
+    for (name, _, _), blob in zip(sections, blobs):
+        out.extend(b"\0" * (manifest["sections"][name][0] - len(out)))
+        out.extend(blob)
+    return bytes(out)
+
+
+def _aligned(offset: int) -> int:
+    return (offset + ALIGN - 1) // ALIGN * ALIGN
+
+
+class Snapshot:
+    """A snapshot file mapped read-only; arrays are views into the mapping."""
+
+    def __init__(self, buffer, path: Optional[str] = None):
+        self.path = path
+        self._buffer = buffer
+        view = memoryview(buffer)
+        magic, fmt, _, length = HEADER.unpack_from(view)
+        if magic != MAGIC or fmt != FORMAT:
+            raise ValueError(f"Unsupported search snapshot ({magic!r}, format {fmt})")
+        manifest = json.loads(bytes(view[HEADER.size:HEADER.size + length]))
+        self.version = manifest["version"]
+        self.built_at = manifest.get("built_at")
+        self.doc_count = manifest["docs"]
+        self.term_count = manifest["terms"]
+        self._views = [view]
+        self._sections = {}
+        for name, (offset, size, code) in manifest["sections"].items():
+            section = view[offset:offset + size]
+            self._sections[name] = section if code == "B" else section.cast(code)
+            self._views.append(self._sections[name])
+        self._terms = self._sections["terms"]
+        self._term_offsets = self._sections["term_offsets"]
+        self._postings_offsets = self._sections["postings_offsets"]
+        self._deltas = self._sections["deltas"]
+        self._flags = self._sections["flags"]
+        self._ids = None
+
+    @classmethod
+    def open(cls, path: str) -> "Snapshot":
+        with open(path, "rb") as f:
+            return cls(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ), path)
+
+    def close(self):
+        for view in reversed(self._views):
+            view.release()
+        self._views = []
+        if isinstance(self._buffer, mmap.mmap):
+            self._buffer.close()
+
+    def __len__(self):
+        return self.doc_count
+
+    def _term(self, i: int) -> bytes:
+        return bytes(self._terms[self._term_offsets[i]:self._term_offsets[i + 1]])
+
+    def _bisect(self, key: bytes) -> int:
+        lo, hi = 0, self.term_count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._term(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def prefixed(self, prefix: str) -> range:
+        """Dictionary positions of the terms starting with ``prefix``."""
+        key = prefix.encode("utf-8")
+        # 0xFF never occurs in UTF-8, so it sorts after every continuation.
+        return range(self._bisect(key), self._bisect(key + b"\xff"))
+
+    def postings(self, i: int):
+        start, end = self._postings_offsets[i], self._postings_offsets[i + 1]
+        return zip(accumulate(self._deltas[start:end]), self._flags[start:end])
+
+    def lookup(self, prefix: str):
+        for i in islice(self.prefixed(prefix), MAX_EXPANSIONS):
+            yield from self.postings(i)
+
+    def value(self, column: str, doc: int) -> str:
+        offsets = self._sections[f"{column}.offsets"]
+        return bytes(self._sections[f"{column}.data"][offsets[doc]:offsets[doc + 1]]).decode("utf-8")
+
+    def card(self, doc: int) -> dict:
+        return {column: self.value(column, doc) for column in COLUMNS}
+
+    def doc_ids(self) -> Dict[str, int]:
+        if self._ids is None:
+            self._ids = {self.value("id", doc): doc for doc in range(self.doc_count)}
+        return self._ids
+
+
+# ---------------------------------------------------------------------------
+# Delta segment
+
+
+class SearchDelta:
+    """
+    Posts changed since snapshot ``base_version``: ``docs`` indexes the
+    current version of each (when still searchable) and ``hidden`` masks
+    its snapshot copy. Both record when the change was applied, so a
+    rebuild can keep the changes its scan may have missed.
+    ``base_built_at`` tells a cached snapshot file from an older build
+    that had the same version.
+    """
+
+    def __init__(
+        self,
+        base_version: int = 0,
+        docs: Dict[str, dict] = None,
+        hidden: Dict[str, str] = None,
+        base_built_at: Optional[str] = None,
+    ):
+        self.base_version = base_version
+        self.base_built_at = base_built_at
+        self.docs = dict(docs or {})
+        self.hidden = dict(hidden or {})
+        self._postings = None
+        self._terms = None
+
+    def __len__(self):
+        return len(self.hidden)
+
+    def apply(self, changes) -> bool:
+        """``changes`` are (old, new) pairs with the new image's body loaded."""
+        now = datetime.utcnow().isoformat()
+        changed = False
+        for old, new in changes:
+            post_id = (new or old)["id"]
+            current = self.docs.get(post_id)
+            updated = post_id not in self.hidden
+            if searchable(new):
+                terms, card = document(new)
+                if current is None or current["terms"] != terms or current["card"] != card:
+                    self.docs[post_id] = {"terms": terms, "card": card, "changedAt": now}
+                    updated = True
+            elif self.docs.pop(post_id, None) is not None:
+                updated = True
+            if updated:
+                self.hidden[post_id] = now
+                changed = True
+        if changed:
+            self._postings = None
+        return changed
+
+    def rebased(self, version: int, since: str) -> "SearchDelta":
+        """The delta for snapshot ``version``, built from a scan started at ``since``."""
+        return SearchDelta(
+            version,
+            {k: v for k, v in self.docs.items() if v["changedAt"] >= since},
+            {k: v for k, v in self.hidden.items() if v >= since},
+            since,
+        )
+
+    def _compile(self):
+        postings = defaultdict(list)
+        for post_id, doc in self.docs.items():
+            for term, flags in doc["terms"].items():
+                postings[term].append((post_id, flags))
+        self._postings = dict(postings)
+        self._terms = sorted(postings)
+
+    def lookup(self, prefix: str):
+        if self._postings is None:
+            self._compile()
+        start = bisect_left(self._terms, prefix)
+        for term in islice(self._terms, start, start + MAX_EXPANSIONS):
+            if not term.startswith(prefix):
+                return
+            yield from self._postings[term]
+
+    def to_bytes(self) -> bytes:
+        payload = {
+            "version": DELTA_VERSION,
+            "base_version": self.base_version,
+            "base_built_at": self.base_built_at,
+            "docs": self.docs,
+            "hidden": self.hidden,
+        }
+        return gzip.compress(json.dumps(payload, separators=(",", ":")).encode("utf-8"))
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "SearchDelta":
+        payload = json.loads(gzip.decompress(data))
+        if payload.get("version") != DELTA_VERSION:
+            raise ValueError(f"Unsupported search delta version {payload.get('version')}")
+        return cls(payload["base_version"], payload["docs"], payload["hidden"], payload.get("base_built_at"))
+
+
+# ---------------------------------------------------------------------------
+# Queries
+
+
+class SearchView:
+    """A snapshot with a delta applied on top."""
+
+    def __init__(self, snapshot: Snapshot, delta: SearchDelta):
+        self.snapshot = snapshot
+        self.delta = delta
+        ids = snapshot.doc_ids() if delta.hidden else {}
+        self.hidden = {ids[post_id] for post_id in delta.hidden if post_id in ids}
+
+    def search(self, query: str, limit: int) -> List[dict]:
+        """Cards of the best ``limit`` posts matching every term of ``query``."""
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return []
+        phrase = normalize(query)
+        snapshot = self.snapshot
+
+        base = _intersect(terms, snapshot.lookup)
+        ranked = heapq.nlargest(
+            limit,
+            (doc for doc in base if doc not in self.hidden),
+            key=lambda doc: (_score(base[doc], snapshot.value("title", doc) if base[doc] & TITLE else "", phrase), -doc),
+        )
+        results = []
+        for doc in ranked:
+            card = snapshot.card(doc)
+            results.append((_score(base[doc], card["title"], phrase), card["publishedAt"], card))
+
+        for post_id, flags in _intersect(terms, self.delta.lookup).items():
+            card = self.delta.docs[post_id]["card"]
+            results.append((_score(flags, card["title"], phrase), card["publishedAt"], card))
+
+        results.sort(key=lambda r: (r[0], r[1]), reverse=True)
+        return [card for _, _, card in results[:limit]]
+
+
+class SearchSnapshots:
+    """
+    Module-level cache for the search handler: follows the delta (revalidated
+    like any other IndexHolder) and keeps the snapshot it names mapped.
+    """
+
+    def __init__(self, directory: Optional[str] = None, refresh_seconds: float = 60.0):
+        self.directory = directory or tempfile.gettempdir()
+        self.delta = IndexHolder(SearchDelta, DELTA_KEY, refresh_seconds)
+        self.snapshot: Optional[Snapshot] = None
+        self.load_stats: Optional[dict] = None
+        self._view: Optional[SearchView] = None
+
+    def view(self, bucket: str) -> Optional[SearchView]:
+        """The current index, or None until a snapshot has been built."""
+        delta = self.delta.get(bucket)
+        if delta is None or not delta.base_version:
+            return None
+        if self.snapshot is None or self.snapshot.version != delta.base_version:
+            self._load(bucket, delta)
+        if self._view is None or self._view.delta is not delta or self._view.snapshot is not self.snapshot:
+            self._view = SearchView(self.snapshot, delta)
+        return self._view
+
+    def _open(self, path: str, delta: SearchDelta) -> Optional[Snapshot]:
+        """The snapshot at ``path`` if it is the build ``delta`` applies to."""
+        if not os.path.exists(path):
+            return None
+        try:
+            snapshot = Snapshot.open(path)
+        except (ValueError, KeyError, struct.error) as e:
+            logger.warning(f"Discarding unreadable {path}: {e}")
+        else:
+            if snapshot.version == delta.base_version and snapshot.built_at == delta.base_built_at:
+                return snapshot
+            snapshot.close()
+        os.remove(path)
+        return None
+
+    def _load(self, bucket: str, delta: SearchDelta):
+        version = delta.base_version
+        path = os.path.join(self.directory, f"search-{version:010d}.bin")
+        started = time.perf_counter()
+        snapshot = self._open(path, delta)
+        downloaded = snapshot is None
+        if downloaded:
+            partial = f"{path}.{os.getpid()}.part"
+            if not download_s3_file_to_local(bucket, snapshot_key(version), partial):
+                raise RuntimeError(f"Search snapshot {version} could not be downloaded")
+            os.replace(partial, path)
+            fetched = time.perf_counter()
+            snapshot = self._open(path, delta)
+            if snapshot is None:
+                raise ValueError(f"Search snapshot {version} does not match {DELTA_KEY}")
+        else:
+            fetched = started
+        ready = time.perf_counter()
+
+        previous, self.snapshot, self._view = self.snapshot, snapshot, None
+        if previous is not None:
+            previous.close()
+            if previous.path and os.path.exists(previous.path):
+                os.remove(previous.path)
+        self.load_stats = {
+            "version": version,
+            "bytes": os.path.getsize(path),
+            "docs": len(snapshot),
+            "terms": snapshot.term_count,
+            "download_ms": round((fetched - started) * 1000, 3),
+            "open_ms": round((ready - fetched) * 1000, 3),
+        }
+        logger.info(f"Opened search snapshot {version}: {self.load_stats}")
@@ -0,0 +1,144 @@
+"""
+Precomputed prefix index for type-ahead suggestions.
+
+The index holds every published title and, for each term used in those
+titles, the number of titles using it. It is compiled into one sorted
+array; prefixes of up to ``PRECOMPUTED_PREFIX`` characters have their top
+suggestions precomputed, longer prefixes bisect into the array. The
+serialized form is a gzipped JSON object in the media bucket, rebuilt
+incrementally by the post stream and loaded once per warm container.
+"""
+
+import gzip
+import heapq
+import json
+from bisect import bisect_left
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from common.text import normalize, tokenize
+
+INDEX_KEY = "indexes/suggest.json.gz"
+VERSION = 1
+PRECOMPUTED_PREFIX = 2
+MAX_SUGGESTIONS = 10
+# A whole title ranks with a term used in this many titles (and wins ties).
+TITLE_ENTRY_WEIGHT = 2
+
+# Entry tuple fields, kept as tuples for a compact in-memory array.
+KEY, WEIGHT, TEXT, POST_ID = range(4)
+
+
+def suggestible(post: Optional[dict]) -> bool:
+    return bool(post) and post.get("status") == "published" and bool(post.get("title"))
+
+
+class SuggestIndex:
+    def __init__(self, titles: Dict[str, str] = None, built_at: str = None):
+        self.terms: Dict[str, int] = defaultdict(int)
+        self.titles: Dict[str, str] = {}
+        for post_id, title in (titles or {}).items():
+            self._set(post_id, title)
+        self.built_at = built_at
+        self._compile()
+
+    @classmethod
+    def from_posts(cls, posts) -> "SuggestIndex":
+        titles = {post["id"]: post["title"] for post in posts if suggestible(post)}
+        return cls(titles, datetime.utcnow().isoformat())
+
+    def _set(self, post_id: str, title: str):
+        self._drop(post_id)
+        for term in set(tokenize(title)):
+            self.terms[term] += 1
+        self.titles[post_id] = title
+
+    def _drop(self, post_id: str):
+        title = self.titles.pop(post_id, None)
+        if title is None:
+            return
+        for term in set(tokenize(title)):
+            self.terms[term] -= 1
+            if self.terms[term] <= 0:
+                del self.terms[term]
+
+    def apply(self, changes) -> bool:
+        """
+        Apply ``(old_image, new_image)`` pairs from the post stream, either of
+        which may be None. Each post's contribution is derived from the title
+        stored in the index, so replaying a batch is harmless. Returns True
+        if the index changed.
+        """
+        changed = False
+        for old, new in changes:
+            post_id = (new or old or {}).get("id")
+            if not post_id:
+                continue
+            if suggestible(new):
+                if self.titles.get(post_id) != new["title"]:
+                    self._set(post_id, new["title"])
+                    changed = True
+            elif post_id in self.titles:
+                self._drop(post_id)
+                changed = True
+        if changed:
+            self.built_at = datetime.utcnow().isoformat()
+            self._compile()
+        return changed
+
+    def _compile(self):
+        entries = [(term, weight, term, None) for term, weight in self.terms.items() if weight > 0]
+        entries.extend(
+            (normalize(title), TITLE_ENTRY_WEIGHT, title, post_id)
+            for post_id, title in self.titles.items()
+        )
+        entries.sort(key=lambda e: e[KEY])
+        self._entries = entries
+        self._keys = [e[KEY] for e in entries]
+
+        by_prefix = defaultdict(list)
+        for entry in entries:
+            for n in range(1, PRECOMPUTED_PREFIX + 1):
+                if len(entry[KEY]) >= n:
+                    by_prefix[entry[KEY][:n]].append(entry)
+        self._top = {
+            prefix: heapq.nlargest(MAX_SUGGESTIONS, candidates, key=_rank)
+            for prefix, candidates in by_prefix.items()
+        }
+
+    def __len__(self):
+        return len(self._entries)
+
+    def suggest(self, prefix: str, limit: int = MAX_SUGGESTIONS) -> List[dict]:
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        limit = min(limit, MAX_SUGGESTIONS)
+        if len(prefix) <= PRECOMPUTED_PREFIX:
+            candidates = self._top.get(prefix, [])
+        else:
+            lo = bisect_left(self._keys, prefix)
+            hi = bisect_left(self._keys, prefix + "\uffff", lo)
+            candidates = heapq.nlargest(limit, self._entries[lo:hi], key=_rank)
+        return [
+            {"text": e[TEXT], "type": "title" if e[POST_ID] else "term", **({"id": e[POST_ID]} if e[POST_ID] else {})}
+            for e in candidates[:limit]
+        ]
+
+    def to_bytes(self) -> bytes:
+        # Term counts are derived from the titles on load.
+        payload = {"version": VERSION, "built_at": self.built_at, "titles": self.titles}
+        return gzip.compress(json.dumps(payload, separators=(",", ":")).encode("utf-8"))
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "SuggestIndex":
+        payload = json.loads(gzip.decompress(data))
+        if payload.get("version") != VERSION:
+            raise ValueError(f"Unsupported suggest index version {payload.get('version')}")
+        return cls(payload["titles"], payload.get("built_at"))
+
+
+def _rank(entry):
+    # Heavier first; titles win ties over terms.
+    return entry[WEIGHT], entry[POST_ID] is not None
@@ -0,0 +1,40 @@
+"""
+Text helpers shared by the search, suggestion and related-post indexes.
+"""
+
+import re
+from html.parser import HTMLParser
+from typing import List
+
+STOPWORDS = {"a", "an", "and", "are", "for", "from", "in", "is", "of", "on", "or", "the", "to", "with"}
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+def normalize(text: str) -> str:
+    return " ".join((text or "").casefold().split())
+
+
+def tokenize(text: str) -> List[str]:
+    return [
+        t for t in TOKEN_PATTERN.findall((text or "").casefold())
+        if len(t) > 1 and not t.isdigit() and t not in STOPWORDS
+    ]
+
+
+class _TextExtractor(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+
+    def handle_data(self, data):
+        self.parts.append(data)
+
+
+def strip_html(html: str) -> str:
+    """Visible text of an HTML fragment, tags and entities removed."""
+    if not html:
+        return ""
+    extractor = _TextExtractor()
+    extractor.feed(html)
+    extractor.close()
+    return " ".join(" ".join(extractor.parts).split())
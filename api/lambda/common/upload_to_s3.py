@@ -9,7 +9,7 @@ from io import BytesIO
 
 from common.constants import StatusCodes, Headers
 from common.utils import build_response
-from common.s3 import put_s3_file, get_s3_file_url
+from common.media import media_url, store_media
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
@@ -135,34 +135,26 @@ def lambda_handler(event, context):
         )
 
     try:
-        # Generate unique filename to avoid conflicts
-        import uuid
-        import time
-        timestamp = int(time.time())
-        unique_filename = f"{timestamp}_{uuid.uuid4().hex[:8]}_{file_name}"
-        
         # Determine content type from form data if available
         file_content_type = None
         if "multipart/form-data" in content_type and 'form_data' in locals():
             file_type = form_data.get("fileType")
             if file_type:
                 file_content_type = file_type
-        
-        # Upload to S3
-        success = put_s3_file(media_bucket, unique_filename, file_content, file_content_type)
-        
-        if not success:
-            raise Exception("Failed to upload file to S3")
-            
-        file_url = get_s3_file_url(media_bucket, unique_filename)
-        
+
+        # Keyed by content hash: re-uploading the same file skips the PUT and
+        # returns the key (and URL) it already has.
+        key, existed = store_media(media_bucket, file_name, file_content, file_content_type)
+        file_url = media_url(media_bucket, key)
+
         return build_response(
             StatusCodes.CREATED,
             Headers.DEFAULT,
             {
-                "message": "File uploaded successfully", 
+                "message": "File already uploaded" if existed else "File uploaded successfully",
                 "file_url": file_url,
-                "filename": unique_filename
+                "filename": key,
+                "original_filename": file_name,
             },
         )
     except Exception as e:
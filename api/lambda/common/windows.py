@@ -0,0 +1,57 @@
+"""
+Application window of a post (the startDate..endDate period of a scheme).
+
+Published posts that have not closed yet carry an ``openWindow`` attribute,
+"upcoming" before startDate and "open" until endDate. The attribute is the
+hash key of the sparse ``openWindowEndDateIndex`` GSI, so closed and archived
+posts never appear in it and window listings read only live posts. The
+close_windows job moves posts between phases and removes the attribute once
+endDate has passed.
+"""
+
+from datetime import date, datetime, timedelta
+from typing import Optional
+
+WINDOW_ATTRIBUTE = "openWindow"
+WINDOW_INDEX = "openWindowEndDateIndex"
+OPEN = "open"
+UPCOMING = "upcoming"
+
+
+def _as_date(value) -> Optional[date]:
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(str(value)).date()
+    except ValueError:
+        return None
+
+
+def today() -> date:
+    return datetime.utcnow().date()
+
+
+def window_for(start_date, end_date, status: str = "published", on: date = None) -> Optional[str]:
+    """
+    Phase of a post on ``on`` (default today): OPEN, UPCOMING, or None when it
+    is not published, has no endDate or has already closed.
+    """
+    end = _as_date(end_date)
+    if status != "published" or not end:
+        return None
+    on = on or today()
+    if end < on:
+        return None
+    start = _as_date(start_date)
+    if start and start > on:
+        return UPCOMING
+    return OPEN
+
+
+def end_of_day(day: date) -> str:
+    """Upper bound for endDate range keys that may carry a time component."""
+    return f"{day.isoformat()}T23:59:59.999999"
+
+
+def days_from_today(days: int) -> date:
+    return today() + timedelta(days=days)
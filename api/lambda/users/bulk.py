@@ -0,0 +1,192 @@
+"""
+Bulk confirmation and group assignment of Cognito users, shared by the
+confirm-users endpoint and a command line used to onboard offices:
+
+    cd api/lambda
+    python -m users.bulk --user-pool-id us-east-1_XXXX --group user usernames.txt
+
+Users are processed concurrently, but every Cognito call first waits on a
+shared throttle so the run stays under the account's admin API quota.
+Throttled and transient errors are retried with backoff, and a throttled
+call also slows the shared schedule for every worker. Each user gets their
+own result, so one bad username never fails the batch.
+"""
+
+import argparse
+import json
+import logging
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, List, Optional
+
+import boto3
+from botocore.config import Config
+from botocore.exceptions import ClientError
+
+from common.resilience import THROTTLED, TRANSIENT, classify_error
+
+logger = logging.getLogger(__name__)
+
+# Cognito meters admin operations per account and per category; 20 calls a
+# second keeps a run under the smallest default category quota.
+RATE_PER_SECOND = 20.0
+WORKERS = 8
+MAX_ATTEMPTS = 5
+BASE_DELAY = 0.2
+MAX_DELAY = 5.0
+
+CONFIRMED = "confirmed"
+ALREADY_CONFIRMED = "already_confirmed"
+NOT_FOUND = "not_found"
+FAILED = "failed"
+SKIPPED = "skipped"
+
+# Retries are handled here, against the shared throttle.
+COGNITO_CLIENT_CONFIG = Config(retries={"mode": "standard", "max_attempts": 1})
+
+
+class Throttle:
+    """Spaces calls at most ``rate`` per second across all threads."""
+
+    def __init__(self, rate: float = RATE_PER_SECOND):
+        self.interval = 1.0 / rate
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+    def back_off(self, seconds: float):
+        """Hold every worker for ``seconds`` after the quota pushed back."""
+        with self._lock:
+            self._next = max(self._next, time.monotonic() + seconds)
+
+
+def _error_code(error: Exception) -> str:
+    if isinstance(error, ClientError):
+        return error.response.get("Error", {}).get("Code", "")
+    return type(error).__name__
+
+
+class BulkUserAdmin:
+    def __init__(
+        self,
+        client,
+        user_pool_id: str,
+        rate: float = RATE_PER_SECOND,
+        workers: int = WORKERS,
+        max_attempts: int = MAX_ATTEMPTS,
+    ):
+        self.client = client
+        self.user_pool_id = user_pool_id
+        self.throttle = Throttle(rate)
+        self.workers = workers
+        self.max_attempts = max_attempts
+
+    def _call(self, fn, result: dict, **kwargs):
+        attempt = 0
+        while True:
+            attempt += 1
+            self.throttle.wait()
+            try:
+                return fn(UserPoolId=self.user_pool_id, **kwargs)
+            except Exception as e:
+                kind = classify_error(e)
+                if kind not in (THROTTLED, TRANSIENT) or attempt >= self.max_attempts:
+                    raise
+                delay = random.uniform(BASE_DELAY, min(MAX_DELAY, BASE_DELAY * 2 ** attempt))
+                if kind == THROTTLED:
+                    self.throttle.back_off(delay)
+                result["retries"] += 1
+                logger.warning(f"Retrying {fn.__name__} for {kwargs.get('Username')} after {kind} error: {e}")
+                time.sleep(delay)
+
+    def process_user(self, username: str, groups: List[str]) -> dict:
+        result = {"username": username, "status": CONFIRMED, "groups": [], "retries": 0}
+        try:
+            try:
+                self._call(self.client.admin_confirm_sign_up, result, Username=username)
+            except ClientError as e:
+                message = e.response.get("Error", {}).get("Message", "")
+                if _error_code(e) != "NotAuthorizedException" or "CONFIRMED" not in message:
+                    raise
+                result["status"] = ALREADY_CONFIRMED
+            for group in groups:
+                self._call(self.client.admin_add_user_to_group, result, Username=username, GroupName=group)
+                result["groups"].append(group)
+        except Exception as e:
+            code = _error_code(e)
+            result["status"] = NOT_FOUND if code == "UserNotFoundException" else FAILED
+            result["error"] = code
+            result["message"] = e.response.get("Error", {}).get("Message", "") if isinstance(e, ClientError) else str(e)
+        return result
+
+    def run(self, usernames: Iterable[str], groups: Optional[List[str]] = None, context=None, reserve_ms: int = 5000,
+            budget_ms: Optional[int] = None) -> List[dict]:
+        """
+        Confirm ``usernames`` and add them to ``groups``, in input order.
+        Users not started ``reserve_ms`` before the Lambda ``context`` times
+        out, or before ``budget_ms`` from now has passed, are returned as
+        skipped so the caller can resubmit them.
+        """
+        groups = list(groups or [])
+        unique = list(dict.fromkeys(u.strip() for u in usernames if u and u.strip()))
+        started = time.monotonic()
+
+        def remaining_ms() -> Optional[float]:
+            left = [context.get_remaining_time_in_millis()] if context else []
+            if budget_ms is not None:
+                left.append(budget_ms - (time.monotonic() - started) * 1000)
+            return min(left) if left else None
+
+        def work(username):
+            left = remaining_ms()
+            if left is not None and left < reserve_ms:
+                return {"username": username, "status": SKIPPED, "groups": [], "retries": 0}
+            return self.process_user(username, groups)
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            return list(pool.map(work, unique))
+
+
+def summarize(results: List[dict]) -> dict:
+    return dict(Counter(result["status"] for result in results))
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("usernames", nargs="?", default="-", help="file with one username per line, '-' for stdin")
+    parser.add_argument("--user-pool-id", required=True)
+    parser.add_argument("--group", action="append", default=[], help="group to add every user to (repeatable)")
+    parser.add_argument("--rate", type=float, default=RATE_PER_SECOND, help="Cognito calls per second")
+    parser.add_argument("--workers", type=int, default=WORKERS)
+    parser.add_argument("--region")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.WARNING, format="%(message)s")
+
+    if args.usernames == "-":
+        usernames = sys.stdin.read().split()
+    else:
+        with open(args.usernames) as f:
+            usernames = f.read().split()
+
+    client = boto3.client("cognito-idp", region_name=args.region, config=COGNITO_CLIENT_CONFIG)
+    results = BulkUserAdmin(client, args.user_pool_id, rate=args.rate, workers=args.workers).run(usernames, args.group)
+    for result in results:
+        print(json.dumps(result))
+    summary = summarize(results)
+    print(json.dumps({"summary": summary}), file=sys.stderr)
+    return 1 if summary.get(FAILED) or summary.get(NOT_FOUND) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,12 +3,14 @@ import boto3
 import logging
 import os
 from common.utils import build_response
-from common.contsants import Headers, StatusCodes
+from common.constants import Headers, StatusCodes
 import json
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
+client = boto3.client('cognito-idp')
+
 def lambda_handler(event, context):
 
     """
@@ -23,12 +25,13 @@ def lambda_handler(event, context):
         if not payload.get('username'):
             logger.error('username not set')
             return build_response(StatusCodes.BAD_REQUEST, Headers.BAD_REQUEST, {'message': 'username not set'})
-        client = boto3.client('cognito-idp')
         client.admin_confirm_sign_up(
             UserPoolId=os.environ['USER_POOL_ID'],
             Username=payload['username']
         )
-        return build_response(StatusCodes.OK, Headers.Default, {'message': 'User confirmed'})
+        return build_response(StatusCodes.OK, Headers.DEFAULT, {'message': 'User confirmed'})
+    except client.exceptions.UserNotFoundException:
+        return build_response(StatusCodes.NOT_FOUND, Headers.NOT_FOUND, {'message': 'User not found'})
     except Exception as e:
         logger.error(e)
         return build_response(StatusCodes.INTERNAL_SERVER_ERROR, Headers.INTERNAL_SERVER_ERROR, {'message': str(e)})
\ No newline at end of file
@@ -0,0 +1,117 @@
+"""
+Confirm a batch of Cognito users and add them to groups, with one result
+per user (see users/bulk.py). The route sits behind the Cognito authorizer
+and only members of the admin group may call it. Users that could not be
+started in time come back as skipped; larger batches go through the
+command line in users/bulk.py.
+"""
+import os
+import json
+import logging
+import boto3
+from typing import Optional
+from common.utils import build_response
+from common.constants import StatusCodes, Headers
+from users.bulk import COGNITO_CLIENT_CONFIG, BulkUserAdmin, summarize
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+cognito = boto3.client("cognito-idp", config=COGNITO_CLIENT_CONFIG)
+
+# API Gateway ends REST integrations after 29 s whatever the Lambda timeout,
+# and the per-user results are lost with the response. Users are started
+# only while the response can still make it back within RESPONSE_BUDGET_MS;
+# at two throttled Cognito calls each, a full batch fits in about 20 s.
+RESPONSE_BUDGET_MS = 25000
+MAX_USERS = 200
+# Elevated groups are granted with the command line, not over HTTP.
+ASSIGNABLE_GROUPS = {"user"}
+ADMIN_GROUP = "admin"
+
+
+def caller_groups(event) -> Optional[set]:
+    """
+    Groups in the authorizer's ``cognito:groups`` claim (REST APIs pass it as
+    one string), or None when the request carries no verified claims.
+    """
+    claims = ((event.get("requestContext") or {}).get("authorizer") or {}).get("claims")
+    if claims is None:
+        return None
+    groups = claims.get("cognito:groups") or []
+    if isinstance(groups, str):
+        groups = groups.strip("[]").replace(",", " ").split()
+    return set(groups)
+
+
+def lambda_handler(event, context):
+    try:
+        USER_POOL_ID = os.getenv("USER_POOL_ID")
+
+        if not USER_POOL_ID:
+            return build_response(
+                StatusCodes.INTERNAL_SERVER_ERROR,
+                Headers.INTERNAL_SERVER_ERROR,
+                {"message": "Environment variable USER_POOL_ID not set."},
+            )
+
+        caller = caller_groups(event)
+        if caller is None:
+            return build_response(
+                StatusCodes.UNAUTHORIZED,
+                Headers.UNAUTHORIZED,
+                {"message": "Sign in to confirm users."},
+            )
+        if ADMIN_GROUP not in caller:
+            return build_response(
+                StatusCodes.FORBIDDEN,
+                Headers.FORBIDDEN,
+                {"message": "Only admins may confirm users."},
+            )
+
+        try:
+            payload = json.loads(event.get("body") or "{}")
+        except json.JSONDecodeError:
+            return build_response(StatusCodes.BAD_REQUEST, Headers.BAD_REQUEST, {"message": "Body must be JSON."})
+
+        usernames = payload.get("usernames")
+        groups = payload.get("groups") or []
+
+        if (
+            not isinstance(usernames, list)
+            or not usernames
+            or not all(isinstance(u, str) and u.strip() for u in usernames)
+        ):
+            return build_response(
+                StatusCodes.BAD_REQUEST,
+                Headers.BAD_REQUEST,
+                {"message": "'usernames' must be a non-empty list of usernames."},
+            )
+        if len(usernames) > MAX_USERS:
+            return build_response(
+                StatusCodes.BAD_REQUEST,
+                Headers.BAD_REQUEST,
+                {"message": f"At most {MAX_USERS} users per request."},
+            )
+        if not isinstance(groups, list) or not set(groups) <= ASSIGNABLE_GROUPS:
+            return build_response(
+                StatusCodes.BAD_REQUEST,
+                Headers.BAD_REQUEST,
+                {"message": f"'groups' may only contain: {', '.join(sorted(ASSIGNABLE_GROUPS))}."},
+            )
+
+        results = BulkUserAdmin(cognito, USER_POOL_ID).run(
+            usernames, groups, context=context, budget_ms=RESPONSE_BUDGET_MS
+        )
+        summary = summarize(results)
+        logger.info(f"Bulk confirm of {len(results)} users: {summary}")
+
+        return build_response(StatusCodes.OK, Headers.DEFAULT, {"results": results, "summary": summary})
+
+    except Exception as e:
+        logger.error(f"Error confirming users: {str(e)}", exc_info=True)
+        return build_response(
+            StatusCodes.INTERNAL_SERVER_ERROR,
+            Headers.INTERNAL_SERVER_ERROR,
+            {"message": "An error occurred while confirming users."},
+        )
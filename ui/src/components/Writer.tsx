@@ -130,15 +130,22 @@ const Writer: React.FC = () => {
     setSubmissionStatus(status);
 
     try {
-      // 2. --- First API Call: Create Blog with JSON Data INCLUDING file extension ---
-      const contentSummary = editor.getText().split(/\s+/).slice(0, 20).join(" ") + "...";
-      
-      // Get the file extension to send to the backend.
+      // 2. --- First API Call: Upload the Image file ---
+      // The response carries the content key the post must reference.
       const extension = getFileExtension(thumbnail.name);
       if (!extension) {
         throw new Error("Invalid file type. The file must have an extension (e.g., .jpg, .png).");
       }
-      
+
+      const uploadResponse = await uploadToS3(thumbnail.name, thumbnail);
+
+      if ('error' in uploadResponse) {
+        throw new Error("The image upload failed. The blog post was not saved.");
+      }
+
+      // 3. --- Second API Call: Create Blog with JSON Data INCLUDING the image key ---
+      const contentSummary = editor.getText().split(/\s+/).slice(0, 20).join(" ") + "...";
+
       const blogPostData = {
         title,
         htmlContent: editor.getHTML(),
@@ -147,7 +154,7 @@ const Writer: React.FC = () => {
         endDate,
         category,
         status: status,
-        imageType: `${extension}`,
+        image: uploadResponse.filename,
       };
 
       const createResponse = await createBlog(blogPostData as CreateBlogPost);
@@ -160,20 +167,6 @@ const Writer: React.FC = () => {
         throw new Error("Failed to save blog. No ID returned.");
       }
 
-      const newBlogId = createResponse.id;
-      const filename = `${newBlogId}${extension}`; // Use the new blog ID for the filename
-      console.log(`Blog created with ID: ${newBlogId}. Now uploading image...`);
-
-      // 3. --- Second API Call: Upload the Image file with the new Blog ID ---
-      // The `uploadToS3` function now takes the blogId and the file itself.
-      const uploadResponse = await uploadToS3(filename, thumbnail);
-
-      if ('error' in uploadResponse) {
-        // Here, you might want to add logic to delete the created blog post
-        // to avoid having a blog entry with no image.
-        throw new Error("Blog post was saved, but the image upload failed.");
-      }
-      
       showSuccess(`Blog post saved as ${status} successfully!`);
       
       // Reset form after successful submission
@@ -82,18 +82,16 @@ export async function fallbackSearchBlogs(
 
     const searchTerm = query.toLowerCase().trim();
     
-    // Search through titles, summaries, and content
+    // Search through titles and summaries. Listings do not carry post
+    // bodies (only get-blog-by-id does), so body text is matched by the
+    // search API alone.
     const matchingBlogs = response.blogs
       .filter(blog => {
         const title = (blog.title || "").toLowerCase();
         const summary = (blog.summary || "").toLowerCase();
-        const textContent = (blog.textContent || "").toLowerCase();
-        const htmlContent = (blog.htmlContent || "").toLowerCase();
         
         return title.includes(searchTerm) || 
-               summary.includes(searchTerm) || 
-               textContent.includes(searchTerm) ||
-               htmlContent.includes(searchTerm);
+               summary.includes(searchTerm);
       })
       .sort((a, b) => {
         // Prioritize title matches over summary/content matches
@@ -3,7 +3,7 @@ export interface CreateBlogPost {
     title: string;
     htmlContent: string;
     contentSummary: string;
-    imageType: string; 
+    image: string; // Content key returned by /upload-to-s3
     startDate: string;
     endDate: string;
     category?: string;
@@ -34,7 +34,7 @@ export interface BlogPost {
     title: string;
     summary: string;
     image: string;
-    htmlContent?: string; 
+    htmlContent?: string; // Only returned by get-blog-by-id, never by listings or search
     textContent?: string;
     startDate?: string;
     endDate?: string;